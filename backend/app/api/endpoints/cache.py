@@ -1,12 +1,12 @@
 import logging
 from fastapi import APIRouter, HTTPException
 
+from app.core.library_index import library_index
 from app.core.library_state import library_state
-from app.core.services.manga_scanner import MangaScanner
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-scanner = MangaScanner()
+scanner = library_index.scanner
 
 
 @router.get("/api/cache/info", tags=["cache"], summary="Informações do cache")
@@ -64,6 +64,7 @@ async def clear_cache():
     
     try:
         success = scanner.clear_cache(library_state.current_path)
+        library_index.invalidate()
         
         if success:
             return {
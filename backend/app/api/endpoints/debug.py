@@ -4,13 +4,16 @@ from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
 
+from app.core.hot_image_cache import hot_images
+from app.core.library_index import library_index
 from app.core.library_state import library_state
-from app.core.services.manga_scanner import MangaScanner
-from app.core.utils import create_image_url
+from app.core.library_watcher import library_watcher
+from app.core.page_prober import page_prober
+from app.core.page_readahead import page_readahead
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-scanner = MangaScanner()
+scanner = library_index.scanner
 
 
 @router.get("/api/debug", tags=["debug"], summary="Informações de debug")
@@ -99,7 +102,7 @@ async def debug_thumbnails():
         return {"error": "Nenhuma biblioteca configurada"}
     
     try:
-        library = scanner.scan_library(library_state.current_path)
+        library = library_index.get_library(library_state.current_path)
         
         debug_info = []
         for manga in library.mangas:
@@ -108,7 +111,7 @@ async def debug_thumbnails():
                 "original_thumbnail": manga.thumbnail,
                 "file_exists": Path(manga.thumbnail).exists() if manga.thumbnail else False,
                 "is_file": Path(manga.thumbnail).is_file() if manga.thumbnail and Path(manga.thumbnail).exists() else False,
-                "clean_url": create_image_url(manga.thumbnail) if manga.thumbnail else None
+                "clean_url": library_index.thumbnail_url(manga.thumbnail)
             }
             debug_info.append(thumbnail_info)
         
@@ -134,7 +137,11 @@ async def debug_reader_info():
     debug_info = {
         "library_configured": library_state.current_path is not None,
         "library_path": library_state.current_path,
-        "cache_entries": len(_chapter_cache) if '_chapter_cache' in globals() else 0,
+        "index": library_index.get_stats(),
+        "watcher": library_watcher.get_status(),
+        "hot_images": hot_images.get_stats(),
+        "page_prober": page_prober.get_status(),
+        "page_readahead": page_readahead.get_status(),
         "progress_file_exists": Path("reading_progress.json").exists(),
         "available_endpoints": [
             "/api/manga/{manga_id}",
@@ -1,26 +1,343 @@
 import logging
+import math
+import mimetypes
+import os
+import stat
 import urllib.parse
+import zipfile
 from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
 
+from app.core.hot_image_cache import hot_images
+from app.core.http_cache import conditional_file_response, conditional_response, file_etag, is_not_modified
+from app.core.library_index import library_index
 from app.core.library_state import library_state
+from app.core.page_readahead import page_readahead
+from app.core.services.archive_reader import ArchiveMember, archive_reader
+from app.core.services.image_service import ORIGINAL_TIER, OUTPUT_FORMATS, QualityTier, image_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Client Hints usados para escolher a largura; a resposta varia com eles (e com Save-Data)
+CLIENT_HINTS = "Width, Viewport-Width, DPR"
+VARY_HEADERS = {"Vary": f"Accept, Save-Data, {CLIENT_HINTS}", "Accept-CH": CLIENT_HINTS}
+MAX_DPR = 4.0
 
-@router.get("/api/image", tags=["assets"], summary="Servir imagem")
-async def serve_image(path: str):
+# Formato de cada extensão de origem (para não transcodificar à toa)
+SOURCE_FORMATS = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.webp': 'webp'}
+
+
+def _requested_width(request: Request, width: Optional[int]) -> Optional[int]:
+    """Largura em pixels: ?w= > Width > Viewport-Width x DPR"""
+    if width:
+        return width
+    
+    try:
+        hinted_width = request.headers.get("width")
+        if hinted_width:
+            return math.ceil(float(hinted_width))
+        
+        viewport_width = request.headers.get("viewport-width")
+        if viewport_width:
+            dpr = min(max(float(request.headers.get("dpr") or 1.0), 1.0), MAX_DPR)
+            return math.ceil(float(viewport_width) * dpr)
+    except ValueError:
+        pass
+    
+    return None
+
+
+def _accepts_webp(request: Request) -> bool:
+    return "image/webp" in request.headers.get("accept", "")
+
+
+def _output_format(request: Request, requested: Optional[str], resizing: bool) -> Optional[str]:
+    if requested:
+        return requested
+    if not resizing:
+        return None
+    if image_service.settings.image_auto_webp and _accepts_webp(request):
+        return "webp"
+    return "jpeg"
+
+
+def quality_tier(request: Request, quality: Optional[str]) -> Optional[QualityTier]:
+    """
+    Perfil de economia de dados: ?quality= > Save-Data: on
+    (`image_save_data_tier`) > nenhum.
+    
+    Raises:
+        HTTPException: Se o perfil pedido não existir
+    """
+    tiers = image_service.quality_tiers()
+    if quality:
+        if quality == ORIGINAL_TIER:
+            return None
+        if quality not in tiers:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Qualidade inválida: {quality}. Opções: {', '.join([*tiers, ORIGINAL_TIER])}"
+            )
+        return tiers[quality]
+    
+    if request.headers.get("save-data", "").strip().lower() == "on":
+        return tiers.get(image_service.settings.image_save_data_tier)
+    return None
+
+
+def _derivative_variant(request: Request, file_path: str, width: Optional[int], output_format: Optional[str],
+                        tier: Optional[QualityTier] = None) -> Optional[Tuple[Optional[int], str, Optional[int]]]:
+    """(largura, formato, qualidade) da versão a gerar, ou None para servir o original"""
+    if file_path.lower().endswith('.gif'):
+        return None
+    
+    target_width = image_service.snap_width(_requested_width(request, width))
+    
+    if tier is not None:
+        # O perfil limita a largura e define formato e qualidade
+        target_width = min(target_width or tier.max_width, tier.max_width)
+        if not output_format:
+            output_format = tier.output_format
+            if output_format == "webp" and not _accepts_webp(request):
+                output_format = "jpeg"
+        return target_width, output_format, tier.quality
+    
+    output_format = _output_format(request, output_format, target_width is not None)
+    source_format = SOURCE_FORMATS.get(Path(file_path).suffix.lower())
+    
+    if output_format is None or (target_width is None and output_format == source_format):
+        return None
+    return target_width, output_format, None
+
+
+def _indexed_grayscale(file_path: str) -> Optional[bool]:
+    """Page.grayscale já sondado pelo índice (None: ainda não se sabe)"""
+    page = library_index.find_page(file_path)
+    return page.grayscale if page is not None else None
+
+
+def _indexed_derivative(file_path: str, width: Optional[int], output_format: str,
+                        source_etag: Optional[str], quality: Optional[int]) -> Path:
+    """Derivada da página usando o tom já sondado pelo índice. Bloqueante."""
+    return image_service.derivative(
+        file_path, width, output_format, source_etag, quality, _indexed_grayscale(file_path)
+    )
+
+
+async def _derivative_response(request: Request, file_path: str, source_etag: str,
+                               variant: Tuple[Optional[int], str, Optional[int]]):
+    target_width, output_format, quality = variant
+    derivative_file = await run_in_threadpool(
+        _indexed_derivative, file_path, target_width, output_format, source_etag, quality
+    )
+    return conditional_file_response(
+        request, str(derivative_file),
+        media_type=OUTPUT_FORMATS[output_format][2],
+        extra_headers=VARY_HEADERS
+    )
+
+
+def open_page_variant(request: Request, file_path: str, width: Optional[int] = None,
+                      output_format: Optional[str] = None,
+                      tier: Optional[QualityTier] = None) -> Tuple[BinaryIO, int, str]:
+    """
+    Abre a mesma versão da página que /api/image/{page_id} enviaria
+    (original, membro de ZIP/CBZ ou derivada em cache). Bloqueante: usar
+    fora do event loop.
+    
+    Returns:
+        (arquivo aberto, tamanho em bytes, media type)
+    """
+    member = archive_reader.get_member(file_path)
+    variant = _derivative_variant(request, file_path, width, output_format, tier)
+    
+    if variant is not None:
+        target_width, variant_format, quality = variant
+        derivative_file = _indexed_derivative(
+            file_path, target_width, variant_format, member.etag if member else None, quality
+        )
+        handle = open(derivative_file, 'rb')
+        return handle, os.fstat(handle.fileno()).st_size, OUTPUT_FORMATS[variant[1]][2]
+    
+    media_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    if member is not None:
+        return member.open(), member.file_size, media_type
+    
+    handle = open(file_path, 'rb')
+    return handle, os.fstat(handle.fileno()).st_size, media_type
+
+
+async def _image_response(request: Request, file_path: str, file_stat: os.stat_result,
+                          width: Optional[int] = None, output_format: Optional[str] = None,
+                          tier: Optional[QualityTier] = None):
+    """
+    Serve o original ou, se pedido, uma versão redimensionada/transcodificada
+    (gerada uma vez e servida do cache em disco com os mesmos validadores).
+    """
+    variant = _derivative_variant(request, file_path, width, output_format, tier)
+    if variant is None:
+        return conditional_file_response(request, file_path, file_stat, extra_headers=VARY_HEADERS)
+    return await _derivative_response(request, file_path, file_etag(file_stat), variant)
+
+
+async def _member_response(request: Request, file_path: str, member: ArchiveMember,
+                           width: Optional[int] = None, output_format: Optional[str] = None,
+                           tier: Optional[QualityTier] = None):
+    """
+    Serve uma página de dentro de um arquivo ZIP/CBZ sem extraí-la.
+    
+    Membros sem compressão (STORED, o caso comum em CBZ) são enviados como
+    um trecho do próprio arquivo, com Range e sendfile como qualquer
+    imagem; membros comprimidos são descomprimidos em memória.
+    """
+    variant = _derivative_variant(request, file_path, width, output_format, tier)
+    if variant is not None:
+        return await _derivative_response(request, file_path, member.etag, variant)
+    
+    data = None
+    if not member.is_stored and not is_not_modified(request, member.archive_stat, member.etag) \
+            and hot_images.get(file_path, member.etag) is None:
+        data = await run_in_threadpool(member.read)
+    
+    return conditional_response(
+        request, member.archive_path, member.archive_stat, member.etag, member.file_size,
+        extra_headers=VARY_HEADERS,
+        offset=member.data_offset if member.is_stored else 0,
+        data=data,
+        cache_key=file_path
+    )
+
+
+@router.get("/api/image/{page_id}", tags=["assets"], summary="Servir imagem por id")
+async def serve_image_by_id(page_id: str, request: Request,
+                            w: Optional[int] = Query(None, ge=1, le=10000),
+                            format: Optional[str] = Query(None, pattern="^(jpeg|webp)$"),
+                            quality: Optional[str] = Query(None, max_length=32)):
+    """
+    Serve uma imagem da biblioteca a partir do id opaco emitido pelo índice.
+    
+    O id aponta para um caminho já validado na indexação: basta uma consulta
+    em memória e a abertura do arquivo, sem decodificar nem resolver caminhos.
+    Páginas de capítulos em ZIP/CBZ são lidas direto do arquivo compactado.
+    
+    Com `w` (ou os Client Hints Width / Viewport-Width + DPR) a página é
+    reduzida para a menor faixa de `image_width_buckets` que cobre a largura;
+    larguras maiores que a última faixa recebem o original. Versões
+    redimensionadas usam WebP quando o navegador aceita (`image_auto_webp`).
+    
+    `quality` (low, medium, original) ou o cabeçalho `Save-Data: on`
+    escolhem um perfil de `image_quality_tiers` (largura máxima, formato e
+    qualidade) para quem lê com dados móveis.
+    
+    As páginas seguintes do capítulo são lidas antecipadamente em segundo
+    plano (`readahead_pages`).
+    
+    Args:
+        page_id: Id da imagem (campo "id"/"url" das páginas e miniaturas)
+        w: Largura desejada em pixels
+        format: Força o formato de saída (jpeg ou webp)
+        quality: Perfil de qualidade (padrão: Save-Data ou original)
+    
+    Returns:
+        FileResponse: Arquivo de imagem requisitado (ou 304 Not Modified)
+    
+    Raises:
+        HTTPException: Se o id for desconhecido, o perfil inválido ou o arquivo não existir mais
+    """
+    
+    tier = quality_tier(request, quality)
+    # Um id de índice frio pode carregar o mangá (ou a biblioteca): fora do event loop
+    file_path = await run_in_threadpool(library_index.resolve_page, page_id)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="Imagem não encontrada")
+    
+    # Próximas páginas (e início do capítulo seguinte) vão para o page cache
+    page_readahead.after_page(file_path)
+    
+    try:
+        member = await run_in_threadpool(archive_reader.get_member, file_path)
+        if member is not None:
+            return await _member_response(request, file_path, member, w, format, tier)
+        file_stat = await run_in_threadpool(os.stat, file_path)
+        return await _image_response(request, file_path, file_stat, w, format, tier)
+    except FileNotFoundError:
+        logger.info(f"Arquivo não encontrado para o id {page_id}")
+        raise HTTPException(status_code=404, detail="Imagem não encontrada")
+    except PermissionError:
+        logger.warning(f"Imagem sem permissão de leitura (ou criptografada): {page_id}")
+        raise HTTPException(status_code=403, detail="Imagem não pode ser lida")
+    except (OSError, zipfile.BadZipFile) as e:
+        # Pillow levanta OSError (UnidentifiedImageError) para imagens inválidas;
+        # BadZipFile indica membro corrompido (CRC) no arquivo compactado
+        logger.warning(f"Erro ao converter imagem {page_id}: {e}")
+        raise HTTPException(status_code=422, detail="Não foi possível converter a imagem")
+
+
+@router.get("/api/thumbnail/{page_id}", tags=["assets"], summary="Miniatura da imagem")
+async def serve_thumbnail(page_id: str, request: Request):
+    """
+    Serve uma miniatura (capas e capítulos) de uma imagem da biblioteca.
+    
+    A miniatura é gerada com `thumbnail_size`/`thumbnail_quality` e, com
+    `cache_thumbnails` ativo, gravada no cache em disco: as requisições
+    seguintes apenas enviam o arquivo (com suporte a 304).
+    
+    Args:
+        page_id: Id da imagem (o mesmo de `/api/image/{page_id}`)
+    
+    Returns:
+        FileResponse: Miniatura em JPEG (ou 304 Not Modified)
+    
+    Raises:
+        HTTPException: Se o id for desconhecido ou a imagem não puder ser lida
+    """
+    
+    file_path = await run_in_threadpool(library_index.resolve_page, page_id)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="Imagem não encontrada")
+    
+    try:
+        if not image_service.settings.cache_thumbnails:
+            content = await run_in_threadpool(image_service.render_thumbnail, file_path)
+            return Response(content=content, media_type="image/jpeg")
+        
+        thumbnail_file = await run_in_threadpool(image_service.thumbnail, file_path)
+        return conditional_file_response(request, str(thumbnail_file), media_type="image/jpeg")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Imagem não encontrada")
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Imagem não pode ser lida")
+    except OSError as e:
+        # Pillow levanta OSError (UnidentifiedImageError) para imagens inválidas
+        logger.warning(f"Erro ao gerar miniatura de {page_id}: {e}")
+        raise HTTPException(status_code=422, detail="Não foi possível gerar a miniatura")
+
+
+@router.get("/api/image", tags=["assets"], summary="Servir imagem por caminho", deprecated=True)
+async def serve_image(path: str, request: Request,
+                      w: Optional[int] = Query(None, ge=1, le=10000),
+                      format: Optional[str] = Query(None, pattern="^(jpeg|webp)$")):
     """
     Serve arquivos de imagem da biblioteca de mangás com validação de segurança.
     
+    Obsoleto: as respostas da API usam `/api/image/{page_id}`; esta rota
+    permanece para links antigos.
+    
+    Envia ETag, Last-Modified e Cache-Control; requisições condicionais
+    (If-None-Match / If-Modified-Since) recebem 304 sem abrir o arquivo.
+    
     Args:
         path: Caminho codificado da imagem a ser servida
+        w: Largura desejada em pixels (ver `/api/image/{page_id}`)
+        format: Força o formato de saída (jpeg ou webp)
     
     Returns:
-        FileResponse: Arquivo de imagem requisitado
+        FileResponse: Arquivo de imagem requisitado (ou 304 Not Modified)
         
     Raises:
         HTTPException: Se a biblioteca não estiver configurada, arquivo não encontrado
@@ -61,8 +378,12 @@ async def serve_image(path: str):
             logger.info(f"Path fora da biblioteca: {file_path}")
             raise HTTPException(status_code=404, detail="Arquivo não encontrado")
         
-        # Validar que existe e é arquivo
-        if not file_path.exists() or not file_path.is_file():
+        # Validar que existe e é arquivo (um único stat, reaproveitado na resposta)
+        try:
+            file_stat = file_path.stat()
+        except OSError:
+            file_stat = None
+        if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
             logger.info(f"Arquivo não encontrado: {file_path}")
             raise HTTPException(status_code=404, detail="Arquivo não encontrado")
         
@@ -73,7 +394,7 @@ async def serve_image(path: str):
             raise HTTPException(status_code=400, detail="Tipo de arquivo não permitido")
         
         logger.info(f"Servindo imagem: {file_path.name}")
-        return FileResponse(path=str(file_path))
+        return await _image_response(request, str(file_path), file_stat, w, format)
         
     except HTTPException:
         raise
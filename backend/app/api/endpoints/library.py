@@ -5,15 +5,15 @@ from pathlib import Path
 
 from fastapi import APIRouter, HTTPException, Form
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from app.core.library_index import library_index
 from app.core.library_state import library_state
 from app.core.services.manga_scanner import MangaScanner
 from app.models.manga import LibraryResponse
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-scanner = MangaScanner()
 
 
 def manga_to_dict(manga):
@@ -23,8 +23,7 @@ def manga_to_dict(manga):
     manga_dict = {
         "id": manga.id,
         "title": manga.title,
-        "path": manga.path,
-        "thumbnail": manga.thumbnail,
+        "thumbnail": library_index.thumbnail_url(manga.thumbnail),
         "chapter_count": manga.chapter_count,
         "total_pages": manga.total_pages,
         "author": manga.author,
@@ -43,7 +42,6 @@ def manga_to_dict(manga):
             "name": chapter.name,
             "number": chapter.number,
             "volume": chapter.volume,
-            "path": chapter.path,
             "page_count": chapter.page_count,
             "date_added": chapter.date_added.isoformat() if chapter.date_added else None,
             "pages": []
@@ -53,23 +51,14 @@ def manga_to_dict(manga):
     return manga_dict
 
 
-def _scan_library_common(library_path: str, method: str = "POST"):
-    """
-    Lógica comum para escanear biblioteca (usada por POST e GET)
+def resolve_library_path(library_path: str, method: str = "POST") -> Path:
     """
-
-    # Limpar e normalizar o caminho
-    library_path = library_path.strip()
+    Valida o caminho de uma biblioteca e retorna o Path a ser escaneado.
     
-    # Log para debug
-    logger.info(f"[{method}] Caminho recebido: '{library_path}'")
-    if method == "POST":
-        logger.info(f"Comprimento: {len(library_path)} caracteres")
-        logger.info(f"Encoding: {library_path.encode('utf-8')}")
-    
-    if library_state.current_path != library_path:
-        logger.info(f"[{method}] Mudando biblioteca de '{library_state.current_path}' para '{library_path}'")
-        library_state.clear()
+    Raises:
+        HTTPException: Caminho inexistente, não é diretório, sem permissão
+                       ou sem subdiretórios de mangá
+    """
     
     # Validar se o caminho existe - com tratamento melhor de Unicode para POST
     if method == "POST":
@@ -140,10 +129,33 @@ def _scan_library_common(library_path: str, method: str = "POST"):
             detail=f"Pasta não contém subdiretórios (mangás): {library_path}"
         )
     
-    logger.info(f"Escaneando biblioteca: {library_path}")
+    return path_obj
+
+
+def _scan_library_common(library_path: str, method: str = "POST"):
+    """
+    Lógica comum para escanear biblioteca (usada por POST e GET)
+    """
+    
+    # Limpar e normalizar o caminho
+    library_path = library_path.strip()
+    
+    # Log para debug
+    logger.info(f"[{method}] Caminho recebido: '{library_path}'")
+    if method == "POST":
+        logger.info(f"Comprimento: {len(library_path)} caracteres")
+        logger.info(f"Encoding: {library_path.encode('utf-8')}")
     
-    library = scanner.scan_library(str(path_obj))
+    if library_state.current_path != library_path:
+        logger.info(f"[{method}] Mudando biblioteca de '{library_state.current_path}' para '{library_path}'")
+        library_state.clear()
     
+    path_obj = resolve_library_path(library_path, method)
+    library_path = str(path_obj)
+    
+    logger.info(f"Escaneando biblioteca: {library_path}")
+    
+    library = library_index.refresh(str(path_obj))
     
     # Atualizar caminho atual SOMENTE após sucesso
     library_state.current_path = str(path_obj)
@@ -176,6 +188,7 @@ async def clear_library():
         logger.info("Limpando biblioteca no backend...")
         
         library_state.clear()
+        library_index.invalidate()
         
         logger.info("Biblioteca limpa no backend")
         
@@ -288,7 +301,7 @@ async def get_library():
         )
     
     try:
-        library = scanner.scan_library(current_path)
+        library = library_index.get_library(current_path)
         
         response_data = {
             "library": {
@@ -313,6 +326,58 @@ async def get_library():
         )
 
 
+@router.get("/api/library/stream", tags=["library"], summary="Biblioteca em streaming (NDJSON)")
+async def stream_library(refresh: bool = False):
+    """
+    Retorna a biblioteca atual em NDJSON, um mangá por linha, enviado assim
+    que o escaneamento o produz. A resposta nunca monta a biblioteca inteira
+    em memória nem um documento JSON único.
+    
+    Linhas:
+        {"type": "manga", "manga": {...}}
+        {"type": "summary", "total_mangas": ..., "total_chapters": ..., "total_pages": ...}
+        {"type": "error", "detail": "..."}  (falha no meio do stream)
+    
+    Args:
+        refresh: Força um novo escaneamento em vez de usar o índice em memória
+    
+    Raises:
+        HTTPException: Se nenhuma biblioteca estiver configurada
+    """
+    
+    current_path = library_state.current_path
+    
+    if not current_path:
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhuma biblioteca configurada"
+        )
+    
+    if not library_state.validate_current_path():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Caminho da biblioteca inválido: {current_path}"
+        )
+    
+    def ndjson_lines():
+        totals = {"total_mangas": 0, "total_chapters": 0, "total_pages": 0}
+        
+        try:
+            for manga in library_index.iter_library(current_path, refresh=refresh):
+                totals["total_mangas"] += 1
+                totals["total_chapters"] += manga.chapter_count
+                totals["total_pages"] += manga.total_pages
+                yield json.dumps({"type": "manga", "manga": manga_to_dict(manga)}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.warning(f"Erro no streaming da biblioteca: {str(e)}")
+            yield json.dumps({"type": "error", "detail": f"Erro ao carregar biblioteca: {str(e)}"}, ensure_ascii=False) + "\n"
+            return
+        
+        yield json.dumps({"type": "summary", "current_path": current_path, **totals}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/api/validate-path", tags=["library"], summary="Validar caminho da biblioteca")
 async def validate_library_path(path: str):
     """
@@ -326,7 +391,7 @@ async def validate_library_path(path: str):
     """
     
     try:
-        is_valid, message = scanner.validate_library_path(path)
+        is_valid, message = MangaScanner.validate_library_path(path)
         
         return {
             "path": path,
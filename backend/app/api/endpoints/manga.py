@@ -2,13 +2,12 @@ import logging
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 
+from app.core.library_index import library_index
 from app.core.library_state import library_state
-from app.core.services.manga_scanner import MangaScanner
-from app.core.utils import create_image_url
+from app.core.page_prober import page_prober
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-scanner = MangaScanner()
 
 
 @router.get("/api/manga/{manga_id}", tags=["manga"], summary="Obter detalhes do mangá")
@@ -34,8 +33,7 @@ async def get_manga(manga_id: str):
         )
     
     try:
-        library = scanner.scan_library(library_state.current_path)
-        manga = library.get_manga(manga_id)
+        manga = library_index.get_manga(manga_id, library_state.current_path)
         
         if not manga:
             raise HTTPException(
@@ -43,12 +41,14 @@ async def get_manga(manga_id: str):
                 detail=f"Mangá '{manga_id}' não encontrado na biblioteca"
             )
         
+        # Dimensões das páginas chegam em segundo plano para o leitor
+        page_prober.enqueue(manga, library_state.current_path)
+        
         # Preparar dados do mangá com serialização adequada de datetime
         manga_data = {
             "id": manga.id,
             "title": manga.title,
-            "path": manga.path,
-            "thumbnail": create_image_url(manga.thumbnail) if manga.thumbnail else None,
+            "thumbnail": library_index.thumbnail_url(manga.thumbnail),
             "chapter_count": manga.chapter_count,
             "total_pages": manga.total_pages,
             "author": manga.author,
@@ -75,8 +75,7 @@ async def get_manga(manga_id: str):
             
             # Adicionar thumbnail da primeira página
             if chapter.pages:
-                first_page_path = chapter.pages[0].path
-                chapter_summary['thumbnail_url'] = create_image_url(first_page_path)
+                chapter_summary['thumbnail_url'] = library_index.thumbnail_url(chapter.pages[0].path)
             
             chapters_with_thumbnails.append(chapter_summary)
         
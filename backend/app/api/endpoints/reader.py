@@ -1,43 +1,113 @@
 import json
 import logging
+import os
 import re
+import secrets
+import urllib.parse
+import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.api.endpoints.image import VARY_HEADERS, open_page_variant, quality_tier
+from app.core.http_cache import conditional_file_response, if_range_matches, is_not_modified, parse_range, \
+    RangeNotSatisfiable
+from app.core.library_index import library_index
 from app.core.library_state import library_state
-from app.core.services.manga_scanner import MangaScanner
+from app.core.page_prober import page_prober
+from app.core.page_readahead import page_readahead
+from app.core.services.chapter_zip import ChapterTooLarge, StoredZip, chapter_entries
+from app.core.services.image_probe import PAGE_SINGLE, PAGE_SPREAD, PAGE_STRIP, classify_page
+from app.core.services.image_service import ORIGINAL_TIER, QualityTier, image_service
+from app.models.manga import Page
 
 logger = logging.getLogger(__name__)
 
+# Limite de páginas por requisição em /pages (lote de pré-carregamento)
+MAX_BATCH_PAGES = 32
+BATCH_CHUNK_SIZE = 256 * 1024
+# O CBZ de um capítulo muda quando páginas mudam: o cliente sempre revalida (ETag)
+DOWNLOAD_CACHE_CONTROL = "no-cache"
+
+
+def page_to_dict(page) -> dict:
+    page_id = library_index.page_id(page.path)
+    return {
+        "id": page_id,
+        "filename": page.filename,
+        "url": f"/api/image/{page_id}" if page_id else None,
+        "size": page.size,
+        # 0: cabeçalho ilegível (ver page_prober); para o cliente, sem dimensões
+        "width": page.width or None,
+        "height": page.height or None,
+        "grayscale": page.grayscale,
+        "layout": classify_page(page.width, page.height)
+    }
+
+
 def chapter_to_dict(chapter) -> dict:
     return {
         "id": chapter.id,
         "name": chapter.name,
         "number": chapter.number,
         "volume": chapter.volume,
-        "path": chapter.path,
         "page_count": chapter.page_count,
         "date_added": chapter.date_added.isoformat() if chapter.date_added else None,
-        "pages": [
-            {
-                "filename": page.filename,
-                "path": page.path,
-                "size": page.size,
-                "width": page.width,
-                "height": page.height
-            }
-            for page in chapter.pages
-        ]
+        "pages": [page_to_dict(page) for page in chapter.pages]
     }
 
-router = APIRouter()
-scanner = MangaScanner()
 
-# Cache global para dados de capítulos
-_chapter_cache = {}
+def chapter_tier_sizes(chapter) -> dict:
+    """
+    Bytes aproximados do capítulo em cada perfil de qualidade, a partir dos
+    tamanhos e dimensões sondados das páginas (para o cliente escolher).
+    """
+    pages = chapter.pages
+    sizes = {ORIGINAL_TIER: {"bytes": sum(page.size or 0 for page in pages)}}
+    for name, tier in image_service.quality_tiers().items():
+        sizes[name] = {
+            "bytes": sum(image_service.estimate_bytes(page.size, page.width, page.height, tier) for page in pages),
+            "max_width": tier.max_width,
+            "format": tier.output_format
+        }
+    return {
+        "tiers": sizes,
+        # Páginas ainda não sondadas entram com o tamanho original (ou zero)
+        "probed_pages": sum(1 for page in pages if page.width and page.height)
+    }
+
+
+def chapter_layout(chapter) -> dict:
+    """
+    Dicas de layout do capítulo a partir das dimensões das páginas: quantas
+    são simples, duplas ou tiras verticais, onde estão as duplas (índices
+    em "pages") e o modo de leitura sugerido ("vertical" quando a maioria
+    é tira de webtoon).
+    """
+    counts = {PAGE_SINGLE: 0, PAGE_SPREAD: 0, PAGE_STRIP: 0}
+    spreads = []
+    for index, page in enumerate(chapter.pages):
+        layout = classify_page(page.width, page.height)
+        if layout is None:
+            continue
+        counts[layout] += 1
+        if layout == PAGE_SPREAD:
+            spreads.append(index)
+    
+    classified = sum(counts.values())
+    return {
+        "suggested_mode": "vertical" if counts[PAGE_STRIP] * 2 > classified else "single",
+        "counts": counts,
+        "spread_indexes": spreads,
+        "classified_pages": classified
+    }
+
+
+router = APIRouter()
 
 def _find_chapter_flexible(manga, chapter_id: str):
     """    
@@ -117,15 +187,8 @@ async def get_chapter(manga_id: str, chapter_id: str):
     try:
         logger.info(f"Requisição de capítulo: {manga_id}/{chapter_id}")
         
-        # Verificar cache primeiro
-        cache_key = f"{manga_id}_{chapter_id}"
-        if cache_key in _chapter_cache:
-            logger.info(f"Cache hit para capítulo: {chapter_id}")
-            return _chapter_cache[cache_key]
-        
-        # Escanear biblioteca para encontrar o capítulo
-        library = scanner.scan_library(library_state.current_path)
-        manga = library.get_manga(manga_id)
+        # Buscar mangá no índice da biblioteca
+        manga = library_index.get_manga(manga_id, library_state.current_path)
         
         if not manga:
             raise HTTPException(
@@ -151,13 +214,15 @@ async def get_chapter(manga_id: str, chapter_id: str):
                 }
             )
         
-        # Converter caminhos das páginas para URLs da API
+        # Páginas ainda sem dimensões (e layout) são sondadas em segundo plano,
+        # a começar por este capítulo
+        page_prober.enqueue(manga, library_state.current_path, chapter)
+        
+        # Primeiras páginas já vão sendo lidas do disco enquanto o cliente processa a resposta
+        page_readahead.chapter_opened(chapter)
+        
+        # Páginas já vêm com ids opacos e URLs da API
         chapter_data = chapter_to_dict(chapter)
-        for page in chapter_data['pages']:
-            if not page['path'].startswith('/api/image'):
-                page['url'] = f"/api/image?path={page['path']}"
-            else:
-                page['url'] = page['path']  # Já é uma URL da API
         
         # Adicionar informações extras
         response_data = {
@@ -172,11 +237,11 @@ async def get_chapter(manga_id: str, chapter_id: str):
                 "next_chapter": _find_next_chapter(manga, chapter),
                 "chapter_index": _get_chapter_index(manga, chapter)
             },
+            "quality": chapter_tier_sizes(chapter),
+            "layout": chapter_layout(chapter),
             "message": f"Capítulo '{chapter.name}' carregado com sucesso"
         }
         
-        _chapter_cache[cache_key] = response_data
-        
         logger.info(f"Capítulo carregado: {chapter.name} ({len(chapter.pages)} páginas)")
         return response_data
         
@@ -191,6 +256,194 @@ async def get_chapter(manga_id: str, chapter_id: str):
             detail=f"Erro ao carregar capítulo: {str(e)}"
         )
 
+
+def _download_filename(manga, chapter) -> str:
+    return re.sub(r'[\\/:*?"<>|]+', '_', f"{manga.title} - {chapter.name}") + ".cbz"
+
+
+def _content_disposition(filename: str) -> str:
+    """attachment com nome ASCII de reserva e o nome real em UTF-8 (RFC 6266)"""
+    fallback = filename.encode('ascii', 'replace').decode('ascii').replace('?', '_').replace('"', '_')
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{urllib.parse.quote(filename)}"
+
+
+def _stored_zip_response(request: Request, archive: StoredZip, headers: dict) -> Response:
+    """
+    Envia o ZIP (ou o intervalo pedido) com tamanho exato, 304 e 206.
+    
+    Validado só pelo ETag (nomes, tamanhos, CRCs e datas das páginas): o
+    mtime do diretório não muda quando uma página é regravada no lugar.
+    """
+    etag = archive.etag
+    headers = {**headers, "ETag": etag, "Accept-Ranges": "bytes"}
+    
+    if is_not_modified(request, None, etag):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        ranges = parse_range(request.headers.get("range"), archive.size) \
+            if if_range_matches(request, None, etag) else None
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{archive.size}"})
+    
+    # Um único intervalo basta para retomar downloads; vários recebem o arquivo inteiro
+    if ranges is not None and len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{archive.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(archive.iter_bytes(start, end), status_code=206,
+                                 media_type="application/zip", headers=headers)
+    
+    headers["Content-Length"] = str(archive.size)
+    return StreamingResponse(archive.iter_bytes(), media_type="application/zip", headers=headers)
+
+
+@router.get("/api/manga/{manga_id}/chapter/{chapter_id}/download")
+async def download_chapter(manga_id: str, chapter_id: str, request: Request):
+    """
+    Baixa um capítulo inteiro como um único arquivo CBZ (ZIP).
+    
+    O ZIP é montado durante o envio a partir das páginas do índice, com
+    entradas sem compressão (as imagens já são comprimidas): nada é gravado
+    em disco e o tamanho é conhecido de antemão (Content-Length), então
+    downloads interrompidos podem ser retomados com Range.
+    
+    Os CRC-32 das páginas são calculados no primeiro download e guardados
+    no índice junto das demais informações da página. Capítulos que já são
+    arquivos CBZ/ZIP são enviados como estão.
+    """
+    
+    if not library_state.current_path:
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhuma biblioteca configurada"
+        )
+    
+    manga = library_index.get_manga(manga_id, library_state.current_path)
+    if not manga:
+        raise HTTPException(status_code=404, detail=f"Mangá '{manga_id}' não encontrado")
+    
+    chapter = _find_chapter_flexible(manga, chapter_id)
+    if not chapter or not chapter.pages:
+        raise HTTPException(status_code=404, detail=f"Capítulo '{chapter_id}' não encontrado")
+    
+    headers = {
+        "Content-Disposition": _content_disposition(_download_filename(manga, chapter)),
+        "Cache-Control": DOWNLOAD_CACHE_CONTROL
+    }
+    
+    try:
+        if os.path.isfile(chapter.path):
+            return conditional_file_response(request, chapter.path, media_type="application/zip",
+                                             extra_headers=headers)
+        
+        entries, computed = await run_in_threadpool(chapter_entries, chapter.pages)
+        if computed:
+            library_index.update_checksums(manga.id, computed)
+            logger.info(f"CRC calculado para {len(computed)} páginas de {chapter.name}")
+        
+        return _stored_zip_response(request, StoredZip(entries), headers)
+    except ChapterTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"Capítulo grande demais para um único ZIP: {e}")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Página do capítulo não encontrada")
+    except OSError as e:
+        logger.error(f"Erro ao preparar download de {chapter.name}: {e}")
+        raise HTTPException(status_code=500, detail="Erro ao ler páginas do capítulo")
+
+
+def _page_batch(request: Request, pages: List[Page], first_number: int, boundary: str,
+                width: Optional[int], output_format: Optional[str],
+                tier: Optional[QualityTier] = None) -> Iterator[bytes]:
+    """
+    Corpo multipart/mixed com as páginas lidas em sequência.
+    
+    Cada parte traz Content-Type, Content-Length, Content-ID (id da
+    página) e Content-Location (URL da página). Páginas que não puderem
+    ser lidas são omitidas; o cliente busca essas pela URL normal.
+    """
+    for number, page in enumerate(pages, first_number):
+        page_id = library_index.page_id(page.path)
+        try:
+            handle, size, media_type = open_page_variant(request, page.path, width, output_format, tier)
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.warning(f"Página omitida do lote: {page.filename} ({e})")
+            continue
+        
+        with handle:
+            yield (
+                f"--{boundary}\r\n"
+                f"Content-Type: {media_type}\r\n"
+                f"Content-Length: {size}\r\n"
+                f"Content-ID: <{page_id}>\r\n"
+                f"Content-Location: /api/image/{page_id}\r\n"
+                f"X-Page-Number: {number}\r\n\r\n"
+            ).encode("latin-1")
+            
+            remaining = size
+            while remaining > 0:
+                chunk = handle.read(min(BATCH_CHUNK_SIZE, remaining))
+                if not chunk:
+                    # O tamanho já foi anunciado: sem como continuar o enquadramento
+                    raise OSError(f"Página alterada durante o envio: {page.path}")
+                remaining -= len(chunk)
+                yield chunk
+        yield b"\r\n"
+    
+    yield f"--{boundary}--\r\n".encode("latin-1")
+
+
+@router.get("/api/manga/{manga_id}/chapter/{chapter_id}/pages")
+async def get_chapter_pages_batch(manga_id: str, chapter_id: str, request: Request,
+                                  start: int = Query(0, ge=0),
+                                  count: int = Query(10, ge=1, le=MAX_BATCH_PAGES),
+                                  w: Optional[int] = Query(None, ge=1, le=10000),
+                                  format: Optional[str] = Query(None, pattern="^(jpeg|webp)$"),
+                                  quality: Optional[str] = Query(None, max_length=32)):
+    """
+    Várias páginas de um capítulo em uma única resposta multipart/mixed.
+    
+    Feito para o pré-carregamento do leitor: uma requisição busca a janela
+    inteira e as imagens são lidas do disco em sequência, em vez de uma
+    requisição (roteamento, validação, abertura de arquivo) por página.
+    `w`, `format`, `quality` e os Client Hints (e Save-Data) têm o mesmo efeito que em
+    `/api/image/{page_id}`, então cada parte é idêntica ao que aquela URL
+    enviaria.
+    
+    Args:
+        start: Índice (a partir de 0) da primeira página
+        count: Número de páginas (máximo MAX_BATCH_PAGES)
+    """
+    
+    if not library_state.current_path:
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhuma biblioteca configurada"
+        )
+    
+    tier = quality_tier(request, quality)
+    manga = library_index.get_manga(manga_id, library_state.current_path)
+    if not manga:
+        raise HTTPException(status_code=404, detail=f"Mangá '{manga_id}' não encontrado")
+    
+    chapter = _find_chapter_flexible(manga, chapter_id)
+    if not chapter:
+        raise HTTPException(status_code=404, detail=f"Capítulo '{chapter_id}' não encontrado")
+    
+    pages = chapter.pages[start:start + count]
+    if not pages:
+        raise HTTPException(status_code=404, detail="Nenhuma página no intervalo pedido")
+    
+    page_readahead.after_page(pages[-1].path)
+    
+    boundary = secrets.token_hex(16)
+    return StreamingResponse(
+        _page_batch(request, pages, start + 1, boundary, w, format, tier),
+        media_type=f"multipart/mixed; boundary={boundary}",
+        headers={**VARY_HEADERS, "Cache-Control": "no-store"}
+    )
+
+
 @router.get("/api/manga/{manga_id}/chapters")
 async def get_manga_chapters(manga_id: str, limit: int = Query(500, ge=1, le=1000)):
     """
@@ -204,8 +457,7 @@ async def get_manga_chapters(manga_id: str, limit: int = Query(500, ge=1, le=100
         )
     
     try:
-        library = scanner.scan_library(library_state.current_path)
-        manga = library.get_manga(manga_id)
+        manga = library_index.get_manga(manga_id, library_state.current_path)
         
         if not manga:
             raise HTTPException(
@@ -223,13 +475,9 @@ async def get_manga_chapters(manga_id: str, limit: int = Query(500, ge=1, le=100
                 "volume": chapter.volume,
                 "page_count": chapter.page_count,
                 "date_added": chapter.date_added.isoformat() if chapter.date_added else None,
-                "thumbnail": chapter.pages[0].path if chapter.pages else None
+                "thumbnail_url": library_index.thumbnail_url(chapter.pages[0].path) if chapter.pages else None
             }
             
-            # Converter thumbnail para URL
-            if chapter_summary["thumbnail"]:
-                chapter_summary["thumbnail_url"] = f"/api/image?path={chapter_summary['thumbnail']}"
-            
             chapters_summary.append(chapter_summary)
         
         response_data = {
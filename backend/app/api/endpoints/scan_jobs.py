@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.endpoints.library import resolve_library_path
+from app.core.library_state import library_state
+from app.core.scan_jobs import ScanJob, scan_jobs
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Intervalo entre verificações de progresso e entre heartbeats do SSE
+EVENT_POLL_SECONDS = 0.5
+HEARTBEAT_SECONDS = 15.0
+
+
+def _get_job_or_404(job_id: str) -> ScanJob:
+    job = scan_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job não encontrado: {job_id}")
+    return job
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/api/scan-jobs", tags=["library"], summary="Iniciar escaneamento em segundo plano", status_code=202)
+async def start_scan_job(library_path: Optional[str] = Form(None)):
+    """
+    Inicia o escaneamento da biblioteca em segundo plano e retorna o job
+    imediatamente. O progresso pode ser acompanhado em
+    `GET /api/scan-jobs/{job_id}/events` (Server-Sent Events).
+    
+    Args:
+        library_path: Caminho da biblioteca (padrão: biblioteca atual)
+    
+    Returns:
+        dict: Job criado (ou o job já em andamento para o mesmo caminho)
+    
+    Raises:
+        HTTPException: Se o caminho for inválido ou não houver biblioteca configurada
+    """
+    
+    library_path = (library_path or library_state.current_path or "").strip()
+    if not library_path:
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhuma biblioteca configurada. Informe library_path."
+        )
+    
+    path_obj = resolve_library_path(library_path, "POST")
+    job = scan_jobs.start(str(path_obj))
+    
+    return {
+        "job": job.to_dict(),
+        "events_url": f"/api/scan-jobs/{job.id}/events"
+    }
+
+
+@router.get("/api/scan-jobs", tags=["library"], summary="Listar jobs de escaneamento")
+async def list_scan_jobs():
+    """
+    Lista os jobs de escaneamento recentes.
+    
+    Returns:
+        dict: Jobs em andamento e concluídos
+    """
+    
+    return {"jobs": [job.to_dict() for job in scan_jobs.list()]}
+
+
+@router.get("/api/scan-jobs/{job_id}", tags=["library"], summary="Status do job de escaneamento")
+async def get_scan_job(job_id: str):
+    """
+    Retorna o estado e o progresso de um job.
+    
+    Raises:
+        HTTPException: Se o job não existir
+    """
+    
+    return _get_job_or_404(job_id).to_dict()
+
+
+@router.delete("/api/scan-jobs/{job_id}", tags=["library"], summary="Cancelar job de escaneamento")
+async def cancel_scan_job(job_id: str):
+    """
+    Solicita o cancelamento de um job. O escaneamento para antes do próximo
+    mangá e o índice atual é mantido.
+    
+    Raises:
+        HTTPException: Se o job não existir
+    """
+    
+    job = _get_job_or_404(job_id)
+    scan_jobs.cancel(job_id)
+    
+    return {
+        "job": job.to_dict(),
+        "message": "Job já finalizado" if job.finished else "Cancelamento solicitado"
+    }
+
+
+@router.get("/api/scan-jobs/{job_id}/events", tags=["library"], summary="Progresso do job (SSE)")
+async def scan_job_events(job_id: str, request: Request):
+    """
+    Transmite o progresso do job via Server-Sent Events.
+    
+    Eventos:
+        progress: contadores, tempo decorrido e ETA (a cada mudança)
+        done: estado final do job; a conexão é encerrada em seguida
+    
+    Raises:
+        HTTPException: Se o job não existir
+    """
+    
+    job = _get_job_or_404(job_id)
+    
+    async def event_stream():
+        last_version = None
+        last_sent = time.monotonic()
+        
+        while True:
+            if await request.is_disconnected():
+                break
+            
+            if job.finished:
+                yield _sse_event("done", job.to_dict())
+                break
+            
+            version = job.progress.version
+            if version != last_version:
+                last_version = version
+                last_sent = time.monotonic()
+                yield _sse_event("progress", {"status": job.status, **job.progress.snapshot()})
+            elif time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+                # Comentário SSE mantém proxies e o navegador conectados
+                last_sent = time.monotonic()
+                yield ": heartbeat\n\n"
+            
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
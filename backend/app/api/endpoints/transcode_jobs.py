@@ -0,0 +1,92 @@
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Form, HTTPException
+
+from app.api.endpoints.library import resolve_library_path
+from app.core.library_state import library_state
+from app.core.transcode_jobs import TranscodeJob, transcode_jobs
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _get_job_or_404(job_id: str) -> TranscodeJob:
+    job = transcode_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job não encontrado: {job_id}")
+    return job
+
+
+@router.post("/api/transcode-jobs", tags=["cache"], summary="Pré-processar páginas em segundo plano", status_code=202)
+async def start_transcode_job(library_path: Optional[str] = Form(None)):
+    """
+    Gera em segundo plano as versões redimensionadas e as miniaturas de
+    todas as páginas da biblioteca, para que o leitor só receba arquivos
+    prontos. Pode ser disparado em horários de pouco uso (ex.: cron); um job
+    interrompido retoma do último mangá concluído.
+    
+    Args:
+        library_path: Caminho da biblioteca (padrão: biblioteca atual)
+    
+    Returns:
+        dict: Job criado (ou o job já em andamento)
+    
+    Raises:
+        HTTPException: Se o caminho for inválido ou não houver biblioteca configurada
+    """
+    
+    library_path = (library_path or library_state.current_path or "").strip()
+    if not library_path:
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhuma biblioteca configurada. Informe library_path."
+        )
+    
+    path_obj = resolve_library_path(library_path, "POST")
+    job = transcode_jobs.start(str(path_obj))
+    
+    return {"job": job.to_dict()}
+
+
+@router.get("/api/transcode-jobs", tags=["cache"], summary="Listar jobs de pré-processamento")
+async def list_transcode_jobs():
+    """
+    Lista os jobs de pré-processamento recentes.
+    
+    Returns:
+        dict: Jobs em andamento e concluídos
+    """
+    
+    return {"jobs": [job.to_dict() for job in transcode_jobs.list()]}
+
+
+@router.get("/api/transcode-jobs/{job_id}", tags=["cache"], summary="Status do job de pré-processamento")
+async def get_transcode_job(job_id: str):
+    """
+    Retorna o estado e o progresso de um job.
+    
+    Raises:
+        HTTPException: Se o job não existir
+    """
+    
+    return _get_job_or_404(job_id).to_dict()
+
+
+@router.delete("/api/transcode-jobs/{job_id}", tags=["cache"], summary="Cancelar job de pré-processamento")
+async def cancel_transcode_job(job_id: str):
+    """
+    Solicita o cancelamento de um job. Páginas ainda na fila são
+    descartadas; os mangás já concluídos ficam no checkpoint.
+    
+    Raises:
+        HTTPException: Se o job não existir
+    """
+    
+    job = _get_job_or_404(job_id)
+    transcode_jobs.cancel(job_id)
+    
+    return {
+        "job": job.to_dict(),
+        "message": "Job já finalizado" if job.finished else "Cancelamento solicitado"
+    }
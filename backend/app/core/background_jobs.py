@@ -0,0 +1,132 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Type
+
+from app.core.services.scan_progress import ScanCancelled, ScanProgress
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJob:
+    """Tarefa sobre uma biblioteca executada em segundo plano"""
+    
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    
+    FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+    
+    progress_class: Type[ScanProgress] = ScanProgress
+    
+    def __init__(self, library_path: str):
+        self.id = uuid.uuid4().hex
+        self.library_path = library_path
+        self.status = self.PENDING
+        self.progress = self.progress_class()
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self._done = threading.Event()
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in self.FINISHED_STATES
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+    
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "library_path": self.library_path,
+            "status": self.status,
+            "progress": self.progress.snapshot(),
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class BackgroundJobManager:
+    """
+    Base dos gerenciadores de jobs: cada job roda em uma thread própria,
+    o cancelamento é cooperativo (via progresso) e jobs concluídos ficam
+    disponíveis para consulta até serem descartados pelos mais recentes.
+    
+    Subclasses definem `job_class`, `label` (usado nos logs) e `_execute`.
+    """
+    
+    job_class: Type[BackgroundJob] = BackgroundJob
+    label = "Job"
+    thread_name = "ohara-job"
+    
+    def __init__(self, max_finished: int = 20):
+        self.max_finished = max_finished
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, BackgroundJob]" = OrderedDict()
+    
+    def start(self, library_path: str) -> BackgroundJob:
+        """Inicia um job, reaproveitando o que já estiver em andamento"""
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.finished and self._reuses(job, library_path):
+                    return job
+            
+            job = self.job_class(library_path)
+            self._jobs[job.id] = job
+            self._prune()
+        
+        thread = threading.Thread(target=self._run, args=(job,), name=f"{self.thread_name}-{job.id[:8]}", daemon=True)
+        thread.start()
+        logger.info(f"{self.label} {job.id} iniciado: {library_path}")
+        return job
+    
+    def get(self, job_id: str) -> Optional[BackgroundJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def list(self) -> List[BackgroundJob]:
+        with self._lock:
+            return list(self._jobs.values())
+    
+    def cancel(self, job_id: str) -> Optional[BackgroundJob]:
+        """Solicita o cancelamento (atendido no próximo ponto de verificação)"""
+        job = self.get(job_id)
+        if job and not job.finished:
+            job.progress.cancel()
+            logger.info(f"Cancelamento solicitado: {self.label} {job_id}")
+        return job
+    
+    def _reuses(self, job: BackgroundJob, library_path: str) -> bool:
+        """Se um job em andamento atende a um novo pedido para library_path"""
+        return job.library_path == library_path
+    
+    def _execute(self, job: BackgroundJob) -> None:
+        raise NotImplementedError
+    
+    def _run(self, job: BackgroundJob) -> None:
+        job.status = job.RUNNING
+        try:
+            self._execute(job)
+            job.status = job.COMPLETED
+        except ScanCancelled:
+            job.status = job.CANCELLED
+            logger.info(f"{self.label} {job.id} cancelado")
+        except Exception as e:
+            job.error = str(e)
+            job.status = job.FAILED
+            logger.warning(f"{self.label} {job.id} falhou: {e}")
+        finally:
+            job.finished_at = datetime.now()
+            job.progress.finish()
+            job._done.set()
+    
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -35,6 +35,53 @@ class Settings(BaseSettings):
     # Configurações de cache
     cache_thumbnails: bool = True
     cache_dir: str = "cache"
+    image_cache_control: str = "public, max-age=604800"  # Páginas quase nunca mudam
+    
+    # Versões redimensionadas das páginas (?w= ou Client Hints)
+    image_width_buckets: List[int] = Field(default=[480, 720, 1080, 1440])
+    image_derivative_quality: int = 80
+    image_auto_webp: bool = True  # WebP quando o navegador aceita (só em versões redimensionadas)
+    
+    # Perfis de economia de dados (?quality= ou Save-Data: on); "original" não converte
+    image_quality_tiers: Dict[str, Dict[str, Any]] = Field(default={
+        "low": {"max_width": 720, "format": "webp", "quality": 50},
+        "medium": {"max_width": 1080, "format": "webp", "quality": 70}
+    })
+    image_save_data_tier: str = "low"  # Perfil aplicado quando o navegador envia Save-Data: on
+    
+    # Corta margens brancas/pretas das versões derivadas (usa NumPy se instalado)
+    image_trim_borders: bool = False
+    # Páginas em tons de cinza viram versões derivadas de um canal (modo L)
+    image_encode_grayscale: bool = True
+    
+    # Pré-processamento da biblioteca em segundo plano (POST /api/transcode-jobs)
+    pretranscode_formats: List[str] = Field(default=["webp"])
+    pretranscode_workers: int = 2  # Processos do pool
+    pretranscode_nice: int = 10  # Prioridade baixa para não disputar CPU com o leitor
+    pretranscode_queue_size: int = 32  # Páginas enviadas ao pool sem resultado
+    
+    # Cache em memória das imagens mais acessadas (capas, primeiras páginas)
+    hot_cache_max_bytes: int = 64 * 1024 * 1024  # 64MB
+    hot_cache_max_item_bytes: int = 1024 * 1024  # Só imagens de até 1MB
+    
+    # Configurações de escaneamento
+    scan_max_workers: int = 8  # Threads para escanear mangás em paralelo
+    
+    # Sonda largura/altura das páginas (só o cabeçalho) em segundo plano
+    probe_page_dimensions: bool = True
+    # Decodifica cada página sondada para detectar páginas cinza; desligado, a
+    # detecção acontece ao gerar a derivada (só das páginas realmente servidas)
+    probe_page_grayscale: bool = False
+    
+    # Leitura antecipada (posix_fadvise) das próximas páginas; 0 desativa
+    readahead_pages: int = 4
+    readahead_next_chapter_pages: int = 2
+    
+    # Configurações do watcher (atualiza o índice quando a biblioteca muda)
+    watch_library: bool = False
+    watch_use_inotify: bool = True  # Linux; nos demais casos usa polling
+    watch_debounce_seconds: float = 2.0  # Silêncio antes de reescanear
+    watch_poll_interval: float = 30.0  # Intervalo do fallback por polling
     
     # Configurações de logging
     log_level: str = "INFO"
@@ -57,6 +104,7 @@ def get_settings() -> Settings:
 
 # Constantes úteis
 SUPPORTED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
+ARCHIVE_EXTENSIONS = {'.cbz', '.zip'}  # Capítulos compactados lidos sem extração (RAR/CBR não)
 CHAPTER_PATTERNS = [
     r'Vol\.\s*\d+,\s*Ch\.\s*(\d+\.?\d*)',  # "Vol. 1, Ch. 1.5"
     r'Volume\s*\d+\s*Chapter\s*(\d+\.?\d*)', # "Volume 1 Chapter 1"
@@ -0,0 +1,122 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class HotImageCache:
+    """
+    LRU em memória, limitado em bytes, com as imagens pequenas mais pedidas
+    (capas, primeiras páginas, miniaturas) prontas para envio.
+    
+    Uma imagem só entra no cache no segundo acesso: o primeiro fica apenas
+    registrado em uma lista "fantasma" (só chaves). Assim a leitura
+    sequencial de um capítulo não expulsa as imagens realmente quentes.
+    
+    Entradas são validadas pelo ETag do arquivo; se o arquivo mudar, a
+    entrada antiga é descartada no próximo acesso.
+    """
+    
+    def __init__(self, max_bytes: int, max_item_bytes: int, max_ghosts: int = 4096):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.max_ghosts = max_ghosts
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._ghosts: "OrderedDict[str, None]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, file_path: str, etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[0] == etag:
+                self._entries.move_to_end(file_path)
+                self.hits += 1
+                return entry[1]
+            
+            if entry is not None:
+                self._remove(file_path)
+            self.misses += 1
+            return None
+    
+    def should_admit(self, file_path: str, size: int) -> bool:
+        """Registra o acesso e diz se a imagem deve ser carregada no cache"""
+        if size > self.max_item_bytes or size > self.max_bytes:
+            return False
+        
+        with self._lock:
+            if file_path in self._ghosts:
+                del self._ghosts[file_path]
+                return True
+            
+            self._ghosts[file_path] = None
+            while len(self._ghosts) > self.max_ghosts:
+                self._ghosts.popitem(last=False)
+            return False
+    
+    def put(self, file_path: str, etag: str, data: bytes) -> None:
+        if len(data) > self.max_item_bytes or len(data) > self.max_bytes:
+            return
+        
+        with self._lock:
+            self._remove(file_path)
+            self._entries[file_path] = (etag, data)
+            self.current_bytes += len(data)
+            
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+    
+    def load(self, key: str, etag: str, size: int, file_path: Optional[str] = None, offset: int = 0) -> None:
+        """
+        Lê o conteúdo e o coloca no cache (executado após a resposta).
+        
+        O conteúdo é o trecho [offset, offset + size) de file_path (padrão:
+        a própria chave).
+        """
+        file_path = file_path or key
+        try:
+            with open(file_path, 'rb') as handle:
+                handle.seek(offset)
+                data = handle.read(size + 1 if not offset else size)
+        except OSError as e:
+            logger.debug(f"Não foi possível carregar {key} no cache quente: {e}")
+            return
+        
+        # Arquivo mudou entre o stat e a leitura: a próxima requisição recarrega
+        if len(data) == size:
+            self.put(key, etag, data)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._ghosts.clear()
+            self.current_bytes = 0
+    
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+    
+    def _remove(self, file_path: str) -> None:
+        entry = self._entries.pop(file_path, None)
+        if entry is not None:
+            self.current_bytes -= len(entry[1])
+
+
+# Instância global compartilhada pelos routers
+hot_images = HotImageCache(
+    max_bytes=get_settings().hot_cache_max_bytes,
+    max_item_bytes=get_settings().hot_cache_max_item_bytes
+)
@@ -0,0 +1,295 @@
+import mimetypes
+import os
+import secrets
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from starlette.background import BackgroundTask
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.hot_image_cache import hot_images
+
+# Acima disso o cabeçalho Range é ignorado (resposta completa)
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    """Nenhum intervalo pedido está dentro do arquivo (HTTP 416)"""
+    pass
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """ETag forte derivado de inode, tamanho e mtime (sem ler o arquivo)"""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def cache_headers(stat_result: os.stat_result, etag: Optional[str] = None) -> Dict[str, str]:
+    """Validadores e política de cache para um arquivo servido"""
+    return {
+        "ETag": etag or file_etag(stat_result),
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": get_settings().image_cache_control,
+        "Accept-Ranges": "bytes"
+    }
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    
+    # Em GET a comparação é fraca: W/"x" equivale a "x"
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_not_modified(request: Request, stat_result: Optional[os.stat_result], etag: str) -> bool:
+    """
+    Verifica If-None-Match / If-Modified-Since (RFC 9110, seção 13.2.2).
+    
+    If-None-Match tem precedência; If-Modified-Since só é considerado
+    quando o cliente não envia ETag. Sem `stat_result` (conteúdo sem data
+    de modificação própria), só o ETag valida.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and stat_result is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since is None:
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return int(stat_result.st_mtime) <= since.timestamp()
+    
+    return False
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Interpreta o cabeçalho Range (RFC 9110, seção 14.2).
+    
+    Returns:
+        Intervalos (início, fim inclusivo) ordenados e sem sobreposição, ou
+        None quando o cabeçalho deve ser ignorado (ausente, outra unidade,
+        sintaxe inválida ou intervalos demais)
+    
+    Raises:
+        RangeNotSatisfiable: Se nenhum intervalo cabe no arquivo
+    """
+    if not range_header:
+        return None
+    
+    unit, _, specs = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+    
+    ranges = []
+    for spec in specs.split(","):
+        first, dash, last = (part.strip() for part in spec.partition("-"))
+        if not dash or not (first or last) or not all(_is_number(part) for part in (first, last) if part):
+            return None
+        
+        if not first:
+            # Sufixo: os últimos N bytes
+            length = int(last)
+            if length > 0 and size > 0:
+                ranges.append((max(0, size - length), size - 1))
+            continue
+        
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = int(last) if last else size - 1
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    
+    if len(ranges) > MAX_RANGES:
+        return None
+    if not ranges:
+        raise RangeNotSatisfiable()
+    
+    # Intervalos sobrepostos ou contíguos viram um só
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _is_number(text: str) -> bool:
+    return text.isascii() and text.isdigit()
+
+
+def if_range_matches(request: Request, stat_result: Optional[os.stat_result], etag: str) -> bool:
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # If-Range usa comparação forte: ETags fracos nunca batem
+        return if_range == etag
+    return stat_result is not None and if_range == formatdate(stat_result.st_mtime, usegmt=True)
+
+
+class PartialFileResponse(Response):
+    """
+    Resposta 206 com um intervalo (Content-Range) ou vários
+    (multipart/byteranges), lida do arquivo ou de bytes já em memória.
+    
+    `offset` desloca a leitura dentro do arquivo: o conteúdo servido é o
+    trecho [offset, offset + file_size) (ex.: membro sem compressão de um
+    ZIP). Sem `ranges`, o trecho inteiro é enviado com status 200.
+    """
+    
+    chunk_size = 64 * 1024
+    
+    def __init__(self, file_path: str, ranges: Optional[List[Tuple[int, int]]], file_size: int,
+                 media_type: str, headers: Dict[str, str], data: Optional[bytes] = None, offset: int = 0,
+                 background: Optional[BackgroundTask] = None):
+        self.file_path = file_path
+        self.data = data
+        self.offset = offset
+        self.status_code = 206 if ranges is not None else 200
+        self.background = background
+        headers = dict(headers)
+        
+        if ranges is None or len(ranges) == 1:
+            start, end = ranges[0] if ranges else (0, file_size - 1)
+            if ranges:
+                headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+            self.media_type = media_type
+            self.parts = [(b"", start, end, b"")]
+            self.closing = b""
+        else:
+            boundary = secrets.token_hex(16)
+            self.media_type = f"multipart/byteranges; boundary={boundary}"
+            self.parts = [
+                (
+                    f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n".encode("latin-1"),
+                    start, end, b"\r\n"
+                )
+                for start, end in ranges
+            ]
+            self.closing = f"--{boundary}--\r\n".encode("latin-1")
+        
+        content_length = len(self.closing) + sum(
+            len(head) + (end - start + 1) + len(tail) for head, start, end, tail in self.parts
+        )
+        headers["Content-Length"] = str(content_length)
+        self.init_headers(headers)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        
+        if self.data is not None:
+            for head, start, end, tail in self.parts:
+                await send({"type": "http.response.body", "body": head + self.data[start:end + 1] + tail, "more_body": True})
+        else:
+            async with await anyio.open_file(self.file_path, mode="rb") as file:
+                for head, start, end, tail in self.parts:
+                    if head:
+                        await send({"type": "http.response.body", "body": head, "more_body": True})
+                    await file.seek(self.offset + start)
+                    remaining = end - start + 1
+                    while remaining > 0:
+                        chunk = await file.read(min(self.chunk_size, remaining))
+                        if not chunk:
+                            break
+                        remaining -= len(chunk)
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    if tail:
+                        await send({"type": "http.response.body", "body": tail, "more_body": True})
+        
+        await send({"type": "http.response.body", "body": self.closing, "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+def conditional_file_response(request: Request, file_path: str,
+                              stat_result: Optional[os.stat_result] = None,
+                              media_type: Optional[str] = None,
+                              extra_headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serve um arquivo com ETag, Last-Modified e Cache-Control.
+    
+    - Se o cliente já tem a versão atual, responde 304 sem abrir o arquivo
+    - Range com um ou vários intervalos recebe 206 (If-Range respeitado);
+      intervalos fora do arquivo recebem 416
+    - Imagens pequenas e quentes saem do cache em memória (hot_images),
+      sem abrir o arquivo; no segundo acesso a imagem é carregada nele
+      depois que a resposta é enviada
+    
+    `extra_headers` (ex.: Vary) vão em todas as respostas.
+    """
+    stat_result = stat_result or os.stat(file_path)
+    return conditional_response(
+        request, file_path, stat_result, file_etag(stat_result), stat_result.st_size,
+        media_type=media_type, extra_headers=extra_headers
+    )
+
+
+def conditional_response(request: Request, file_path: str, stat_result: os.stat_result, etag: str, size: int,
+                         media_type: Optional[str] = None, extra_headers: Optional[Dict[str, str]] = None,
+                         offset: int = 0, data: Optional[bytes] = None,
+                         cache_key: Optional[str] = None) -> Response:
+    """
+    Núcleo de conditional_file_response para conteúdos que são um trecho
+    de arquivo (`offset`, `size`) ou bytes já lidos (`data`).
+    
+    Args:
+        file_path: Arquivo com o conteúdo
+        stat_result: Stat usado para Last-Modified / If-Modified-Since
+        etag: Validador do conteúdo servido
+        size: Tamanho do conteúdo
+        offset: Início do conteúdo dentro do arquivo
+        data: Conteúdo já em memória (o arquivo não é lido)
+        cache_key: Chave no cache quente (padrão: file_path)
+    """
+    headers = {**cache_headers(stat_result, etag), **(extra_headers or {})}
+    
+    if is_not_modified(request, stat_result, etag):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        ranges = parse_range(request.headers.get("range"), size) if if_range_matches(request, stat_result, etag) else None
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    cache_key = cache_key or file_path
+    media_type = media_type or mimetypes.guess_type(cache_key)[0] or "application/octet-stream"
+    if data is None:
+        data = hot_images.get(cache_key, etag)
+    elif hot_images.should_admit(cache_key, size):
+        hot_images.put(cache_key, etag, data)
+    
+    if ranges is not None:
+        return PartialFileResponse(file_path, ranges, size, media_type, headers, data=data, offset=offset)
+    
+    if data is not None:
+        return Response(content=data, media_type=media_type, headers=headers)
+    
+    background = None
+    if hot_images.should_admit(cache_key, size):
+        background = BackgroundTask(hot_images.load, cache_key, etag, size, file_path, offset)
+    
+    if offset:
+        return PartialFileResponse(file_path, None, size, media_type, headers, offset=offset, background=background)
+    
+    return FileResponse(path=file_path, stat_result=stat_result, media_type=media_type,
+                        headers=headers, background=background)
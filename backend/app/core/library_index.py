@@ -0,0 +1,533 @@
+import base64
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.library_state import library_state
+from app.core.services.manga_scanner import MangaScanner
+from app.core.services.scan_progress import ScanProgress
+from app.models.manga import Chapter, Library, Manga, Page
+
+logger = logging.getLogger(__name__)
+
+# Ids de página: 8 caracteres do mangá + 12 do caminho relativo (base64url)
+MANGA_KEY_BYTES = 6
+PAGE_KEY_BYTES = 9
+MANGA_KEY_LENGTH = 8
+PAGE_ID_LENGTH = 20
+
+
+def _digest(text: str, size: int) -> str:
+    digest = hashlib.blake2b(text.encode('utf-8', 'surrogateescape'), digest_size=size).digest()
+    return base64.urlsafe_b64encode(digest).decode('ascii').rstrip('=')
+
+
+def _manga_key(manga_path: str) -> str:
+    return _digest(os.path.basename(manga_path), MANGA_KEY_BYTES)
+
+
+class LibraryIndex:
+    """
+    Índice em memória da biblioteca, compartilhado por todos os routers.
+    
+    A biblioteca é escaneada uma única vez e mantida em memória. As
+    requisições seguintes apenas consultam o índice; a reconstrução só
+    acontece quando o caminho muda, quando a raiz da biblioteca é alterada
+    (mangás adicionados/removidos) ou quando solicitada explicitamente.
+    Ao consultar um mangá, as impressões digitais dos seus diretórios são
+    conferidas e apenas os capítulos alterados são reescaneados.
+    
+    O índice também emite ids opacos para as imagens servidas: cada id
+    aponta para um caminho absoluto já validado, então servir uma página é
+    uma consulta de dicionário e os caminhos do disco não chegam ao cliente.
+    
+    Escaneamentos (completos ou de um mangá) rodam fora de `_lock`, um por
+    vez sob `_build_lock`; `_lock` só protege a troca dos dados em memória,
+    então as consultas não esperam pelo disco.
+    """
+    
+    def __init__(self, scanner: Optional[MangaScanner] = None):
+        self.scanner = scanner or MangaScanner()
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._pages_lock = threading.Lock()
+        self._library: Optional[Library] = None
+        self._path: Optional[str] = None
+        self._root_mtime_ns: Optional[int] = None
+        self._mangas_by_id: Dict[str, Manga] = {}
+        self._mangas_by_path: Dict[str, Manga] = {}
+        # Chave do mangá (prefixo dos ids de página) -> mangá
+        self._mangas_by_key: Dict[str, Manga] = {}
+        # Chave do mangá (prefixo do id) -> id da página -> caminho absoluto
+        self._page_paths: Dict[str, Dict[str, str]] = {}
+        self.generation = 0
+    
+    @property
+    def path(self) -> Optional[str]:
+        with self._lock:
+            return self._path
+    
+    def is_loaded(self, library_path: Optional[str] = None) -> bool:
+        with self._lock:
+            if self._library is None:
+                return False
+            return library_path is None or self._path == library_path
+    
+    def get_library(self, library_path: Optional[str] = None) -> Library:
+        """Retorna a biblioteca do índice, construindo-a se necessário"""
+        library_path = self._resolve_path(library_path)
+        
+        with self._lock:
+            if self._is_current(library_path):
+                return self._library
+        
+        with self._build_lock:
+            # Outra thread pode ter construído o índice enquanto esperávamos
+            with self._lock:
+                if self._is_current(library_path):
+                    return self._library
+            library = self.scanner.scan_library(library_path)
+            with self._lock:
+                return self._install(library_path, library)
+    
+    def refresh(self, library_path: Optional[str] = None,
+                progress: Optional[ScanProgress] = None) -> Library:
+        """
+        Força a reconstrução do índice (usa o cache do scanner).
+        
+        O escaneamento roda fora do lock: enquanto isso, as consultas
+        continuam sendo atendidas pelo índice atual.
+        """
+        library_path = self._resolve_path(library_path)
+        with self._build_lock:
+            library = self.scanner.scan_library(library_path, progress=progress)
+            with self._lock:
+                return self._install(library_path, library)
+    
+    def iter_library(self, library_path: Optional[str] = None, refresh: bool = False) -> Iterator[Manga]:
+        """
+        Entrega os mangás um a um (para respostas em streaming).
+        
+        Com o índice válido, apenas percorre os mangás em memória. Caso
+        contrário, repassa cada mangá assim que o scanner o produz e instala
+        o índice ao final; se o consumidor desistir no meio, o índice atual
+        é mantido.
+        """
+        library_path = self._resolve_path(library_path)
+        
+        with self._lock:
+            current = None
+            if not refresh and self._is_current(library_path):
+                current = list(self._library.mangas)
+        
+        if current is not None:
+            yield from current
+            return
+        
+        # Escaneia fora do lock; cada next() pode rodar em uma thread diferente
+        mangas = []
+        for manga in self.scanner.iter_library(library_path):
+            mangas.append(manga)
+            yield manga
+        
+        library = Library(mangas=mangas)
+        library._update_stats()
+        with self._lock:
+            self._install(library_path, library)
+    
+    def get_manga(self, manga_id: str, library_path: Optional[str] = None) -> Optional[Manga]:
+        """Retorna um mangá do índice, reescaneando-o se o diretório mudou"""
+        manga = self._current_manga(manga_id, library_path)
+        if manga:
+            # Páginas vêm do shard deste mangá, carregado sob demanda
+            with self._pages_lock:
+                self.scanner.load_pages(manga)
+        return manga
+    
+    def get_detached_manga(self, manga_id: str, library_path: Optional[str] = None) -> Optional[Manga]:
+        """
+        Como get_manga, mas as páginas do shard são carregadas em uma cópia:
+        o mangá do índice continua sem elas. Para percorrer a biblioteca
+        inteira sem manter todos os shards em memória.
+        """
+        manga = self._current_manga(manga_id, library_path)
+        if manga is None or self.scanner.cache.pages_loaded(manga):
+            return manga
+        
+        detached = manga.model_copy(deep=True)
+        self.scanner.load_pages(detached)
+        return detached
+    
+    def _current_manga(self, manga_id: str, library_path: Optional[str]) -> Optional[Manga]:
+        self.get_library(library_path)
+        
+        with self._lock:
+            manga = self._mangas_by_id.get(manga_id)
+        
+        # Conferência (stat) e reescaneamento fora de _lock
+        if manga and self._manga_changed(manga):
+            with self._build_lock:
+                with self._lock:
+                    manga = self._mangas_by_id.get(manga_id)
+                if manga and self._manga_changed(manga):
+                    manga = self._refresh_manga(manga)
+        return manga
+    
+    def page_id(self, file_path: Optional[str]) -> Optional[str]:
+        """
+        Id opaco e estável de uma imagem da biblioteca.
+        
+        Derivado do caminho relativo à raiz (sem syscalls) e registrado na
+        tabela de páginas. Caminhos fora da biblioteca ou que não sejam
+        imagens não recebem id.
+        """
+        library_path = self._path
+        if not file_path or not library_path:
+            return None
+        
+        prefix = os.path.join(str(Path(library_path)), '')
+        if not file_path.startswith(prefix):
+            return None
+        
+        relative = file_path[len(prefix):]
+        if os.path.splitext(relative)[1].lower() not in self.scanner.supported_extensions:
+            return None
+        
+        manga_key = _digest(relative.split(os.sep, 1)[0], MANGA_KEY_BYTES)
+        page_id = manga_key + _digest(relative, PAGE_KEY_BYTES)
+        with self._lock:
+            self._page_paths.setdefault(manga_key, {})[page_id] = file_path
+        return page_id
+    
+    def image_url(self, file_path: Optional[str]) -> Optional[str]:
+        """URL da API para uma imagem da biblioteca (None se inválida)"""
+        page_id = self.page_id(file_path)
+        return f"/api/image/{page_id}" if page_id else None
+    
+    def thumbnail_url(self, file_path: Optional[str]) -> Optional[str]:
+        """URL da miniatura de uma imagem da biblioteca (None se inválida)"""
+        page_id = self.page_id(file_path)
+        return f"/api/thumbnail/{page_id}" if page_id else None
+    
+    def resolve_page(self, page_id: str) -> Optional[str]:
+        """
+        Caminho absoluto de um id emitido por page_id.
+        
+        Ids ainda não registrados (ex.: após reiniciar o servidor) são
+        resolvidos carregando apenas o mangá correspondente; com o índice
+        carregado, prefixos desconhecidos retornam None sem reescanear.
+        """
+        manga_key = page_id[:MANGA_KEY_LENGTH]
+        with self._lock:
+            file_path = self._page_paths.get(manga_key, {}).get(page_id)
+            loaded = self._library is not None
+        if file_path is not None or len(page_id) != PAGE_ID_LENGTH:
+            return file_path
+        
+        if not loaded:
+            try:
+                self.get_library()
+            except ValueError:
+                return None
+        
+        with self._lock:
+            manga = self._mangas_by_key.get(manga_key)
+        if manga is None:
+            return None
+        
+        self._register_pages(self.get_manga(manga.id))
+        with self._lock:
+            return self._page_paths.get(manga_key, {}).get(page_id)
+    
+    def upcoming_pages(self, page_path: str, count: int, next_chapter_count: int = 0) -> List[str]:
+        """
+        Caminhos das páginas que vêm depois de page_path na ordem de leitura.
+        
+        Quando a janela chega ao fim do capítulo, inclui também as primeiras
+        `next_chapter_count` páginas do capítulo seguinte. Só usa o que já
+        está em memória (nada é escaneado ou carregado do shard).
+        """
+        if not self._path or count <= 0:
+            return []
+        
+        with self._lock:
+            located = self._locate_chapter(page_path)
+            if located is None:
+                return []
+            
+            # Capítulos em ordem decrescente: o seguinte fica antes na lista
+            chapters, position = located
+            paths = [page.path for page in chapters[position].pages]
+            try:
+                start = paths.index(page_path) + 1
+            except ValueError:
+                return []
+            
+            upcoming = paths[start:start + count]
+            if start + count >= len(paths) and position > 0 and next_chapter_count > 0:
+                upcoming += [page.path for page in chapters[position - 1].pages[:next_chapter_count]]
+            return upcoming
+    
+    def find_page(self, page_path: str) -> Optional[Page]:
+        """Página do índice para um caminho, só com o que já está em memória"""
+        if not self._path:
+            return None
+        
+        with self._lock:
+            located = self._locate_chapter(page_path)
+            if located is None:
+                return None
+            chapters, position = located
+            return next((page for page in chapters[position].pages if page.path == page_path), None)
+    
+    def _locate_chapter(self, page_path: str) -> Optional[Tuple[List[Chapter], int]]:
+        """
+        Capítulos do mangá de page_path e a posição do capítulo da página.
+        
+        Sobe pelos diretórios até o filho direto de um mangá conhecido (a
+        pasta ou o arquivo compactado do capítulo), sem tocar no disco.
+        """
+        chapter_path = os.path.dirname(page_path)
+        while True:
+            manga_path = os.path.dirname(chapter_path)
+            if manga_path == chapter_path:
+                return None
+            
+            manga = self._mangas_by_path.get(manga_path)
+            if manga is not None:
+                position = next((i for i, chapter in enumerate(manga.chapters) if chapter.path == chapter_path), None)
+                return (manga.chapters, position) if position is not None else None
+            chapter_path = manga_path
+    
+    def _register_pages(self, manga: Optional[Manga]) -> None:
+        if manga is None:
+            return
+        self.page_id(manga.thumbnail)
+        for chapter in manga.chapters:
+            for page in chapter.pages:
+                self.page_id(page.path)
+    
+    def update_pages(self, manga_id: str, probes: Dict[str, tuple]) -> int:
+        """
+        Mescla tamanho e dimensões sondados nas páginas de um mangá e
+        persiste no shard (validado pela impressão digital dos capítulos).
+        
+        Args:
+            manga_id: Mangá sondado
+            probes: Caminho da página -> (bytes, largura, altura, tons de cinza)
+        
+        Returns:
+            int: Número de páginas atualizadas
+        """
+        with self._lock:
+            manga = self._mangas_by_id.get(manga_id)
+            library_path = self._path
+            if manga is None or library_path is None:
+                return 0
+            
+            updated = 0
+            for chapter in manga.chapters:
+                for page in chapter.pages:
+                    probe = probes.get(page.path)
+                    if probe is not None:
+                        page.size, page.width, page.height, page.grayscale = probe
+                        updated += 1
+        
+        if updated:
+            self.scanner.cache.save_shard(library_path, manga)
+        return updated
+    
+    def update_checksums(self, manga_id: str, checksums: Dict[str, Tuple[int, int, str]]) -> int:
+        """
+        Registra tamanho e CRC-32 calculados para páginas de um mangá e
+        persiste no shard, como em update_pages.
+        
+        Args:
+            manga_id: Mangá das páginas
+            checksums: Caminho da página -> (bytes, crc, carimbo do arquivo)
+        
+        Returns:
+            int: Número de páginas atualizadas
+        """
+        with self._lock:
+            manga = self._mangas_by_id.get(manga_id)
+            library_path = self._path
+            if manga is None or library_path is None:
+                return 0
+            
+            updated = 0
+            for chapter in manga.chapters:
+                for page in chapter.pages:
+                    checksum = checksums.get(page.path)
+                    if checksum is not None:
+                        page.size, page.crc, page.crc_stamp = checksum
+                        updated += 1
+        
+        if updated:
+            self.scanner.cache.save_shard(library_path, manga)
+        return updated
+    
+    def apply_changes(self, library_path: str, manga_paths: Iterable[str]) -> int:
+        """
+        Aplica mudanças detectadas pelo watcher a mangás específicos.
+        
+        Mangás existentes são reescaneados de forma incremental (apenas os
+        capítulos alterados), mangás novos são escaneados e adicionados e
+        diretórios removidos saem do índice. Nada é feito se o índice não
+        estiver carregado para esta biblioteca.
+        
+        Returns:
+            int: Número de mangás atualizados
+        """
+        with self._build_lock:
+            with self._lock:
+                if self._library is None or self._path != library_path:
+                    return 0
+                by_path = {os.path.normpath(manga.path): manga for manga in self._library.mangas}
+            
+            library_root = os.path.normpath(library_path)
+            changed = 0
+            
+            for manga_path in sorted({os.path.normpath(path) for path in manga_paths}):
+                manga = by_path.get(manga_path)
+                if manga is not None:
+                    if self._manga_changed(manga):
+                        self._refresh_manga(manga)
+                        changed += 1
+                elif os.path.dirname(manga_path) == library_root and os.path.isdir(manga_path):
+                    if self._add_manga(manga_path):
+                        changed += 1
+            
+            with self._lock:
+                if self._path == library_path:
+                    # Mudanças na raiz já foram aplicadas; evita reconstrução completa
+                    self._root_mtime_ns = self._stat_mtime_ns(library_path)
+            return changed
+    
+    def invalidate(self) -> None:
+        """Descarta o índice atual; a próxima consulta reconstrói"""
+        with self._lock:
+            self._library = None
+            self._path = None
+            self._root_mtime_ns = None
+            self._mangas_by_id = {}
+            self._mangas_by_path = {}
+            self._mangas_by_key = {}
+            self._page_paths = {}
+            self.generation += 1
+        logger.info("Índice da biblioteca invalidado")
+    
+    def get_stats(self) -> dict:
+        """Informações básicas sobre o estado do índice"""
+        with self._lock:
+            return {
+                "loaded": self._library is not None,
+                "library_path": self._path,
+                "generation": self.generation,
+                "total_mangas": self._library.total_mangas if self._library else 0,
+                "total_chapters": self._library.total_chapters if self._library else 0,
+                "total_pages": self._library.total_pages if self._library else 0,
+                "last_updated": self._library.last_updated.isoformat() if self._library else None
+            }
+    
+    def _resolve_path(self, library_path: Optional[str]) -> str:
+        library_path = library_path or library_state.current_path
+        if not library_path:
+            raise ValueError("Nenhuma biblioteca configurada")
+        return library_path
+    
+    def _is_current(self, library_path: str) -> bool:
+        return self._library is not None and self._path == library_path and not self._root_changed()
+    
+    def _install(self, library_path: str, library: Library) -> Library:
+        if library_path != self._path:
+            self._page_paths = {}
+        else:
+            # Ids de mangás que saíram da biblioteca deixam de ser resolvidos
+            manga_keys = {_manga_key(manga.path) for manga in library.mangas}
+            self._page_paths = {key: pages for key, pages in self._page_paths.items() if key in manga_keys}
+        self._library = library
+        self._path = library_path
+        self._root_mtime_ns = self._stat_mtime_ns(library_path)
+        self._mangas_by_id = {manga.id: manga for manga in library.mangas}
+        self._mangas_by_path = {manga.path: manga for manga in library.mangas}
+        self._mangas_by_key = {_manga_key(manga.path): manga for manga in library.mangas}
+        self.generation += 1
+        
+        logger.info(f"Índice construído: {library.total_mangas} mangás (geração {self.generation})")
+        return library
+    
+    def _refresh_manga(self, manga: Manga) -> Optional[Manga]:
+        """Reescaneia fora de _lock e troca o mangá no índice (chamar com _build_lock)"""
+        logger.info(f"Mangá alterado, reescaneando: {manga.title}")
+        with self._pages_lock:
+            updated = self.scanner.refresh_manga(manga)
+        
+        with self._lock:
+            if self._mangas_by_id.get(manga.id) is not manga:
+                # Índice trocado durante o escaneamento: o resultado é descartado
+                return self._mangas_by_id.get(manga.id)
+            
+            # Ids de páginas apagadas não podem continuar resolvendo; as atuais
+            # são registradas de novo quando o mangá for servido
+            self._page_paths.pop(_manga_key(manga.path), None)
+            self._mangas_by_path.pop(manga.path, None)
+            self._mangas_by_key.pop(_manga_key(manga.path), None)
+            
+            if updated is None:
+                self._library.remove_manga(manga.id)
+                self._mangas_by_id.pop(manga.id, None)
+            else:
+                index = self._library.mangas.index(manga)
+                self._library.mangas[index] = updated
+                self._library._update_stats()
+                self._mangas_by_id[updated.id] = updated
+                self._mangas_by_path[updated.path] = updated
+                self._mangas_by_key[_manga_key(updated.path)] = updated
+            
+            library_path, mangas = self._path, list(self._library.mangas)
+            self.generation += 1
+        
+        self.scanner.update_cache(library_path, mangas, [updated] if updated else [])
+        return updated
+    
+    def _add_manga(self, manga_path: str) -> Optional[Manga]:
+        """Escaneia fora de _lock e inclui o mangá no índice (chamar com _build_lock)"""
+        manga = self.scanner.scan_manga(manga_path)
+        if manga is None:
+            return None
+        
+        with self._lock:
+            if self._library is None:
+                return None
+            logger.info(f"Mangá adicionado ao índice: {manga.title}")
+            self._library.add_manga(manga)
+            self._library.mangas.sort(key=lambda item: os.path.basename(item.path))
+            self._mangas_by_id[manga.id] = manga
+            self._mangas_by_path[manga.path] = manga
+            self._mangas_by_key[_manga_key(manga.path)] = manga
+            library_path, mangas = self._path, list(self._library.mangas)
+            self.generation += 1
+        
+        self.scanner.update_cache(library_path, mangas, [manga])
+        return manga
+    
+    def _root_changed(self) -> bool:
+        return self._stat_mtime_ns(self._path) != self._root_mtime_ns
+    
+    def _manga_changed(self, manga: Manga) -> bool:
+        return not self.scanner.is_manga_current(manga)
+    
+    @staticmethod
+    def _stat_mtime_ns(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+
+# Instância global compartilhada pelos routers
+library_index = LibraryIndex()
@@ -0,0 +1,395 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from app.core.config import get_settings
+from app.core.library_index import LibraryIndex, library_index
+from app.core.library_state import library_state
+from app.core.services.archive_reader import is_archive_name
+
+logger = logging.getLogger(__name__)
+
+# Constantes do inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE |
+              IN_MODIFY | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Profundidade observada: raiz (0) -> mangá (1) -> capítulo (2)
+MAX_DEPTH = 2
+
+# Chave pendente quando a fila do kernel transborda (não é um caminho válido)
+RESYNC = ""
+
+
+class InotifyBackend:
+    """
+    Backend Linux: inotify via ctypes, sem dependências externas.
+    
+    Observa a raiz da biblioteca, cada mangá e cada capítulo. Diretórios
+    criados depois do início também passam a ser observados.
+    """
+    
+    def __init__(self, root: str):
+        self.root = os.path.normpath(root)
+        self._libc = self._load_libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 falhou: {os.strerror(err)}")
+        
+        self._watches: Dict[int, Tuple[str, int]] = {}
+        try:
+            self._add_tree(self.root, 0)
+        except OSError:
+            self.close()
+            raise
+    
+    @staticmethod
+    def _load_libc():
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify disponível apenas no Linux")
+        
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    
+    def _add_watch(self, path: str, depth: int) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                # Limite fs.inotify.max_user_watches atingido: usar polling
+                raise OSError(err, "Limite de watches do inotify atingido")
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, f"inotify_add_watch falhou em {path}: {os.strerror(err)}")
+        self._watches[wd] = (path, depth)
+    
+    def _add_tree(self, path: str, depth: int) -> None:
+        self._add_watch(path, depth)
+        if depth >= MAX_DEPTH:
+            return
+        
+        try:
+            with os.scandir(path) as entries:
+                subdirs = [entry.path for entry in entries
+                           if not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            return
+        
+        for subdir in subdirs:
+            self._add_tree(subdir, depth + 1)
+    
+    def read(self, timeout: float) -> Optional[Set[str]]:
+        """
+        Aguarda eventos por até `timeout` segundos.
+        
+        Returns:
+            Set[str]: Caminhos dos mangás afetados
+            None: Fila do kernel transbordou (é preciso reescanear tudo)
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        
+        changed: Set[str] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+            
+            if mask & IN_Q_OVERFLOW:
+                return None
+            
+            watch = self._watches.get(wd)
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if watch is None:
+                continue
+            
+            self._handle_event(watch, mask, os.fsdecode(name), changed)
+        
+        return changed
+    
+    def _handle_event(self, watch: Tuple[str, int], mask: int, name: str, changed: Set[str]) -> None:
+        directory, depth = watch
+        
+        if depth == 0:
+            # Na raiz só importam diretórios de mangá (ignora .ohara_cache etc.)
+            if not name or name.startswith('.') or not mask & IN_ISDIR:
+                return
+            manga_path = os.path.join(directory, name)
+        else:
+            manga_path = directory if depth == 1 else os.path.dirname(directory)
+        
+        if name and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and depth < MAX_DEPTH:
+            try:
+                self._add_tree(os.path.join(directory, name), depth + 1)
+            except OSError as e:
+                logger.warning(f"Não foi possível observar {name}: {e}")
+        
+        changed.add(manga_path)
+    
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches.clear()
+
+
+class PollingBackend:
+    """
+    Backend de fallback: compara, a cada intervalo, o mtime dos diretórios
+    de mangá e de capítulo e o tamanho e mtime dos capítulos compactados
+    (.cbz/.zip). Lista a raiz e cada mangá, nunca os capítulos.
+    """
+    
+    def __init__(self, root: str, interval: float):
+        self.root = os.path.normpath(root)
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+        self._next_poll = time.monotonic() + interval
+    
+    def _take_snapshot(self) -> Dict[str, Tuple]:
+        snapshot = {}
+        try:
+            with os.scandir(self.root) as entries:
+                manga_dirs = [entry.path for entry in entries
+                              if not entry.name.startswith('.') and entry.is_dir()]
+        except OSError:
+            return snapshot
+        
+        for manga_path in manga_dirs:
+            try:
+                manga_mtime = os.stat(manga_path).st_mtime_ns
+                chapters = []
+                with os.scandir(manga_path) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            chapters.append((entry.name, entry.stat().st_mtime_ns, None))
+                        elif is_archive_name(entry.name) and entry.is_file():
+                            # Regravar um .cbz no lugar não muda o mtime do mangá
+                            stat = entry.stat()
+                            chapters.append((entry.name, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                continue
+            snapshot[manga_path] = (manga_mtime, tuple(sorted(chapters)))
+        
+        return snapshot
+    
+    def read(self, timeout: float) -> Optional[Set[str]]:
+        remaining = self._next_poll - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(timeout, remaining))
+            return set()
+        
+        current = self._take_snapshot()
+        previous = self._snapshot
+        self._snapshot = current
+        self._next_poll = time.monotonic() + self.interval
+        
+        return {
+            manga_path for manga_path in set(previous) | set(current)
+            if previous.get(manga_path) != current.get(manga_path)
+        }
+    
+    def close(self) -> None:
+        self._snapshot = {}
+
+
+class LibraryWatcher:
+    """
+    Observa a biblioteca configurada e aplica as mudanças no índice.
+    
+    Eventos em rajada (ex.: um capítulo de 200 páginas sendo copiado) são
+    agrupados por mangá: cada um só é reescaneado depois de `debounce_seconds`
+    sem novos eventos nele (uma cópia longa em um mangá não atrasa os
+    demais), e o reescaneamento incremental lista apenas os capítulos
+    cuja impressão digital mudou. Usa inotify no Linux e polling nos demais
+    casos (outros sistemas, limite de watches atingido).
+    """
+    
+    def __init__(self, index: LibraryIndex, debounce_seconds: float = 2.0,
+                 poll_interval: float = 30.0, use_inotify: bool = True):
+        self.index = index
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        # Cópias muito longas ainda aparecem aos poucos
+        self.max_delay_seconds = max(debounce_seconds * 10, 30.0)
+        
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._backend = None
+        self._watched_path: Optional[str] = None
+        # Mangá -> (primeiro evento, último evento); RESYNC: reconstruir tudo
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        self.applied_changes = 0
+    
+    def start(self) -> None:
+        """Inicia a thread do watcher (idempotente)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="ohara-watcher", daemon=True)
+            self._thread.start()
+        logger.info("Watcher da biblioteca iniciado")
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Para a thread e libera o backend"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        
+        self._stop_event.set()
+        if thread:
+            thread.join(timeout)
+        self._close_backend()
+    
+    def is_running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+    
+    def get_status(self) -> dict:
+        return {
+            "running": self.is_running(),
+            "backend": type(self._backend).__name__ if self._backend else None,
+            "watched_path": self._watched_path,
+            "pending": len(self._pending),
+            "applied_changes": self.applied_changes
+        }
+    
+    def _run(self) -> None:
+        tick = min(0.5, max(self.debounce_seconds / 2, 0.01))
+        
+        while not self._stop_event.is_set():
+            try:
+                self._follow_library_path()
+                if self._backend is None:
+                    self._stop_event.wait(1.0)
+                    continue
+                
+                changes = self._backend.read(tick)
+                self._record(changes)
+                self._flush_if_quiet()
+            except Exception as e:
+                logger.error(f"Erro no watcher da biblioteca: {e}")
+                self._close_backend()
+                self._stop_event.wait(1.0)
+    
+    def _follow_library_path(self) -> None:
+        """Acompanha library_state.current_path, trocando de backend se mudar"""
+        current = library_state.current_path
+        if current == self._watched_path and self._backend is not None:
+            return
+        
+        self._close_backend()
+        self._watched_path = current
+        if current and os.path.isdir(current):
+            self._backend = self._create_backend(current)
+    
+    def _create_backend(self, root: str):
+        if self.use_inotify:
+            try:
+                backend = InotifyBackend(root)
+                logger.info(f"Observando biblioteca com inotify: {root}")
+                return backend
+            except OSError as e:
+                logger.info(f"inotify indisponível ({e}), usando polling")
+        
+        logger.info(f"Observando biblioteca com polling a cada {self.poll_interval}s: {root}")
+        return PollingBackend(root, self.poll_interval)
+    
+    def _close_backend(self) -> None:
+        backend = self._backend
+        self._backend = None
+        if backend:
+            backend.close()
+        self._pending.clear()
+    
+    def _record(self, changes: Optional[Set[str]]) -> None:
+        if changes is not None and not changes:
+            return
+        
+        now = time.monotonic()
+        for key in (RESYNC,) if changes is None else changes:
+            first_event = self._pending.get(key, (now, now))[0]
+            self._pending[key] = (first_event, now)
+    
+    def _flush_if_quiet(self) -> None:
+        now = time.monotonic()
+        ready = {
+            key for key, (first_event, last_event) in self._pending.items()
+            if now - last_event >= self.debounce_seconds or now - first_event >= self.max_delay_seconds
+        }
+        if ready:
+            self._flush(ready)
+    
+    def _flush(self, ready: Set[str]) -> None:
+        library_path = self._watched_path
+        
+        if RESYNC in ready:
+            # A reconstrução cobre também os mangás ainda pendentes
+            self._pending.clear()
+            logger.warning("Fila de eventos transbordou, reconstruindo índice")
+            if self.index.is_loaded(library_path):
+                self.index.refresh(library_path)
+            return
+        
+        for manga_path in ready:
+            del self._pending[manga_path]
+        
+        changed = self.index.apply_changes(library_path, ready)
+        self.applied_changes += changed
+        if changed:
+            logger.info(f"Watcher aplicou mudanças em {changed} mangá(s)")
+
+
+def create_library_watcher() -> LibraryWatcher:
+    settings = get_settings()
+    return LibraryWatcher(
+        library_index,
+        debounce_seconds=settings.watch_debounce_seconds,
+        poll_interval=settings.watch_poll_interval,
+        use_inotify=settings.watch_use_inotify
+    )
+
+
+# Instância global (iniciada no startup quando WATCH_LIBRARY=true)
+library_watcher = create_library_watcher()
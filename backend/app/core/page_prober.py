@@ -0,0 +1,160 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.library_index import LibraryIndex, library_index
+from app.core.services.grayscale import probe_grayscale
+from app.core.services.image_probe import probe_page
+from app.models.manga import Chapter, Manga, Page
+
+logger = logging.getLogger(__name__)
+
+# Capítulos vizinhos (antes e depois do aberto) sondados junto com ele
+NEIGHBOUR_CHAPTERS = 1
+# Largura gravada quando o cabeçalho não tem dimensões legíveis (não sondar de novo)
+UNREADABLE_DIMENSIONS = 0
+
+
+class PageProber:
+    """
+    Preenche tamanho, largura e altura das páginas em segundo plano.
+    
+    Lê apenas o cabeçalho de cada imagem (sem decodificar) e mescla o
+    resultado no índice, que o persiste no shard do mangá. Com `grayscale`,
+    uma cópia reduzida também é decodificada para marcar páginas sem cor. Mangás são
+    enfileirados quando abertos pelo leitor; os pedidos mais recentes são
+    atendidos primeiro e só o capítulo aberto (salvo antes) e seus vizinhos
+    são sondados. Páginas já sondadas não são lidas de novo, nem as de
+    cabeçalho ilegível (gravadas com largura e altura 0).
+    """
+    
+    def __init__(self, index: LibraryIndex, max_queue: int = 256, grayscale: bool = False):
+        self.index = index
+        self.max_queue = max_queue
+        self.grayscale = grayscale
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Mangá -> (biblioteca, capítulo aberto)
+        self._queue: "OrderedDict[str, Tuple[Optional[str], Optional[str]]]" = OrderedDict()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+        self.probed_pages = 0
+    
+    def _page_pending(self, page: Page) -> bool:
+        # Tamanho sozinho não basta: o download do capítulo grava size sem dimensões
+        return page.width is None or (self.grayscale and page.grayscale is None)
+    
+    def needs_probe(self, manga: Manga, chapter_path: Optional[str] = None) -> bool:
+        return any(
+            self._page_pending(page)
+            for chapter in self._probe_window(manga, chapter_path) for page in chapter.pages
+        )
+    
+    def enqueue(self, manga: Optional[Manga], library_path: Optional[str] = None,
+                chapter: Optional[Chapter] = None) -> None:
+        """Agenda a sondagem do capítulo e vizinhos (se ainda faltar alguma página)"""
+        if manga is None or not self.needs_probe(manga, chapter.path if chapter else None):
+            return
+        
+        with self._lock:
+            self._queue[manga.id] = (library_path, chapter.path if chapter else None)
+            self._queue.move_to_end(manga.id, last=False)
+            while len(self._queue) > self.max_queue:
+                self._queue.popitem()
+            self._wakeup.notify()
+    
+    def start(self) -> None:
+        """Inicia a thread de sondagem (idempotente)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="ohara-page-prober", daemon=True)
+            self._thread.start()
+        logger.info("Sondagem de páginas iniciada")
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop = True
+            self._wakeup.notify()
+        
+        if thread:
+            thread.join(timeout)
+    
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "queued_mangas": len(self._queue),
+                "probed_pages": self.probed_pages
+            }
+    
+    def probe_manga(self, manga_id: str, library_path: Optional[str] = None,
+                    chapter_path: Optional[str] = None) -> int:
+        """
+        Sonda as páginas pendentes do capítulo `chapter_path` (sem ele, do
+        primeiro) e dos `NEIGHBOUR_CHAPTERS` vizinhos, e as mescla no índice.
+        As do capítulo aberto são sondadas e mescladas primeiro.
+        """
+        try:
+            manga = self.index.get_manga(manga_id, library_path)
+        except ValueError:
+            return 0
+        if manga is None:
+            return 0
+        
+        window = self._probe_window(manga, chapter_path)
+        updated = sum(self._probe_chapters(manga_id, chapters) for chapters in (window[:1], window[1:]) if chapters)
+        
+        with self._lock:
+            self.probed_pages += updated
+        if updated:
+            logger.info(f"Páginas sondadas: {manga_id} ({updated})")
+        return updated
+    
+    @staticmethod
+    def _probe_window(manga: Manga, chapter_path: Optional[str]) -> List[Chapter]:
+        """Capítulo aberto seguido dos vizinhos mais próximos"""
+        chapters = manga.chapters
+        opened = next((i for i, chapter in enumerate(chapters) if chapter.path == chapter_path), 0)
+        window = range(max(0, opened - NEIGHBOUR_CHAPTERS), min(len(chapters), opened + NEIGHBOUR_CHAPTERS + 1))
+        return [chapters[i] for i in sorted(window, key=lambda i: abs(i - opened))]
+    
+    def _probe_chapters(self, manga_id: str, chapters: List[Chapter]) -> int:
+        probes = {}
+        for chapter in chapters:
+            for page in chapter.pages:
+                if self._page_pending(page):
+                    grayscale = probe_grayscale(page.path) if self.grayscale else page.grayscale
+                    size, width, height = probe_page(page.path)
+                    if size is None:
+                        # Arquivo sumiu: nada a gravar
+                        continue
+                    if width is None:
+                        width = height = UNREADABLE_DIMENSIONS
+                    probe = (size, width, height, grayscale)
+                    if probe != (page.size, page.width, page.height, page.grayscale):
+                        probes[page.path] = probe
+        return self.index.update_pages(manga_id, probes) if probes else 0
+    
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue and not self._stop:
+                    self._wakeup.wait()
+                if self._stop:
+                    return
+                manga_id, (library_path, chapter_path) = self._queue.popitem(last=False)
+            
+            try:
+                self.probe_manga(manga_id, library_path, chapter_path)
+            except Exception as e:
+                logger.warning(f"Erro ao sondar páginas de {manga_id}: {e}")
+
+
+# Instância global compartilhada pelos routers
+page_prober = PageProber(library_index, grayscale=get_settings().probe_page_grayscale)
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Iterable, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.library_index import LibraryIndex, library_index
+from app.core.services.archive_reader import archive_reader
+from app.models.manga import Chapter
+
+logger = logging.getLogger(__name__)
+
+# posix_fadvise não existe no Windows nem no macOS: lá a leitura antecipada é desativada
+FADVISE_SUPPORTED = hasattr(os, 'posix_fadvise')
+
+
+class PageReadahead:
+    """
+    Pede ao kernel que leia antecipadamente as próximas páginas do leitor.
+    
+    Ao servir a página N, as páginas N+1…N+window (e, perto do fim do
+    capítulo, as primeiras do capítulo seguinte) recebem
+    posix_fadvise(POSIX_FADV_WILLNEED): o kernel agenda a leitura para o
+    page cache e a próxima virada de página não espera pelo disco.
+    
+    Os avisos são emitidos por uma thread em segundo plano; a requisição só
+    coloca o pedido em uma fila limitada (pedidos excedentes são
+    descartados). Arquivos avisados recentemente não são avisados de novo.
+    Páginas dentro de ZIP/CBZ avisam apenas o trecho do membro.
+    """
+    
+    def __init__(self, index: LibraryIndex, window: int, next_chapter_pages: int,
+                 max_queue: int = 64, max_recent: int = 512):
+        self.index = index
+        self.window = window
+        self.next_chapter_pages = next_chapter_pages
+        self.max_queue = max_queue
+        self.max_recent = max_recent
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._queue: "deque[Tuple[Optional[str], Tuple[str, ...]]]" = deque()
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+        self.advised_pages = 0
+        self.dropped_requests = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def after_page(self, page_path: str) -> None:
+        """Agenda a leitura antecipada das páginas que seguem page_path"""
+        self._enqueue(page_path, ())
+    
+    def chapter_opened(self, chapter: Chapter) -> None:
+        """Agenda a leitura antecipada das primeiras páginas de um capítulo"""
+        self._enqueue(None, tuple(page.path for page in chapter.pages[:self.window]))
+    
+    def advise(self, paths: Iterable[str]) -> int:
+        """Emite WILLNEED para cada caminho ainda não avisado; retorna quantos"""
+        advised = 0
+        for path in paths:
+            with self._lock:
+                if path in self._recent:
+                    self._recent.move_to_end(path)
+                    continue
+                self._recent[path] = None
+                while len(self._recent) > self.max_recent:
+                    self._recent.popitem(last=False)
+            
+            try:
+                self._advise_file(path)
+                advised += 1
+            except OSError as e:
+                logger.debug(f"Leitura antecipada ignorada para {path}: {e}")
+        
+        with self._lock:
+            self.advised_pages += advised
+        return advised
+    
+    def start(self) -> None:
+        """Inicia a thread de leitura antecipada (idempotente)"""
+        if not FADVISE_SUPPORTED:
+            logger.info("posix_fadvise indisponível: leitura antecipada desativada")
+            return
+        
+        with self._lock:
+            if self.running:
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="ohara-page-readahead", daemon=True)
+            self._thread.start()
+        logger.info(f"Leitura antecipada iniciada ({self.window} páginas)")
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop = True
+            self._wakeup.notify()
+        
+        if thread:
+            thread.join(timeout)
+    
+    def get_status(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "window": self.window,
+                "next_chapter_pages": self.next_chapter_pages,
+                "queued": len(self._queue),
+                "advised_pages": self.advised_pages,
+                "dropped_requests": self.dropped_requests
+            }
+    
+    def _enqueue(self, page_path: Optional[str], paths: Tuple[str, ...]) -> None:
+        if self.window <= 0 or not self.running:
+            return
+        
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped_requests += 1
+                return
+            self._queue.append((page_path, paths))
+            self._wakeup.notify()
+    
+    @staticmethod
+    def _advise_file(path: str) -> None:
+        member = archive_reader.get_member(path)
+        if member is not None:
+            file_path, offset, length = member.archive_path, member.data_offset, member.compress_size
+        else:
+            file_path, offset, length = path, 0, 0  # 0: até o fim do arquivo
+        
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue and not self._stop:
+                    self._wakeup.wait()
+                if self._stop:
+                    return
+                page_path, paths = self._queue.popleft()
+            
+            try:
+                if page_path is not None:
+                    paths = self.index.upcoming_pages(page_path, self.window, self.next_chapter_pages)
+                self.advise(paths)
+            except Exception as e:
+                logger.warning(f"Erro na leitura antecipada: {e}")
+
+
+# Instância global compartilhada pelos routers
+page_readahead = PageReadahead(
+    library_index,
+    window=get_settings().readahead_pages,
+    next_chapter_pages=get_settings().readahead_next_chapter_pages
+)
@@ -0,0 +1,56 @@
+import logging
+from typing import Optional
+
+from app.core.background_jobs import BackgroundJob, BackgroundJobManager
+from app.core.library_index import LibraryIndex, library_index
+from app.core.library_state import library_state
+
+logger = logging.getLogger(__name__)
+
+
+class ScanJob(BackgroundJob):
+    """Escaneamento de biblioteca executado em segundo plano"""
+    
+    def __init__(self, library_path: str):
+        super().__init__(library_path)
+        self.result: Optional[dict] = None
+    
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        data["result"] = self.result
+        return data
+
+
+class ScanJobManager(BackgroundJobManager):
+    """
+    Gerencia jobs de escaneamento (um por biblioteca por vez).
+    
+    O job roda em uma thread própria e reconstrói o índice da biblioteca;
+    o caminho da biblioteca só é salvo quando o escaneamento termina com
+    sucesso. Jobs concluídos ficam disponíveis para consulta até serem
+    descartados pelos mais recentes.
+    """
+    
+    job_class = ScanJob
+    label = "Job de escaneamento"
+    thread_name = "ohara-scan-job"
+    
+    def __init__(self, index: LibraryIndex, max_finished: int = 20):
+        super().__init__(max_finished)
+        self.index = index
+    
+    def _execute(self, job: ScanJob) -> None:
+        library = self.index.refresh(job.library_path, progress=job.progress)
+        library_state.current_path = job.library_path
+        
+        job.result = {
+            "total_mangas": library.total_mangas,
+            "total_chapters": library.total_chapters,
+            "total_pages": library.total_pages,
+            "last_updated": library.last_updated.isoformat()
+        }
+        logger.info(f"Job {job.id} concluído: {library.total_mangas} mangás")
+
+
+# Instância global compartilhada pelos routers
+scan_jobs = ScanJobManager(library_index)
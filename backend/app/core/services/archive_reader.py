@@ -0,0 +1,269 @@
+import io
+import logging
+import os
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import ARCHIVE_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho local de um membro: assinatura ... tamanho do nome, tamanho do extra
+LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+
+def is_archive_name(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in ARCHIVE_EXTENSIONS
+
+
+def split_archive_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Separa o caminho virtual de uma página dentro de um arquivo compactado.
+    
+    "/biblioteca/Mangá/Vol 1.cbz/001.jpg" -> ("/biblioteca/Mangá/Vol 1.cbz", "001.jpg")
+    
+    Só separa onde o prefixo é de fato um arquivo: pastas com nome de
+    arquivo compactado (biblioteca em "lib.zip", volume extraído em
+    "Vol 1.cbz") continuam sendo caminhos comuns.
+    
+    Returns:
+        (caminho do arquivo compactado, nome do membro) ou None se o caminho
+        não passa por um arquivo compactado
+    """
+    lowered = path.lower()
+    splits = sorted(
+        position + len(extension)
+        for extension in ARCHIVE_EXTENSIONS
+        for position in _find_all(lowered, extension + os.sep)
+    )
+    for split in splits:
+        if os.path.isfile(path[:split]):
+            member = path[split + 1:]
+            if os.sep != '/':
+                member = member.replace(os.sep, '/')
+            return path[:split], member
+    return None
+
+
+def _find_all(text: str, marker: str) -> List[int]:
+    positions = []
+    position = text.find(marker)
+    while position != -1:
+        positions.append(position)
+        position = text.find(marker, position + 1)
+    return positions
+
+
+@dataclass
+class ArchiveMember:
+    """Página dentro de um arquivo compactado, com offsets já resolvidos"""
+    archive_path: str
+    name: str
+    archive_stat: os.stat_result
+    header_offset: int
+    data_offset: int
+    compress_type: int
+    compress_size: int
+    file_size: int
+    crc: int
+    opener: Callable[[], BinaryIO]
+    
+    @property
+    def is_stored(self) -> bool:
+        """Sem compressão: os bytes podem ser enviados direto do arquivo"""
+        return self.compress_type == zipfile.ZIP_STORED
+    
+    @property
+    def etag(self) -> str:
+        """ETag forte: identidade do arquivo compactado + CRC e posição do membro"""
+        stat_result = self.archive_stat
+        return f'"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{self.crc:x}-{self.header_offset:x}"'
+    
+    def open(self) -> BinaryIO:
+        """Stream descomprimido do membro (seek para trás recomeça a leitura)"""
+        return self.opener()
+    
+    def read(self) -> bytes:
+        with self.open() as stream:
+            return stream.read()
+
+
+class _OpenArchive:
+    """Handle aberto de um ZIP com o índice do diretório central"""
+    
+    def __init__(self, path: str, stat_result: os.stat_result):
+        self.path = path
+        self.stat_result = stat_result
+        self.zip_file = zipfile.ZipFile(path)
+        self.infos: Dict[str, zipfile.ZipInfo] = {info.filename: info for info in self.zip_file.infolist()}
+        self.data_offsets: Dict[str, int] = {}
+        self.lock = threading.Lock()
+    
+    def matches(self, stat_result: os.stat_result) -> bool:
+        return (self.stat_result.st_ino, self.stat_result.st_size, self.stat_result.st_mtime_ns) == \
+            (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+    
+    def data_offset(self, info: zipfile.ZipInfo) -> int:
+        """Início dos dados do membro (lê o cabeçalho local uma única vez)"""
+        offset = self.data_offsets.get(info.filename)
+        if offset is not None:
+            return offset
+        
+        with open(self.path, 'rb') as handle:
+            handle.seek(info.header_offset)
+            header = handle.read(LOCAL_HEADER.size)
+        
+        fields = LOCAL_HEADER.unpack(header)
+        if fields[0] != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"Cabeçalho local inválido: {info.filename}")
+        
+        offset = info.header_offset + LOCAL_HEADER.size + fields[-2] + fields[-1]
+        with self.lock:
+            self.data_offsets[info.filename] = offset
+        return offset
+    
+    def close(self) -> None:
+        try:
+            self.zip_file.close()
+        except Exception:
+            pass
+
+
+class ArchiveReader:
+    """
+    Lê capítulos em arquivos ZIP/CBZ sem extraí-los.
+    
+    - A listagem de páginas vem apenas do diretório central do ZIP
+    - Handles abertos ficam em um LRU e são reabertos se o arquivo mudar
+    - O offset dos dados de cada membro é resolvido uma vez e guardado;
+      membros sem compressão (STORED) são servidos como um trecho do
+      próprio arquivo, sem recompressão nem cópia em disco
+    """
+    
+    def __init__(self, max_open: int = 32):
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[str, _OpenArchive]" = OrderedDict()
+    
+    def list_images(self, archive_path: str, is_image: Callable[[str], bool]) -> List[str]:
+        """Nomes das imagens do arquivo, ordenados (ignora pastas e ocultos)"""
+        try:
+            archive = self._get_archive(archive_path)
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.warning(f"Arquivo compactado inválido {archive_path}: {e}")
+            return []
+        
+        names = [
+            name for name, info in archive.infos.items()
+            if not info.is_dir()
+            and not any(part.startswith('.') or part == '__MACOSX' for part in name.split('/'))
+            and is_image(name)
+        ]
+        names.sort()
+        return names
+    
+    def get_member(self, path: str) -> Optional[ArchiveMember]:
+        """
+        Membro apontado por um caminho virtual (None se não for de arquivo
+        compactado).
+        
+        Raises:
+            FileNotFoundError: Se o arquivo compactado ou o membro não existir
+            PermissionError: Se o membro estiver criptografado
+        """
+        parts = split_archive_path(path)
+        if parts is None:
+            return None
+        archive_path, name = parts
+        
+        try:
+            archive = self._get_archive(archive_path)
+        except zipfile.BadZipFile as e:
+            raise FileNotFoundError(f"Arquivo compactado inválido: {archive_path}") from e
+        
+        info = archive.infos.get(name)
+        if info is None or info.is_dir():
+            raise FileNotFoundError(f"Página não encontrada em {archive_path}: {name}")
+        if info.flag_bits & 0x1:
+            raise PermissionError(f"Página criptografada: {name}")
+        
+        return ArchiveMember(
+            archive_path=archive_path,
+            name=name,
+            archive_stat=archive.stat_result,
+            header_offset=info.header_offset,
+            data_offset=archive.data_offset(info),
+            compress_type=info.compress_type,
+            compress_size=info.compress_size,
+            file_size=info.file_size,
+            crc=info.CRC,
+            opener=lambda: archive.zip_file.open(info)
+        )
+    
+    def open_page(self, path: str, buffered: bool = True) -> BinaryIO:
+        """
+        Abre uma página para leitura, esteja ela no disco ou em um arquivo
+        compactado.
+        
+        Com `buffered`, membros são lidos inteiros para a memória (acesso
+        aleatório barato, como o Pillow espera); sem ele, o membro é
+        descomprimido sob demanda (basta para ler só o cabeçalho).
+        """
+        member = self.get_member(path)
+        if member is None:
+            return open(path, 'rb')
+        if buffered:
+            return io.BytesIO(member.read())
+        return member.open()
+    
+    def close_all(self) -> None:
+        with self._lock:
+            archives = list(self._open.values())
+            self._open.clear()
+        for archive in archives:
+            archive.close()
+    
+    def _after_fork_in_child(self) -> None:
+        """
+        Processo filho (ex.: pool do pré-processamento): os handles herdados
+        dividem o offset do arquivo com o pai e o lock pode ter sido copiado
+        travado, então ambos são descartados.
+        """
+        self._lock = threading.Lock()
+        archives, self._open = list(self._open.values()), OrderedDict()
+        for archive in archives:
+            archive.close()
+    
+    def _get_archive(self, archive_path: str) -> _OpenArchive:
+        stat_result = os.stat(archive_path)
+        
+        with self._lock:
+            archive = self._open.get(archive_path)
+            if archive is not None and archive.matches(stat_result):
+                self._open.move_to_end(archive_path)
+                return archive
+        
+        # Abrir (lê o diretório central) fora do lock
+        opened = _OpenArchive(archive_path, stat_result)
+        
+        # Handles descartados são fechados pelo coletor quando a última
+        # leitura em andamento solta a referência
+        with self._lock:
+            self._open[archive_path] = opened
+            self._open.move_to_end(archive_path)
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        
+        return opened
+
+
+# Instância global compartilhada pelo scanner, índice e routers
+archive_reader = ArchiveReader()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=archive_reader._after_fork_in_child)
@@ -0,0 +1,123 @@
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # Dependência opcional: sem ela o Pillow faz a mesma varredura
+    np = None
+
+# Caixa do conteúdo em frações da imagem: (esquerda, topo, direita, base)
+ContentBox = Tuple[float, float, float, float]
+
+# A detecção roda sobre uma cópia reduzida (o resultado é proporcional)
+ANALYSIS_SIZE = 512
+# Diferença mínima de intensidade em relação à margem para contar como conteúdo
+INTENSITY_THRESHOLD = 40
+# Fração mínima de pixels de conteúdo para uma linha/coluna não ser margem
+# (ignora sujeira do scan e números de página isolados)
+MIN_CONTENT_FRACTION = 0.01
+# Fração mínima da borda da página com a cor da margem (branco ou preto)
+MIN_MARGIN_FRACTION = 0.5
+# Só corta se ganhar pelo menos isso em alguma dimensão
+MIN_TRIM_FRACTION = 0.02
+# Conteúdo menor que isso (página quase vazia) não é cortado
+MIN_CONTENT_AREA = 0.2
+# Respiro mantido em volta do conteúdo, em pixels da análise
+PADDING = 2
+
+
+def _margin_value(gray: Image.Image) -> Optional[int]:
+    """255 para margem branca, 0 para preta, None se a borda não tiver cor dominante"""
+    width, height = gray.size
+    histogram = [0] * 256
+    for edge in (gray.crop((0, 0, width, 1)), gray.crop((0, height - 1, width, height)),
+                 gray.crop((0, 0, 1, height)), gray.crop((width - 1, 0, width, height))):
+        histogram = [total + count for total, count in zip(histogram, edge.histogram())]
+    
+    pixels = sum(histogram)
+    white = sum(histogram[256 - INTENSITY_THRESHOLD:]) / pixels
+    black = sum(histogram[:INTENSITY_THRESHOLD]) / pixels
+    
+    if white >= MIN_MARGIN_FRACTION and white >= black:
+        return 255
+    if black >= MIN_MARGIN_FRACTION:
+        return 0
+    return None
+
+
+def _profiles_numpy(gray: Image.Image, margin: int) -> Tuple[Sequence[float], Sequence[float]]:
+    """Fração de pixels de conteúdo por linha e por coluna (vetorizado)"""
+    pixels = np.asarray(gray, dtype=np.int16)
+    content = np.abs(pixels - margin) > INTENSITY_THRESHOLD
+    return content.mean(axis=1), content.mean(axis=0)
+
+
+def _profiles_pillow(gray: Image.Image, margin: int) -> Tuple[List[float], List[float]]:
+    """Mesmos perfis sem NumPy: máscara via point() e médias via redução BOX"""
+    lookup = [255 if abs(value - margin) > INTENSITY_THRESHOLD else 0 for value in range(256)]
+    content = gray.point(lookup)
+    width, height = content.size
+    rows = [value / 255 for value in content.resize((1, height), Image.Resampling.BOX).getdata()]
+    columns = [value / 255 for value in content.resize((width, 1), Image.Resampling.BOX).getdata()]
+    return rows, columns
+
+
+def _span(profile: Sequence[float]) -> Optional[Tuple[int, int]]:
+    """Primeiro e último índice (exclusivo) com conteúdo"""
+    indexes = [index for index, fraction in enumerate(profile) if fraction > MIN_CONTENT_FRACTION]
+    if not indexes:
+        return None
+    return indexes[0], indexes[-1] + 1
+
+
+def detect_content_box(image: Image.Image) -> Optional[ContentBox]:
+    """
+    Caixa do conteúdo de uma página com margens brancas ou pretas.
+    
+    A imagem é reduzida e convertida para tons de cinza; cada linha e
+    coluna recebe a fração de pixels que difere da cor da margem (NumPy
+    quando instalado, senão operações do próprio Pillow) e a caixa vai da
+    primeira à última linha/coluna com conteúdo.
+    
+    Returns:
+        Caixa em frações da imagem ou None quando não há o que cortar
+        (margem não uniforme, ganho pequeno ou página quase vazia)
+    """
+    gray = image.convert('L')
+    gray.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BOX)
+    width, height = gray.size
+    if width < 16 or height < 16:
+        return None
+    
+    margin = _margin_value(gray)
+    if margin is None:
+        return None
+    
+    rows, columns = (_profiles_numpy if np is not None else _profiles_pillow)(gray, margin)
+    row_span, column_span = _span(rows), _span(columns)
+    if row_span is None or column_span is None:
+        return None
+    
+    left = max(0, column_span[0] - PADDING)
+    top = max(0, row_span[0] - PADDING)
+    right = min(width, column_span[1] + PADDING)
+    bottom = min(height, row_span[1] + PADDING)
+    
+    kept_width, kept_height = (right - left) / width, (bottom - top) / height
+    if kept_width * kept_height < MIN_CONTENT_AREA:
+        return None
+    if kept_width > 1 - MIN_TRIM_FRACTION and kept_height > 1 - MIN_TRIM_FRACTION:
+        return None
+    
+    return left / width, top / height, right / width, bottom / height
+
+
+def crop_to_box(image: Image.Image, box: ContentBox) -> Image.Image:
+    """Recorta a caixa (em frações) no tamanho atual da imagem"""
+    width, height = image.size
+    left, top, right, bottom = box
+    return image.crop((
+        int(left * width), int(top * height),
+        max(int(left * width) + 1, round(right * width)), max(int(top * height) + 1, round(bottom * height))
+    ))
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.models.manga import Page
+
+logger = logging.getLogger(__name__)
+
+# Estruturas do formato ZIP (APPNOTE 4.3.7, 4.3.12 e 4.3.16)
+LOCAL_FILE_HEADER = struct.Struct('<4s5H3L2H')
+CENTRAL_DIRECTORY_HEADER = struct.Struct('<4s6H3L5H2L')
+END_OF_CENTRAL_DIRECTORY = struct.Struct('<4s4H2LH')
+
+ZIP_VERSION = 20
+UTF8_NAMES_FLAG = 0x0800
+ZIP_STORED = 0
+# Sem ZIP64: tamanhos e offsets precisam caber em 32 bits
+ZIP32_LIMIT = 0xFFFFFFFF
+MAX_ENTRIES = 0xFFFF
+
+CRC_CHUNK_SIZE = 1024 * 1024
+
+
+class ChapterTooLarge(Exception):
+    """Capítulo não cabe em um ZIP sem ZIP64 (4 GiB ou 65535 páginas)"""
+    pass
+
+
+@dataclass
+class StoredEntry:
+    """Página do ZIP: nome no arquivo, origem no disco e metadados já conhecidos"""
+    name: str
+    path: str
+    size: int
+    crc: int
+    mtime: float
+
+
+def crc32_file(file_path: str, chunk_size: int = CRC_CHUNK_SIZE) -> int:
+    """CRC-32 do conteúdo do arquivo, lido em blocos"""
+    crc = 0
+    with open(file_path, 'rb') as handle:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                return crc
+            crc = zlib.crc32(chunk, crc)
+
+
+def crc_stamp(stat_result: os.stat_result) -> str:
+    """Identifica a versão do arquivo em que o CRC foi calculado (inode e mtime)"""
+    return f"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}"
+
+
+def chapter_entries(pages: Iterable[Page]) -> Tuple[List[StoredEntry], Dict[str, Tuple[int, int, str]]]:
+    """
+    Entradas do ZIP de um capítulo.
+    
+    O CRC já conhecido de uma página é reaproveitado enquanto tamanho,
+    inode e mtime no disco baterem com os registrados (uma página
+    sobrescrita com o mesmo tamanho é recalculada); os demais são
+    calculados aqui.
+    
+    Returns:
+        (entradas, checksums novos: caminho -> (bytes, crc, carimbo))
+    
+    Raises:
+        OSError: Se alguma página não puder ser lida
+    """
+    entries = []
+    computed = {}
+    
+    for page in pages:
+        stat_result = os.stat(page.path)
+        stamp = crc_stamp(stat_result)
+        crc = page.crc
+        if crc is None or page.size != stat_result.st_size or page.crc_stamp != stamp:
+            crc = crc32_file(page.path)
+            computed[page.path] = (stat_result.st_size, crc, stamp)
+        
+        entries.append(StoredEntry(
+            name=page.filename,
+            path=page.path,
+            size=stat_result.st_size,
+            crc=crc,
+            mtime=stat_result.st_mtime
+        ))
+    
+    return entries, computed
+
+
+def _dos_datetime(mtime: float) -> Tuple[int, int]:
+    """Data e hora no formato MS-DOS (resolução de 2 s, a partir de 1980)"""
+    moment = time.localtime(max(mtime, 315532800))
+    if moment.tm_year < 1980:
+        moment = time.struct_time((1980, 1, 1, 0, 0, 0, 0, 1, -1))
+    dos_time = (moment.tm_hour << 11) | (moment.tm_min << 5) | (moment.tm_sec // 2)
+    dos_date = ((moment.tm_year - 1980) << 9) | (moment.tm_mon << 5) | moment.tm_mday
+    return dos_time, dos_date
+
+
+class StoredZip:
+    """
+    ZIP sem compressão montado sob demanda a partir das páginas no disco.
+    
+    Como todas as entradas são STORED e os CRCs são conhecidos de antemão,
+    o layout inteiro (cabeçalhos, dados, diretório central) é calculado
+    antes do envio: o tamanho final é exato e qualquer trecho pode ser
+    gerado isoladamente, o que permite Content-Length e retomada por Range.
+    As imagens são copiadas do disco em leituras sequenciais, sem nada ser
+    gravado em disco.
+    """
+    
+    chunk_size = 256 * 1024
+    
+    def __init__(self, entries: List[StoredEntry]):
+        if len(entries) > MAX_ENTRIES:
+            raise ChapterTooLarge(f"{len(entries)} páginas")
+        
+        self.entries = entries
+        self._segments: List[Tuple[int, int, Union[bytes, StoredEntry]]] = []
+        self.size = 0
+        
+        central_directory = []
+        for entry in entries:
+            name = entry.name.encode('utf-8')
+            dos_time, dos_date = _dos_datetime(entry.mtime)
+            header_offset = self.size
+            
+            self._append(LOCAL_FILE_HEADER.pack(
+                b'PK\x03\x04', ZIP_VERSION, UTF8_NAMES_FLAG, ZIP_STORED, dos_time, dos_date,
+                entry.crc, entry.size, entry.size, len(name), 0
+            ) + name)
+            self._append(entry, entry.size)
+            
+            central_directory.append(CENTRAL_DIRECTORY_HEADER.pack(
+                b'PK\x01\x02', ZIP_VERSION, ZIP_VERSION, UTF8_NAMES_FLAG, ZIP_STORED, dos_time, dos_date,
+                entry.crc, entry.size, entry.size, len(name), 0, 0, 0, 0, 0, header_offset
+            ) + name)
+        
+        directory = b''.join(central_directory)
+        directory_offset = self.size
+        if directory_offset > ZIP32_LIMIT:
+            raise ChapterTooLarge(f"{directory_offset} bytes")
+        
+        self._append(directory + END_OF_CENTRAL_DIRECTORY.pack(
+            b'PK\x05\x06', 0, 0, len(entries), len(entries), len(directory), directory_offset, 0
+        ))
+    
+    @property
+    def etag(self) -> str:
+        """ETag forte: muda se qualquer página mudar de nome, tamanho ou conteúdo"""
+        digest = hashlib.blake2b(digest_size=12)
+        for entry in self.entries:
+            digest.update(f"{entry.name}|{entry.size}|{entry.crc:x}|{entry.mtime}\n".encode('utf-8'))
+        return f'"{digest.hexdigest()}"'
+    
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Gera o trecho [start, end] (inclusivo) do arquivo.
+        
+        Raises:
+            OSError: Se uma página diminuir ou sumir durante o envio (o
+                     tamanho anunciado não pode mais ser cumprido)
+        """
+        end = self.size - 1 if end is None else end
+        
+        for segment_start, length, content in self._segments:
+            segment_end = segment_start + length - 1
+            if segment_end < start or length == 0:
+                continue
+            if segment_start > end:
+                break
+            
+            first = max(start, segment_start) - segment_start
+            last = min(end, segment_end) - segment_start
+            
+            if isinstance(content, bytes):
+                yield content[first:last + 1]
+            else:
+                yield from self._read_entry(content, first, last - first + 1)
+    
+    def _read_entry(self, entry: StoredEntry, offset: int, length: int) -> Iterator[bytes]:
+        with open(entry.path, 'rb') as handle:
+            handle.seek(offset)
+            while length > 0:
+                chunk = handle.read(min(self.chunk_size, length))
+                if not chunk:
+                    raise OSError(f"Página alterada durante o download: {entry.path}")
+                length -= len(chunk)
+                yield chunk
+    
+    def _append(self, content: Union[bytes, StoredEntry], length: Optional[int] = None) -> None:
+        length = len(content) if length is None else length
+        self._segments.append((self.size, length, content))
+        self.size += length
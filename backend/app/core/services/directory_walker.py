@@ -0,0 +1,237 @@
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.services.archive_reader import ArchiveReader, is_archive_name
+
+logger = logging.getLogger(__name__)
+
+# Nomes de arquivo preferidos para capa, em ordem de prioridade
+COVER_NAMES = ('cover', 'capa', 'thumb', 'thumbnail')
+
+
+def directory_fingerprint(stat_result: os.stat_result, inode: Optional[int] = None,
+                          entries: Optional[int] = None) -> Dict[str, Optional[int]]:
+    """Impressão digital de um diretório: mtime_ns, inode e número de entradas"""
+    return {
+        'mtime_ns': stat_result.st_mtime_ns,
+        'inode': inode if inode is not None else stat_result.st_ino,
+        'entries': entries
+    }
+
+
+def same_fingerprint(cached: Optional[Dict], current: Optional[Dict]) -> bool:
+    """Compara impressões digitais (entradas só contam quando ambas conhecidas)"""
+    if not cached or not current:
+        return False
+    if cached.get('mtime_ns') != current.get('mtime_ns') or cached.get('inode') != current.get('inode'):
+        return False
+    if cached.get('entries') is not None and current.get('entries') is not None:
+        return cached['entries'] == current['entries']
+    return True
+
+
+@dataclass
+class ChapterListing:
+    """Resultado da listagem de um diretório de capítulo"""
+    path: Path
+    images: Optional[List[str]] = field(default_factory=list)
+    fingerprint: Optional[Dict] = None
+    reused: bool = False  # True quando não foi listado (impressão digital inalterada)
+    archive: bool = False  # Capítulo em arquivo ZIP/CBZ (imagens são membros)
+    
+    @property
+    def name(self) -> str:
+        return self.path.name
+    
+    @property
+    def title(self) -> str:
+        """Nome exibido: arquivos compactados perdem a extensão"""
+        return self.path.stem if self.archive else self.path.name
+    
+    def image_paths(self) -> List[Path]:
+        return [self.path / name for name in self.images or []]
+
+
+@dataclass
+class MangaListing:
+    """Resultado da listagem de um diretório de mangá (uma única passada)"""
+    path: Path
+    chapters: List[ChapterListing] = field(default_factory=list)
+    root_images: List[str] = field(default_factory=list)
+    cover: Optional[str] = None
+    fingerprint: Optional[Dict] = None
+
+
+class DirectoryWalker:
+    """
+    Percorre diretórios de mangá usando os.scandir.
+    
+    Cada diretório é listado uma única vez e o tipo de cada entrada vem do
+    DirEntry (d_type), evitando um stat() por arquivo. Da mesma passada saem
+    os capítulos, suas imagens e a candidata a capa.
+    
+    Com um ArchiveReader, arquivos ZIP/CBZ dentro do mangá também viram
+    capítulos; suas páginas vêm só do diretório central do arquivo.
+    """
+    
+    def __init__(self, supported_extensions: Iterable[str], archive_reader: Optional[ArchiveReader] = None):
+        self.supported_extensions = {ext.lower() for ext in supported_extensions}
+        self.archive_reader = archive_reader
+    
+    def is_image_name(self, name: str) -> bool:
+        return os.path.splitext(name)[1].lower() in self.supported_extensions
+    
+    def list_directory(self, directory: Path) -> Tuple[List[os.DirEntry], List[str]]:
+        """Lista um diretório: (subdiretórios, nomes de imagens ordenados)"""
+        subdirs, images, _, _ = self._scan_directory(directory)
+        return subdirs, images
+    
+    def _scan_directory(self, directory: Path) -> Tuple[List[os.DirEntry], List[str], int, List[os.DirEntry]]:
+        subdirs = []
+        images = []
+        archives = []
+        total = 0
+        
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    total += 1
+                    try:
+                        if entry.is_dir():
+                            subdirs.append(entry)
+                        elif entry.is_file() and self.is_image_name(entry.name):
+                            images.append(entry.name)
+                        elif self.archive_reader and is_archive_name(entry.name) and entry.is_file():
+                            archives.append(entry)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.error(f"Erro ao ler diretório {directory}: {e}")
+        
+        subdirs.sort(key=lambda entry: entry.name)
+        images.sort()
+        archives.sort(key=lambda entry: entry.name)
+        return subdirs, images, total, archives
+    
+    def list_images(self, directory: Path) -> List[str]:
+        """Lista apenas os nomes de imagens de um diretório"""
+        return self.list_directory(directory)[1]
+    
+    def list_chapter_images(self, chapter_path: Path) -> List[str]:
+        """Imagens de um capítulo, seja diretório ou arquivo compactado"""
+        if self.archive_reader and is_archive_name(chapter_path.name) and chapter_path.is_file():
+            return self.archive_reader.list_images(str(chapter_path), self.is_image_name)
+        return self.list_images(chapter_path)
+    
+    def has_images(self, directory: Path) -> bool:
+        """Verifica se há ao menos uma imagem (para na primeira encontrada)"""
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and self.is_image_name(entry.name):
+                            return True
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        
+        return False
+    
+    def list_manga_directories(self, library_path: Path) -> List[Path]:
+        """Lista diretórios de mangá (ignora ocultos)"""
+        subdirs, _ = self.list_directory(library_path)
+        return [Path(entry.path) for entry in subdirs if not entry.name.startswith('.')]
+    
+    def walk_manga(self, manga_path: Path,
+                   reuse: Optional[Callable[[Path, Dict], bool]] = None) -> MangaListing:
+        """
+        Lista o mangá e cada capítulo exatamente uma vez.
+        
+        Args:
+            manga_path: Diretório do mangá
+            reuse: Função opcional (caminho, impressão digital) -> bool. Quando
+                   retorna True o capítulo não é listado e sai com reused=True.
+        """
+        # Stat antes da listagem: mudanças durante o scan invalidam na próxima vez
+        try:
+            manga_stat = os.stat(manga_path)
+        except OSError as e:
+            logger.error(f"Erro ao ler diretório {manga_path}: {e}")
+            return MangaListing(path=manga_path)
+        
+        subdirs, root_images, total, archives = self._scan_directory(manga_path)
+        listing = MangaListing(
+            path=manga_path,
+            root_images=root_images,
+            fingerprint=directory_fingerprint(manga_stat, entries=total)
+        )
+        
+        for entry in subdirs:
+            chapter_path = Path(entry.path)
+            try:
+                chapter_stat = entry.stat()
+                if not chapter_stat.st_ino:  # Windows: DirEntry.stat() não traz inode
+                    chapter_stat = os.stat(entry.path)
+                fingerprint = directory_fingerprint(chapter_stat)
+            except OSError:
+                continue
+            
+            if reuse and reuse(chapter_path, fingerprint):
+                listing.chapters.append(ChapterListing(
+                    path=chapter_path, images=None, fingerprint=fingerprint, reused=True
+                ))
+                continue
+            
+            _, images, total, _ = self._scan_directory(chapter_path)
+            if images:
+                fingerprint['entries'] = total
+                listing.chapters.append(ChapterListing(
+                    path=chapter_path, images=images, fingerprint=fingerprint
+                ))
+        
+        for entry in archives:
+            chapter_path = Path(entry.path)
+            try:
+                archive_stat = entry.stat()
+                if not archive_stat.st_ino:
+                    archive_stat = os.stat(entry.path)
+                fingerprint = directory_fingerprint(archive_stat)
+            except OSError:
+                continue
+            
+            if reuse and reuse(chapter_path, fingerprint):
+                listing.chapters.append(ChapterListing(
+                    path=chapter_path, images=None, fingerprint=fingerprint, reused=True, archive=True
+                ))
+                continue
+            
+            # Só o diretório central do ZIP é lido
+            images = self.archive_reader.list_images(entry.path, self.is_image_name)
+            if images:
+                fingerprint['entries'] = len(images)
+                listing.chapters.append(ChapterListing(
+                    path=chapter_path, images=images, fingerprint=fingerprint, archive=True
+                ))
+        
+        listing.cover = self._pick_cover(listing)
+        return listing
+    
+    def _pick_cover(self, listing: MangaListing) -> Optional[str]:
+        """Capa nomeada na raiz > primeira imagem da raiz > primeira página do primeiro capítulo"""
+        if listing.root_images:
+            stems = {os.path.splitext(name)[0].lower(): name for name in reversed(listing.root_images)}
+            for cover_name in COVER_NAMES:
+                if cover_name in stems:
+                    return str(listing.path / stems[cover_name])
+            return str(listing.path / listing.root_images[0])
+        
+        # Capítulo reaproveitado não foi listado: quem chamou decide a capa
+        if listing.chapters and listing.chapters[0].images:
+            first_chapter = listing.chapters[0]
+            return str(first_chapter.path / first_chapter.images[0])
+        
+        return None
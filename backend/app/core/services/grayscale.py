@@ -0,0 +1,71 @@
+import logging
+
+from PIL import Image, ImageChops
+
+from app.core.services.archive_reader import archive_reader
+
+try:
+    import numpy as np
+except ImportError:  # Dependência opcional: sem ela o Pillow faz o mesmo teste
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# O teste roda sobre uma cópia reduzida (JPEG já decodifica reduzido via draft)
+ANALYSIS_SIZE = 256
+# Diferença máxima entre canais ainda considerada cinza (ruído de croma do JPEG)
+CHANNEL_TOLERANCE = 16
+# Fração de pixels coloridos tolerada (carimbos, sujeira do scan)
+MAX_COLOR_FRACTION = 0.001
+
+GRAYSCALE_MODES = {'1', 'L', 'LA', 'I', 'I;16', 'F'}
+
+
+def _color_fraction_numpy(rgb: Image.Image) -> float:
+    pixels = np.asarray(rgb, dtype=np.int16)
+    chroma = pixels.max(axis=2) - pixels.min(axis=2)
+    return float((chroma > CHANNEL_TOLERANCE).mean())
+
+
+def _color_fraction_pillow(rgb: Image.Image) -> float:
+    red, green, blue = rgb.split()
+    chroma = ImageChops.lighter(
+        ImageChops.lighter(ImageChops.difference(red, green), ImageChops.difference(green, blue)),
+        ImageChops.difference(red, blue)
+    )
+    histogram = chroma.histogram()
+    return sum(histogram[CHANNEL_TOLERANCE + 1:]) / (rgb.width * rgb.height)
+
+
+def is_grayscale(image: Image.Image) -> bool:
+    """
+    Página efetivamente em tons de cinza, mesmo que salva como RGB.
+    
+    Modos de um canal já respondem; nos demais, uma cópia reduzida é
+    comparada canal a canal (NumPy quando instalado, senão ImageChops) e a
+    página é cinza se quase nenhum pixel tiver diferença entre canais acima
+    do ruído de compressão.
+    """
+    if image.mode in GRAYSCALE_MODES:
+        return True
+    
+    sample = image.copy() if image.mode == 'RGB' else image.convert('RGB')
+    sample.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BOX)
+    fraction = (_color_fraction_numpy if np is not None else _color_fraction_pillow)(sample)
+    return fraction <= MAX_COLOR_FRACTION
+
+
+def probe_grayscale(file_path: str) -> bool:
+    """
+    Decodifica uma versão reduzida da página e aplica is_grayscale.
+    
+    Páginas que não puderem ser decodificadas contam como coloridas (nada
+    é convertido para um canal por engano).
+    """
+    try:
+        with archive_reader.open_page(file_path) as source, Image.open(source) as image:
+            image.draft('RGB', (ANALYSIS_SIZE, ANALYSIS_SIZE))
+            return is_grayscale(image)
+    except Exception as e:
+        logger.debug(f"Não foi possível analisar as cores de {file_path}: {e}")
+        return False
@@ -0,0 +1,143 @@
+import logging
+import os
+import struct
+from typing import BinaryIO, Optional, Tuple
+
+from app.core.services.archive_reader import archive_reader
+
+logger = logging.getLogger(__name__)
+
+# Marcadores SOF do JPEG (C4, C8 e CC são DHT, JPG e DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Marcadores sem campo de tamanho
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+# Limite de segmentos percorridos antes do SOF (arquivos corrompidos)
+JPEG_MAX_SEGMENTS = 256
+
+HEADER_BYTES = 32
+
+# Layout da página a partir das dimensões do cabeçalho
+PAGE_SINGLE = 'single'
+PAGE_SPREAD = 'spread'  # Página dupla
+PAGE_STRIP = 'strip'  # Tira vertical (webtoon)
+# Largura/altura a partir da qual a página é dupla (página simples fica em ~0.7)
+SPREAD_MIN_ASPECT = 1.2
+# Altura/largura a partir da qual a página é uma tira vertical
+STRIP_MIN_ASPECT = 2.5
+
+
+def probe_image_size(file_path: str) -> Optional[Tuple[int, int]]:
+    """
+    Largura e altura da imagem lendo apenas o cabeçalho (sem decodificar).
+    
+    Formatos: JPEG (segmento SOF), PNG (IHDR), WebP (VP8, VP8L, VP8X),
+    GIF (Logical Screen Descriptor) e BMP. A orientação EXIF não é aplicada.
+    Páginas dentro de arquivos ZIP/CBZ são descomprimidas só até o cabeçalho.
+    
+    Returns:
+        (largura, altura) ou None se o formato não for reconhecido ou o
+        cabeçalho estiver incompleto
+    """
+    try:
+        with archive_reader.open_page(file_path, buffered=False) as handle:
+            head = handle.read(HEADER_BYTES)
+            
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return struct.unpack('<HH', head[6:10])
+            
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                return _probe_webp(head)
+            
+            if head[:2] == b'\xff\xd8':
+                return _probe_jpeg(handle)
+            
+            if head[:2] == b'BM' and len(head) >= 26:
+                width, height = struct.unpack('<ii', head[18:26])
+                return width, abs(height)
+    except (OSError, struct.error, IndexError) as e:
+        logger.debug(f"Não foi possível ler o cabeçalho de {file_path}: {e}")
+    
+    return None
+
+
+def probe_page(file_path: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """Tamanho em bytes, largura e altura de uma página (None se indisponível)"""
+    try:
+        member = archive_reader.get_member(file_path)
+        size = member.file_size if member else os.stat(file_path).st_size
+    except OSError:
+        return None, None, None
+    
+    dimensions = probe_image_size(file_path)
+    if not dimensions:
+        return size, None, None
+    return size, dimensions[0], dimensions[1]
+
+
+def classify_page(width: Optional[int], height: Optional[int]) -> Optional[str]:
+    """Página simples, dupla ou tira vertical pela proporção (None sem dimensões)"""
+    if not width or not height:
+        return None
+    if width / height >= SPREAD_MIN_ASPECT:
+        return PAGE_SPREAD
+    if height / width >= STRIP_MIN_ASPECT:
+        return PAGE_STRIP
+    return PAGE_SINGLE
+
+
+def _probe_webp(head: bytes) -> Optional[Tuple[int, int]]:
+    chunk = head[12:16]
+    
+    if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    
+    if chunk == b'VP8L' and head[20] == 0x2F:
+        bits = struct.unpack('<I', head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    
+    if chunk == b'VP8X':
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    
+    return None
+
+
+def _probe_jpeg(handle: BinaryIO) -> Optional[Tuple[int, int]]:
+    """Percorre os segmentos até o SOF pulando os dados de cada um"""
+    handle.seek(2)
+    
+    for _ in range(JPEG_MAX_SEGMENTS):
+        byte = handle.read(1)
+        if byte != b'\xff':
+            return None
+        
+        # Bytes 0xFF extras são preenchimento
+        marker = 0xFF
+        while marker == 0xFF:
+            data = handle.read(1)
+            if not data:
+                return None
+            marker = data[0]
+        
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / SOS: não há SOF antes dos dados
+            return None
+        
+        length_bytes = handle.read(2)
+        if len(length_bytes) != 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>xHH', handle.read(5))
+            return width, height
+        
+        handle.seek(length - 2, os.SEEK_CUR)
+    
+    return None
@@ -0,0 +1,317 @@
+import bisect
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from app.core.config import get_settings
+from app.core.http_cache import file_etag
+from app.core.services.archive_reader import archive_reader
+from app.core.services.border_trim import ANALYSIS_SIZE, ContentBox, crop_to_box, detect_content_box
+from app.core.services.grayscale import is_grayscale
+from app.core.utils import atomic_write_bytes, atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# Formatos de saída: nome no Pillow, extensão no cache e media type
+OUTPUT_FORMATS = {
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg'),
+    'webp': ('WEBP', '.webp', 'image/webp')
+}
+
+# Perfil que serve a página sem conversão
+ORIGINAL_TIER = 'original'
+
+# Bytes por pixel aproximados de cada codificador com qualidade 100
+# (estimativa de tamanho dos perfis; páginas de mangá ficam abaixo disso)
+BYTES_PER_PIXEL = {'jpeg': 0.6, 'webp': 0.4}
+
+# Tag EXIF Orientation; 5 a 8 giram a imagem 90° (largura e altura trocam)
+EXIF_ORIENTATION = 0x0112
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    """Perfil de economia de dados: largura máxima, formato e qualidade"""
+    name: str
+    max_width: int
+    output_format: str
+    quality: int
+
+
+def quality_tiers(settings) -> Dict[str, QualityTier]:
+    """Perfis configurados em `image_quality_tiers` (sem "original")"""
+    tiers = {}
+    for name, profile in settings.image_quality_tiers.items():
+        output_format = profile.get('format', 'webp')
+        if name == ORIGINAL_TIER or output_format not in OUTPUT_FORMATS or not profile.get('max_width'):
+            logger.warning(f"Perfil de qualidade ignorado: {name}")
+            continue
+        tiers[name] = QualityTier(
+            name=name,
+            max_width=int(profile['max_width']),
+            output_format=output_format,
+            quality=int(profile.get('quality', settings.image_derivative_quality))
+        )
+    return tiers
+
+
+class ImageService:
+    """
+    Gera miniaturas e versões redimensionadas das páginas com Pillow.
+    
+    - JPEGs são decodificados em modo draft: o decodificador já reduz a
+      imagem (1/2, 1/4, 1/8) e páginas grandes custam uma fração do tempo
+    - Os arquivos gerados ficam em um cache em disco endereçado pelo
+      conteúdo: a chave combina a identidade do arquivo de origem (inode,
+      tamanho, mtime; ETag do membro em arquivos ZIP/CBZ) com os parâmetros,
+      então uma página alterada gera uma nova entrada e as requisições
+      seguintes são apenas envio de arquivo
+    - Larguras pedidas são arredondadas para poucas faixas fixas
+      (`image_width_buckets`), mantendo o número de variantes pequeno
+    - Com `image_trim_borders`, margens brancas/pretas são cortadas antes
+      de redimensionar; a caixa do conteúdo é detectada uma vez por página
+      e guardada no cache junto à identidade da origem
+    - Páginas em tons de cinza salvas como RGB são codificadas com um só
+      canal (`image_encode_grayscale`): arquivo menor e menos memória para
+      o navegador decodificar
+    
+    Layout em disco:
+        <cache_dir>/thumbnails/<2 primeiros caracteres>/<chave>.jpg
+        <cache_dir>/derivatives/<2 primeiros caracteres>/<chave>.<jpg|webp>
+        <cache_dir>/trim/<2 primeiros caracteres>/<chave>.json
+    """
+    
+    THUMBNAILS_DIR_NAME = 'thumbnails'
+    DERIVATIVES_DIR_NAME = 'derivatives'
+    TRIM_DIR_NAME = 'trim'
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.settings = get_settings()
+        self.cache_dir = Path(cache_dir or self.settings.cache_dir)
+    
+    @property
+    def thumbnail_size(self) -> Tuple[int, int]:
+        width, height = self.settings.thumbnail_size
+        return int(width), int(height)
+    
+    def snap_width(self, width: Optional[int]) -> Optional[int]:
+        """
+        Menor faixa que cobre a largura pedida.
+        
+        Retorna None quando nenhuma faixa cobre a largura (o original é
+        servido) ou quando não há largura.
+        """
+        buckets = sorted(self.settings.image_width_buckets)
+        if not width or width <= 0 or not buckets:
+            return None
+        
+        position = bisect.bisect_left(buckets, width)
+        return buckets[position] if position < len(buckets) else None
+    
+    def quality_tiers(self) -> Dict[str, QualityTier]:
+        return quality_tiers(self.settings)
+    
+    @staticmethod
+    def estimate_bytes(size: Optional[int], width: Optional[int], height: Optional[int],
+                       tier: QualityTier) -> int:
+        """
+        Tamanho aproximado da página no perfil, a partir das dimensões
+        sondadas. Sem dimensões, conta o original (limite superior).
+        """
+        if not width or not height:
+            return size or 0
+        
+        target_width = min(width, tier.max_width)
+        target_height = height * target_width / width
+        estimate = int(target_width * target_height * BYTES_PER_PIXEL[tier.output_format] * tier.quality / 100)
+        return min(estimate, size) if size else estimate
+    
+    def source_etag(self, source_path: str) -> str:
+        """Identidade da origem: ETag do arquivo ou do membro do arquivo compactado"""
+        member = archive_reader.get_member(source_path)
+        if member is not None:
+            return member.etag
+        return file_etag(os.stat(source_path))
+    
+    def thumbnail_key(self, source_etag: str) -> str:
+        """Chave do cache: identidade da origem + tamanho + qualidade"""
+        width, height = self.thumbnail_size
+        return self._key(source_etag, f"{width}x{height}|q{self.settings.thumbnail_quality}")
+    
+    def derivative_key(self, source_etag: str, width: Optional[int], output_format: str,
+                       quality: Optional[int] = None) -> str:
+        quality = quality or self.settings.image_derivative_quality
+        trim = "|trim" if self.settings.image_trim_borders else ""
+        gray = "|gray" if self.settings.image_encode_grayscale else ""
+        return self._key(source_etag, f"w{width or 0}|{output_format}|q{quality}{trim}{gray}")
+    
+    def get_thumbnail_file(self, key: str) -> Path:
+        return self.cache_dir / self.THUMBNAILS_DIR_NAME / key[:2] / f"{key}.jpg"
+    
+    def get_derivative_file(self, key: str, output_format: str) -> Path:
+        extension = OUTPUT_FORMATS[output_format][1]
+        return self.cache_dir / self.DERIVATIVES_DIR_NAME / key[:2] / f"{key}{extension}"
+    
+    def get_trim_file(self, key: str) -> Path:
+        return self.cache_dir / self.TRIM_DIR_NAME / key[:2] / f"{key}.json"
+    
+    def trim_box(self, source_path: str, source_etag: Optional[str] = None) -> Optional[ContentBox]:
+        """
+        Caixa do conteúdo da página sem as margens (None: nada a cortar).
+        
+        Detectada em uma decodificação reduzida e guardada no cache em disco,
+        então as várias larguras e formatos da mesma página não repetem a
+        análise.
+        
+        Raises:
+            OSError: Se a origem não puder ser lida
+        """
+        source_etag = source_etag or self.source_etag(source_path)
+        # Caixa na orientação de leitura (EXIF aplicado), como em render
+        trim_file = self.get_trim_file(self._key(source_etag, "trim|oriented"))
+        try:
+            box = json.loads(trim_file.read_text(encoding='utf-8'))['box']
+            return tuple(box) if box else None
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        with archive_reader.open_page(source_path) as source, Image.open(source) as image:
+            image.draft('L', (ANALYSIS_SIZE, ANALYSIS_SIZE))
+            box = detect_content_box(ImageOps.exif_transpose(image))
+        
+        trim_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(trim_file, json.dumps({'box': box}))
+        return box
+    
+    def thumbnail(self, source_path: str, source_etag: Optional[str] = None) -> Path:
+        """
+        Caminho da miniatura em cache, gerando-a se ainda não existir.
+        
+        Raises:
+            OSError: Se a origem não puder ser lida ou a miniatura gravada
+        """
+        source_etag = source_etag or self.source_etag(source_path)
+        thumbnail_file = self.get_thumbnail_file(self.thumbnail_key(source_etag))
+        return self._cached(thumbnail_file, lambda: self.render_thumbnail(source_path))
+    
+    def derivative(self, source_path: str, width: Optional[int], output_format: str = 'jpeg',
+                   source_etag: Optional[str] = None, quality: Optional[int] = None,
+                   grayscale: Optional[bool] = None) -> Path:
+        """
+        Caminho de uma versão da página com a largura (já arredondada), o
+        formato e a qualidade (padrão `image_derivative_quality`) pedidos,
+        gerando-a se ainda não existir. `grayscale` é o que o índice já sabe
+        da página (Page.grayscale); None faz o teste nos pixels ao gerar.
+        
+        Raises:
+            OSError: Se a origem não puder ser lida ou o arquivo gravado
+        """
+        source_etag = source_etag or self.source_etag(source_path)
+        quality = quality or self.settings.image_derivative_quality
+        derivative_file = self.get_derivative_file(
+            self.derivative_key(source_etag, width, output_format, quality), output_format
+        )
+        
+        def render() -> bytes:
+            trim_box = self.trim_box(source_path, source_etag) if self.settings.image_trim_borders else None
+            return self.render(source_path, width, None, output_format, quality, trim_box,
+                               grayscale=grayscale if self.settings.image_encode_grayscale else False)
+        
+        return self._cached(derivative_file, render)
+    
+    def render_thumbnail(self, source_path: str) -> bytes:
+        """Gera a miniatura em JPEG na memória (sem usar o cache)"""
+        width, height = self.thumbnail_size
+        return self.render(source_path, width, height, 'jpeg', self.settings.thumbnail_quality)
+    
+    def render(self, source_path: str, max_width: Optional[int], max_height: Optional[int],
+               output_format: str, quality: int, trim_box: Optional[ContentBox] = None,
+               grayscale: Optional[bool] = False) -> bytes:
+        """
+        Reduz a imagem para caber em max_width x max_height (sem ampliar) e
+        codifica no formato pedido. Limites None não restringem. Com
+        `trim_box`, a imagem é recortada antes (os limites valem para o
+        conteúdo recortado). Com `grayscale` True a página é codificada em
+        um canal (WebP não tem modo cinza, mas o croma constante também
+        encolhe o arquivo); com None, só se o teste nos pixels não achar cor.
+        """
+        pil_format = OUTPUT_FORMATS[output_format][0]
+        
+        with archive_reader.open_page(source_path) as source, Image.open(source) as image:
+            # Limites, recorte e draft valem para a página já na orientação de leitura
+            rotated = image.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS
+            width, height = (image.height, image.width) if rotated else image.size
+            if trim_box:
+                left, top, right, bottom = trim_box
+                box = self._fit_box((width * (right - left), height * (bottom - top)), max_width, max_height)
+                # O draft precisa cobrir a caixa depois do recorte
+                draft = (math.ceil(box[0] / (right - left)), math.ceil(box[1] / (bottom - top)))
+            else:
+                box = self._fit_box((width, height), max_width, max_height)
+                draft = box
+            # Só tem efeito em JPEG: reduz a escala já na decodificação (nos eixos do arquivo)
+            image.draft('RGB', (draft[1], draft[0]) if rotated else draft)
+            image = ImageOps.exif_transpose(image)
+            if trim_box:
+                image = crop_to_box(image, trim_box)
+            image.thumbnail(box, Image.Resampling.LANCZOS)
+            image = self._to_rgb(image)
+            if grayscale or (grayscale is None and is_grayscale(image)):
+                image = image.convert('L')
+            
+            output = io.BytesIO()
+            if pil_format == 'JPEG':
+                image.save(output, format=pil_format, quality=quality, optimize=True, progressive=True)
+            else:
+                image.save(output, format=pil_format, quality=quality, method=4)
+            return output.getvalue()
+    
+    def _cached(self, target: Path, render: Callable[[], bytes]) -> Path:
+        if target.is_file():
+            return target
+        
+        content = render()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(target, content)
+        logger.debug(f"Imagem gerada no cache: {target.name} ({len(content)} bytes)")
+        return target
+    
+    @staticmethod
+    def _key(source_etag: str, variant: str) -> str:
+        return hashlib.blake2b(f"{source_etag}|{variant}".encode('ascii'), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _fit_box(size: Tuple[int, int], max_width: Optional[int], max_height: Optional[int]) -> Tuple[int, int]:
+        """Caixa final (proporcional, sem ampliar) para draft e thumbnail"""
+        width, height = size
+        scale = min(
+            max_width / width if max_width else 1.0,
+            max_height / height if max_height else 1.0,
+            1.0
+        )
+        return max(1, round(width * scale)), max(1, round(height * scale))
+    
+    @staticmethod
+    def _to_rgb(image: Image.Image) -> Image.Image:
+        if image.mode == 'RGB':
+            return image
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # Transparência vira fundo branco (JPEG não tem canal alfa)
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        return image.convert('RGB')
+
+
+# Instância global compartilhada pelos routers
+image_service = ImageService()
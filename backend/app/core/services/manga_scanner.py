@@ -1,11 +1,17 @@
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from app.core.config import get_settings, SUPPORTED_IMAGE_EXTENSIONS
+from app.core.services.archive_reader import archive_reader
 from app.core.services.simple_cache import SimpleCache
 from app.core.services.chapter_parser import ChapterParser
+from app.core.services.directory_walker import ChapterListing, DirectoryWalker, same_fingerprint
+from app.core.services.scan_progress import ScanProgress
 from app.models.manga import Manga, Chapter, Page, Library
 
 logger = logging.getLogger(__name__)
@@ -19,81 +25,174 @@ class MangaScanner:
     - Escaneamento de bibliotecas de mangás
     - Cache simples baseado em timestamp
     - Descoberta de estruturas de mangá
+    - Escaneamento paralelo (um mangá por tarefa)
     """
     
     def __init__(self):
         self.settings = get_settings()
         self.supported_extensions = SUPPORTED_IMAGE_EXTENSIONS
         self.cache_enabled = True
+        self.max_workers = max(1, self.settings.scan_max_workers)
         
         # Componentes essenciais
         self.cache = SimpleCache()
         self.chapter_parser = ChapterParser()
+        self.walker = DirectoryWalker(self.supported_extensions, archive_reader)
         
         logger.info("MangaScanner inicializado (modo simplificado)")
 
-    def scan_library(self, library_path: str) -> Library:
-        """Escaneia uma biblioteca de mangás com cache simples"""
+    def scan_library(self, library_path: str, progress: Optional[ScanProgress] = None) -> Library:
+        """
+        Escaneia uma biblioteca de mangás com cache simples.
+        
+        Args:
+            library_path: Caminho da biblioteca
+            progress: Acompanhamento opcional do progresso. Se for cancelado,
+                      o escaneamento é interrompido com ScanCancelled e o
+                      cache não é salvo.
+        """
+        library = Library(mangas=list(self.iter_library(library_path, progress)))
+        library._update_stats()
+        return library
+    
+    def iter_library(self, library_path: str, progress: Optional[ScanProgress] = None) -> Iterator[Manga]:
+        """
+        Escaneia a biblioteca como gerador, entregando cada mangá (na ordem
+        dos diretórios) assim que fica pronto.
+        
+        No máximo alguns mangás ficam em processamento ao mesmo tempo, então
+        quem consome o gerador controla o ritmo do escaneamento. O cache só é
+        salvo quando o gerador é consumido até o fim.
+        """
         library_path_obj = Path(library_path)
         
         if not library_path_obj.exists():
             raise ValueError(f"Biblioteca não encontrada: {library_path}")
         
-        # Carregar cache se habilitado
+        # Carregar apenas o manifesto do cache (páginas ficam nos shards)
         cache_data = {}
         if self.cache_enabled:
-            cache_file = library_path_obj / self.cache.cache_file_name
-            cache_data = self.cache.load_cache(cache_file)
+            cache_data = self.cache.load_manifest(library_path_obj)
         
         # Descobrir diretórios de mangá
         manga_dirs = self._discover_manga_directories(library_path_obj)
         logger.info(f"Encontrados {len(manga_dirs)} diretórios de mangá")
+        if progress:
+            progress.set_discovered(len(manga_dirs))
         
-        # Processar mangás
+        # Processar mangás (em paralelo, preservando a ordem)
         mangas = []
+        changed = []
         cache_hits = 0
         
-        for manga_dir in manga_dirs:
+        for manga, from_cache in self._iter_manga_directories(manga_dirs, cache_data, progress):
+            if manga:
+                mangas.append(manga)
+                if from_cache:
+                    cache_hits += 1
+                else:
+                    changed.append(manga)
+                yield manga
+        
+        # Salvar cache apenas se alguma entrada mudou
+        if self.cache_enabled and self._cache_is_dirty(mangas, cache_hits, cache_data):
+            self.cache.save_cache(library_path_obj, mangas, changed=changed)
+        
+        logger.info(f"Biblioteca escaneada: {len(mangas)} mangás ({cache_hits} do cache)")
+    
+    @staticmethod
+    def _cache_is_dirty(mangas: List[Manga], cache_hits: int, cache_data: Dict) -> bool:
+        """Cache precisa ser reescrito se houve reescaneamento ou mangás removidos"""
+        if cache_hits < len(mangas):
+            return True
+        return {manga.id for manga in mangas} != set(cache_data.keys())
+    
+    def _iter_manga_directories(self, manga_dirs: List[Path], cache_data: Dict,
+                                progress: Optional[ScanProgress] = None) -> Iterator[Tuple[Optional[Manga], bool]]:
+        """Processar diretórios de mangá com pool de threads e janela limitada"""
+        def load(manga_dir: Path) -> Tuple[Optional[Manga], bool]:
+            if progress is None:
+                return self._load_manga(manga_dir, cache_data)
+            
+            # Cancelamento cooperativo: tarefas pendentes terminam sem trabalho
+            progress.check_cancelled()
+            result = self._load_manga(manga_dir, cache_data)
+            progress.manga_done(manga_dir.name, result[1])
+            return result
+        
+        if self.max_workers <= 1 or len(manga_dirs) <= 1:
+            for manga_dir in manga_dirs:
+                yield load(manga_dir)
+            return
+        
+        workers = min(self.max_workers, len(manga_dirs))
+        remaining = iter(manga_dirs)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ohara-scan") as executor:
+            # Janela de tarefas em andamento: resultados saem na ordem de entrada
+            pending = deque(executor.submit(load, manga_dir) for manga_dir in islice(remaining, workers * 2))
+            while pending:
+                result = pending.popleft().result()
+                next_dir = next(remaining, None)
+                if next_dir is not None:
+                    pending.append(executor.submit(load, next_dir))
+                yield result
+    
+    def _load_manga(self, manga_dir: Path, cache_data: Dict) -> Tuple[Optional[Manga], bool]:
+        """Carregar mangá do cache ou escanear (falhas ficam isoladas por mangá)"""
+        try:
             manga_id = self._generate_manga_id(manga_dir.name)
             cache_entry = cache_data.get(manga_id)
             
-            # Tentar usar cache
-            if self.cache_enabled and self.cache.is_valid(manga_dir, cache_entry):
-                manga = self.cache.restore_manga(cache_entry['manga_data'])
-                if manga:
-                    # Recriar páginas se necessário
-                    self._ensure_pages_loaded(manga)
-                    mangas.append(manga)
-                    cache_hits += 1
-                    continue
+            if self.cache_enabled and cache_entry:
+                # Tentar usar cache
+                if self.cache.is_valid(manga_dir, cache_entry):
+                    manga = self.cache.restore_manga(cache_entry.get('manga_data') or {})
+                    if manga:
+                        # Páginas ficam no shard e são carregadas sob demanda
+                        return manga, True
+                
+                # Cache desatualizado: reescanear só os capítulos alterados
+                previous = self.cache.restore_manga(cache_entry.get('manga_data') or {})
+                if previous and previous.fingerprint:
+                    return self.refresh_manga(previous), False
             
             # Escanear mangá
-            manga = self.scan_manga(str(manga_dir))
-            if manga:
-                mangas.append(manga)
+            return self.scan_manga(str(manga_dir)), False
         
-        # Salvar cache atualizado
-        if self.cache_enabled and mangas:
-            self.cache.save_cache(library_path_obj / self.cache.cache_file_name, mangas)
+        except Exception as e:
+            logger.error(f"Erro ao processar mangá {manga_dir.name}: {e}")
+            return None, False
         
-        logger.info(f"Biblioteca escaneada: {len(mangas)} mangás ({cache_hits} do cache)")
+    def scan_manga(self, manga_path: str, previous: Optional[Manga] = None) -> Optional[Manga]:
+        """
+        Escaneia um mangá específico.
         
-        library = Library(mangas=mangas)
-        library._update_stats()
-        return library
-    
-    def scan_manga(self, manga_path: str) -> Optional[Manga]:
-        """Escaneia um mangá específico"""
+        Args:
+            manga_path: Caminho do diretório do mangá
+            previous: Versão anterior do mangá (cache/índice). Capítulos cuja
+                      impressão digital não mudou são reaproveitados sem listagem.
+        """
         manga_path_obj = Path(manga_path)
         
         if not manga_path_obj.exists():
             return None
         
+        known_chapters = {}
+        if previous:
+            known_chapters = {
+                Path(chapter.path).name: chapter
+                for chapter in previous.chapters if chapter.fingerprint
+            }
+        
+        def reuse(chapter_path: Path, fingerprint: dict) -> bool:
+            known = known_chapters.get(chapter_path.name)
+            return known is not None and same_fingerprint(known.fingerprint, fingerprint)
+        
         try:
-            # Descobrir capítulos
-            chapter_dirs = self._discover_chapter_directories(manga_path_obj)
+            # Listar mangá e capítulos em uma única passada
+            listing = self.walker.walk_manga(manga_path_obj, reuse=reuse if known_chapters else None)
             
-            if not chapter_dirs:
+            if not listing.chapters:
                 logger.warning(f"Nenhum capítulo encontrado em: {manga_path_obj.name}")
                 return None
             
@@ -101,8 +200,11 @@ class MangaScanner:
             chapters = []
             total_pages = 0
             
-            for chapter_dir in chapter_dirs:
-                chapter = self._scan_chapter(chapter_dir)
+            for chapter_listing in listing.chapters:
+                if chapter_listing.reused:
+                    chapter = known_chapters[chapter_listing.name]
+                else:
+                    chapter = self._build_chapter(chapter_listing)
                 if chapter:
                     chapters.append(chapter)
                     total_pages += chapter.page_count
@@ -113,8 +215,14 @@ class MangaScanner:
             # Ordenar capítulos
             chapters = self.chapter_parser.sort_chapters(chapters)
             
-            # Encontrar thumbnail
-            thumbnail = self._find_thumbnail(manga_path_obj)
+            # Thumbnail vem da mesma listagem
+            thumbnail = listing.cover
+            if thumbnail is None and previous:
+                thumbnail = previous.thumbnail
+            
+            rescanned = sum(1 for chapter_listing in listing.chapters if not chapter_listing.reused)
+            if previous:
+                logger.info(f"Mangá atualizado: {manga_path_obj.name} ({rescanned} capítulos reescaneados)")
             
             # Criar mangá
             manga = Manga(
@@ -125,8 +233,9 @@ class MangaScanner:
                 chapters=chapters,
                 chapter_count=len(chapters),
                 total_pages=total_pages,
-                date_added=datetime.now(),
-                date_modified=datetime.fromtimestamp(manga_path_obj.stat().st_mtime)
+                date_added=previous.date_added if previous else datetime.now(),
+                date_modified=datetime.fromtimestamp(listing.fingerprint['mtime_ns'] / 1e9),
+                fingerprint=listing.fingerprint
             )
             
             return manga
@@ -135,6 +244,47 @@ class MangaScanner:
             logger.error(f"Erro ao escanear mangá {manga_path_obj.name}: {e}")
             return None
     
+    def refresh_manga(self, manga: Manga) -> Optional[Manga]:
+        """Reescanear mangá reaproveitando capítulos inalterados"""
+        if self.cache_enabled and not self.cache.pages_loaded(manga):
+            # Capítulos reaproveitados precisam das páginas do shard
+            shard = self.cache.load_shard(Path(manga.path).parent, manga.id)
+            self.cache.restore_pages(manga, shard)
+        
+        updated = self.scan_manga(manga.path, previous=manga)
+        if updated:
+            self._ensure_pages_loaded(updated)
+        return updated
+    
+    def load_pages(self, manga: Manga) -> None:
+        """Carregar páginas sob demanda: shard do cache ou, se faltar, listagem"""
+        if self.cache.pages_loaded(manga):
+            return
+        
+        library_path = Path(manga.path).parent
+        missing = True
+        if self.cache_enabled:
+            shard = self.cache.load_shard(library_path, manga.id)
+            missing = bool(self.cache.restore_pages(manga, shard))
+        
+        if missing:
+            # Shard ausente ou corrompido afeta apenas este mangá
+            self._ensure_pages_loaded(manga)
+            if self.cache_enabled:
+                self.cache.save_shard(library_path, manga)
+    
+    def update_cache(self, library_path: str, mangas: List[Manga], changed: List[Manga]) -> None:
+        """Persistir alterações feitas fora de scan_library (ex.: índice)"""
+        if self.cache_enabled:
+            self.cache.save_cache(Path(library_path), mangas, changed=changed)
+    
+    def is_manga_current(self, manga: Manga) -> bool:
+        """Verificar (apenas com stat) se mangá e capítulos continuam iguais no disco"""
+        if not manga.fingerprint:
+            return False
+        chapters = [(chapter.path, chapter.fingerprint) for chapter in manga.chapters]
+        return self.cache.fingerprints_match(manga.path, manga.fingerprint, chapters)
+    
     def enable_cache(self):
         """Habilitar cache"""
         self.cache_enabled = True
@@ -155,44 +305,28 @@ class MangaScanner:
     
     def _discover_manga_directories(self, library_path: Path) -> List[Path]:
         """Descobrir diretórios de mangá"""
-        manga_dirs = []
-        
-        try:
-            for item in library_path.iterdir():
-                if item.is_dir() and not item.name.startswith('.'):
-                    manga_dirs.append(item)
-        except OSError as e:
-            logger.error(f"Erro ao ler biblioteca: {e}")
-        
-        return sorted(manga_dirs)
+        return self.walker.list_manga_directories(library_path)
     
     def _discover_chapter_directories(self, manga_path: Path) -> List[Path]:
         """Descobrir diretórios de capítulos"""
-        chapter_dirs = []
-        
-        try:
-            for item in manga_path.iterdir():
-                if item.is_dir():
-                    # Verificar se tem imagens
-                    if self._has_images(item):
-                        chapter_dirs.append(item)
-        except OSError as e:
-            logger.error(f"Erro ao ler mangá: {e}")
-        
-        return chapter_dirs
+        return [chapter.path for chapter in self.walker.walk_manga(manga_path).chapters]
     
     def _scan_chapter(self, chapter_path: Path) -> Optional[Chapter]:
         """Escanear um capítulo"""
+        images = self.walker.list_chapter_images(chapter_path)
+        return self._build_chapter(ChapterListing(path=chapter_path, images=images))
+    
+    def _build_chapter(self, chapter_listing: ChapterListing) -> Optional[Chapter]:
+        """Criar capítulo a partir da listagem já feita do diretório"""
+        chapter_path = chapter_listing.path
+        
         try:
-            # Encontrar imagens
-            image_files = self._find_image_files(chapter_path)
-            
-            if not image_files:
+            if not chapter_listing.images:
                 return None
             
             # Criar páginas
             pages = []
-            for i, image_file in enumerate(image_files, 1):
+            for i, image_file in enumerate(chapter_listing.image_paths(), 1):
                 page = Page(
                     id=f"{chapter_path.name}_page_{i}",
                     number=i,
@@ -202,7 +336,7 @@ class MangaScanner:
                 pages.append(page)
             
             # Analisar capítulo
-            chapter_info = self.chapter_parser.parse_chapter_name(chapter_path.name)
+            chapter_info = self.chapter_parser.parse_chapter_name(chapter_listing.title)
             
             # Gerar ID limpo para capítulo
             manga_id = self._generate_manga_id(chapter_path.parent.name)
@@ -211,13 +345,14 @@ class MangaScanner:
             
             chapter = Chapter(
                 id=chapter_id,
-                name=chapter_path.name,
+                name=chapter_listing.title,
                 number=chapter_info.get('number', 0),
                 volume=chapter_info.get('volume'),
                 path=str(chapter_path),
                 pages=pages,
                 page_count=len(pages),
-                date_added=datetime.now()
+                date_added=datetime.now(),
+                fingerprint=chapter_listing.fingerprint
             )
             
             return chapter
@@ -228,51 +363,15 @@ class MangaScanner:
     
     def _find_thumbnail(self, manga_path: Path) -> Optional[str]:
         """Encontrar thumbnail do mangá"""
-        # Procurar na pasta raiz
-        for ext in self.supported_extensions:
-            for pattern in ['cover', 'capa', 'thumb', 'thumbnail']:
-                thumb_file = manga_path / f"{pattern}.{ext}"
-                if thumb_file.exists():
-                    return str(thumb_file)
-        
-        # Usar primeira imagem da pasta raiz
-        for file in manga_path.iterdir():
-            if file.is_file() and file.suffix.lower() in self.supported_extensions:
-                return str(file)
-        
-        # Usar primeira página do primeiro capítulo
-        chapter_dirs = self._discover_chapter_directories(manga_path)
-        if chapter_dirs:
-            first_chapter = sorted(chapter_dirs)[0]
-            image_files = self._find_image_files(first_chapter)
-            if image_files:
-                return str(image_files[0])
-        
-        return None
+        return self.walker.walk_manga(manga_path).cover
     
     def _find_image_files(self, directory: Path) -> List[Path]:
         """Encontrar arquivos de imagem em um diretório"""
-        image_files = []
-        
-        try:
-            for file in directory.iterdir():
-                if file.is_file() and file.suffix.lower() in self.supported_extensions:
-                    image_files.append(file)
-        except OSError:
-            pass
-        
-        return sorted(image_files)
+        return [directory / name for name in self.walker.list_chapter_images(directory)]
     
     def _has_images(self, directory: Path) -> bool:
         """Verificar se diretório tem imagens"""
-        try:
-            for file in directory.iterdir():
-                if file.is_file() and file.suffix.lower() in self.supported_extensions:
-                    return True
-        except OSError:
-            pass
-        
-        return False
+        return self.walker.has_images(directory)
     
     def _ensure_pages_loaded(self, manga: Manga) -> None:
         """Garantir que páginas estão carregadas para mangá do cache"""
@@ -0,0 +1,78 @@
+import threading
+import time
+from typing import Optional
+
+
+class ScanCancelled(Exception):
+    """Escaneamento interrompido a pedido do usuário"""
+    pass
+
+
+class ScanProgress:
+    """
+    Progresso de um escaneamento, compartilhado entre as threads do scanner
+    e quem acompanha o job (thread-safe).
+    
+    O scanner informa quantos mangás foram descobertos e avisa a cada mangá
+    concluído; o cancelamento é cooperativo e verificado antes de cada mangá.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.discovered = 0
+        self.scanned = 0
+        self.cache_hits = 0
+        self.current: Optional[str] = None
+        self.version = 0  # Incrementa a cada mudança (para quem faz polling)
+    
+    def set_discovered(self, total: int) -> None:
+        with self._lock:
+            self.discovered = total
+            self.version += 1
+    
+    def manga_done(self, name: str, from_cache: bool) -> None:
+        with self._lock:
+            self.scanned += 1
+            if from_cache:
+                self.cache_hits += 1
+            self.current = name
+            self.version += 1
+    
+    def finish(self) -> None:
+        with self._lock:
+            self.finished_at = time.monotonic()
+            self.version += 1
+    
+    def cancel(self) -> None:
+        self._cancel_event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise ScanCancelled("Escaneamento cancelado")
+    
+    def snapshot(self) -> dict:
+        """Estado atual: contadores, tempo decorrido e estimativa restante"""
+        with self._lock:
+            end = self.finished_at or time.monotonic()
+            elapsed = end - self.started_at
+            
+            eta = None
+            if self.finished_at is None and self.scanned and self.discovered >= self.scanned:
+                eta = elapsed / self.scanned * (self.discovered - self.scanned)
+            
+            return {
+                "discovered": self.discovered,
+                "scanned": self.scanned,
+                "cache_hits": self.cache_hits,
+                "current": self.current,
+                "percent": round(self.scanned / self.discovered * 100, 1) if self.discovered else 0.0,
+                "elapsed_seconds": round(elapsed, 2),
+                "eta_seconds": round(eta, 1) if eta is not None else None
+            }
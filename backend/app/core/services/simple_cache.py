@@ -1,9 +1,13 @@
 import json
 import logging
+import os
+import shutil
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from app.models.manga import Manga
+from app.core.services.directory_walker import directory_fingerprint, same_fingerprint
+from app.core.utils import atomic_write_text, locked_file
+from app.models.manga import Manga, Page
 
 logger = logging.getLogger(__name__)
 
@@ -15,56 +19,219 @@ class SimpleCache:
     Funcionalidades essenciais:
     - Cache de metadados baseado em timestamp
     - Invalidação automática quando diretório muda
+    - Impressão digital por capítulo (mtime_ns, inode, entradas)
+    - Lista de páginas persistida em formato compacto
+    - Escrita atômica (temporário + os.replace) protegida por lock
     - Operações básicas: load, save, clear
+    
+    Layout em disco (dentro da biblioteca):
+        .ohara_cache/manifest.json       resumo + impressões digitais de cada mangá
+        .ohara_cache/mangas/<id>.json    páginas de um mangá (carregado sob demanda)
     """
     
+    CACHE_VERSION = 2
+    
     def __init__(self):
-        self.cache_file_name = '.ohara_cache.json'
+        self.cache_dir_name = '.ohara_cache'
+        self.manifest_file_name = 'manifest.json'
+        self.shards_dir_name = 'mangas'
+        self.legacy_cache_file_name = '.ohara_cache.json'
+    
+    def get_cache_dir(self, library_path) -> Path:
+        return Path(library_path) / self.cache_dir_name
+    
+    def get_manifest_file(self, library_path) -> Path:
+        return self.get_cache_dir(library_path) / self.manifest_file_name
+    
+    def get_shard_file(self, library_path, manga_id: str) -> Path:
+        return self.get_cache_dir(library_path) / self.shards_dir_name / self._shard_name(manga_id)
+    
+    @staticmethod
+    def _shard_name(manga_id: str) -> str:
+        return f"{manga_id or '_'}.json"
         
     def load_cache(self, cache_file: Path) -> Dict:
-        """Carregar cache com validação básica"""
+        """Carregar arquivo JSON do cache com validação básica"""
         if not cache_file.exists():
             return {}
         
         try:
             cache_data = json.loads(cache_file.read_text(encoding='utf-8'))
             if isinstance(cache_data, dict):
-                logger.info(f"Cache carregado: {len(cache_data)} entradas")
                 return cache_data
         except Exception as e:
-            logger.warning(f"Cache inválido, recriando: {e}")
+            logger.warning(f"Cache inválido, recriando: {cache_file.name}: {e}")
         
         return {}
     
-    def save_cache(self, cache_file: Path, mangas: List[Manga]) -> None:
-        """Salvar cache com dados essenciais"""
+    def load_manifest(self, library_path) -> Dict:
+        """Carregar apenas o manifesto: {manga_id: entrada}"""
+        manifest = self.load_cache(self.get_manifest_file(library_path))
+        
+        if manifest.get('version') != self.CACHE_VERSION:
+            return {}
+        
+        entries = manifest.get('mangas')
+        if not isinstance(entries, dict):
+            return {}
+        
+        logger.info(f"Manifesto do cache carregado: {len(entries)} entradas")
+        return entries
+    
+    def load_shard(self, library_path, manga_id: str) -> Optional[Dict]:
+        """Carregar o shard de páginas de um único mangá"""
+        shard = self.load_cache(self.get_shard_file(library_path, manga_id))
+        if not isinstance(shard.get('chapters'), dict):
+            return None
+        return shard
+    
+    def save_cache(self, library_path, mangas: List[Manga],
+                   changed: Optional[Iterable[Manga]] = None) -> None:
+        """
+        Salvar cache (escrita atômica e serializada).
+        
+        Args:
+            library_path: Caminho da biblioteca
+            mangas: Todos os mangás da biblioteca (compõem o manifesto)
+            changed: Mangás cujos shards devem ser reescritos. Por padrão,
+                     todos os que têm páginas carregadas.
+        """
         try:
-            cache_data = {}
+            cache_dir = self.get_cache_dir(library_path)
+            shards_dir = cache_dir / self.shards_dir_name
+            shards_dir.mkdir(parents=True, exist_ok=True)
             
+            if changed is None:
+                changed = [manga for manga in mangas if self.pages_loaded(manga)]
+            
+            entries = {}
             for manga in mangas:
-                manga_path = Path(manga.path)
-                dir_mtime = manga_path.stat().st_mtime
+                if manga.fingerprint:
+                    dir_mtime = manga.fingerprint['mtime_ns'] / 1e9
+                else:
+                    dir_mtime = Path(manga.path).stat().st_mtime
                 
-                cache_data[manga.id] = {
+                entries[manga.id] = {
                     'manga_data': self._create_cache_data(manga),
                     'dir_mtime': dir_mtime
                 }
             
-            cache_file.write_text(
-                json.dumps(cache_data, separators=(',', ':'), ensure_ascii=False),
-                encoding='utf-8'
-            )
+            manifest_file = self.get_manifest_file(library_path)
+            with locked_file(manifest_file):
+                # Shards primeiro: um manifesto novo nunca aponta para shard velho
+                written = 0
+                for manga in changed:
+                    if self._write_shard(library_path, manga):
+                        written += 1
+            
+                self._remove_stale_shards(shards_dir, {self._shard_name(manga_id) for manga_id in entries})
+                
+                manifest = {'version': self.CACHE_VERSION, 'mangas': entries}
+                atomic_write_text(
+                    manifest_file,
+                    json.dumps(manifest, separators=(',', ':'), ensure_ascii=False)
+                )
             
-            logger.info(f"Cache salvo: {len(cache_data)} mangás")
+            self._remove_legacy_cache(library_path)
+            logger.info(f"Cache salvo: {len(entries)} mangás ({written} shards reescritos)")
             
         except Exception as e:
             logger.warning(f"Erro ao salvar cache: {e}")
     
+    def save_shard(self, library_path, manga: Manga) -> None:
+        """Reescrever apenas o shard de um mangá"""
+        try:
+            shard_file = self.get_shard_file(library_path, manga.id)
+            shard_file.parent.mkdir(parents=True, exist_ok=True)
+            with locked_file(self.get_manifest_file(library_path)):
+                self._write_shard(library_path, manga)
+        except Exception as e:
+            logger.warning(f"Erro ao salvar shard de {manga.id}: {e}")
+    
+    def _write_shard(self, library_path, manga: Manga) -> bool:
+        if not self.pages_loaded(manga):
+            return False
+        
+        shard = {
+            'fingerprint': manga.fingerprint,
+            'chapters': {
+                Path(chapter.path).name: {
+                    'fingerprint': chapter.fingerprint,
+                    'pages': [self._compact_page(chapter.path, page) for page in chapter.pages]
+                }
+                for chapter in manga.chapters
+            }
+        }
+        atomic_write_text(
+            self.get_shard_file(library_path, manga.id),
+            json.dumps(shard, separators=(',', ':'), ensure_ascii=False)
+        )
+        return True
+    
+    def _remove_stale_shards(self, shards_dir: Path, shard_names: set) -> None:
+        try:
+            with os.scandir(shards_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.json') and entry.name not in shard_names:
+                        os.unlink(entry.path)
+        except OSError as e:
+            logger.warning(f"Erro ao remover shards antigos: {e}")
+    
+    def _remove_legacy_cache(self, library_path) -> None:
+        legacy_file = Path(library_path) / self.legacy_cache_file_name
+        try:
+            if legacy_file.exists():
+                legacy_file.unlink()
+                logger.info(f"Cache antigo removido: {legacy_file}")
+        except OSError:
+            pass
+    
+    def restore_pages(self, manga: Manga, shard: Optional[Dict]) -> List[str]:
+        """
+        Preencher páginas do mangá a partir do shard.
+        
+        Returns:
+            List[str]: Caminhos dos capítulos que não puderam ser restaurados
+        """
+        shard_chapters = (shard or {}).get('chapters') or {}
+        missing = []
+        
+        for chapter in manga.chapters:
+            if chapter.pages:
+                continue
+            
+            shard_chapter = shard_chapters.get(Path(chapter.path).name)
+            if not shard_chapter or not same_fingerprint(shard_chapter.get('fingerprint'), chapter.fingerprint):
+                missing.append(chapter.path)
+                continue
+            
+            try:
+                chapter.pages = [self._restore_page(chapter.path, page) for page in shard_chapter['pages']]
+            except Exception as e:
+                logger.warning(f"Páginas inválidas no shard de {manga.id}: {e}")
+                missing.append(chapter.path)
+        
+        return missing
+    
     def is_valid(self, manga_dir: Path, cache_entry: Optional[Dict]) -> bool:
-        """Verificar se cache é válido baseado em timestamp do diretório"""
+        """
+        Verificar se cache é válido.
+        
+        Entradas com impressão digital comparam o diretório do mangá e cada
+        capítulo (um stat por diretório, sem listagem). Entradas antigas
+        comparam apenas o timestamp do diretório do mangá.
+        """
         if not cache_entry:
             return False
         
+        manga_data = cache_entry.get('manga_data') or {}
+        if manga_data.get('fingerprint'):
+            chapters = [
+                (chapter.get('path'), chapter.get('fingerprint'))
+                for chapter in manga_data.get('chapters', [])
+            ]
+            return self.fingerprints_match(str(manga_dir), manga_data['fingerprint'], chapters)
+        
         try:
             dir_mtime = manga_dir.stat().st_mtime
             cached_mtime = cache_entry.get('dir_mtime', 0)
@@ -72,48 +239,134 @@ class SimpleCache:
         except OSError:
             return False
     
+    @staticmethod
+    def fingerprints_match(manga_path: str, manga_fingerprint: Optional[Dict],
+                           chapters: Iterable[Tuple[str, Optional[Dict]]]) -> bool:
+        """Comparar impressões digitais do mangá e de seus capítulos com o disco"""
+        try:
+            if not same_fingerprint(manga_fingerprint, directory_fingerprint(os.stat(manga_path))):
+                return False
+            
+            for chapter_path, chapter_fingerprint in chapters:
+                if not chapter_path or not same_fingerprint(
+                    chapter_fingerprint, directory_fingerprint(os.stat(chapter_path))
+                ):
+                    return False
+        except OSError:
+            return False
+        
+        return True
+    
     def restore_manga(self, manga_data: Dict) -> Optional[Manga]:
         """Restaurar mangá do cache"""
         try:
-            return Manga(**manga_data)
+            data = dict(manga_data)
+            if 'chapters' in data:
+                data['chapters'] = [self._restore_chapter(chapter) for chapter in data['chapters']]
+            return Manga(**data)
         except Exception as e:
             logger.warning(f"Erro ao restaurar mangá: {e}")
             return None
     
+    def _restore_chapter(self, chapter_data: Dict) -> Dict:
+        """Expandir páginas compactas de um capítulo"""
+        pages = chapter_data.get('pages') or []
+        if not pages or isinstance(pages[0], dict):
+            return chapter_data
+        
+        chapter_path = chapter_data.get('path', '')
+        data = dict(chapter_data)
+        data['pages'] = [self._restore_page(chapter_path, page) for page in pages]
+        return data
+    
+    @staticmethod
+    def _restore_page(chapter_path: str, page_data) -> Page:
+        """
+        Página compacta: "arquivo" ou ["arquivo", tamanho, largura, altura, crc, cinza, carimbo do crc].
+        
+        O nome é relativo ao capítulo (membros de ZIP/CBZ podem estar em
+        subpastas do arquivo).
+        """
+        if isinstance(page_data, str):
+            page_data = [page_data]
+        
+        name, size, width, height, crc, grayscale, crc_stamp = (list(page_data) + [None] * 7)[:7]
+        return Page(
+            filename=os.path.basename(name),
+            path=os.path.join(chapter_path, name),
+            size=size,
+            width=width,
+            height=height,
+            crc=crc,
+            grayscale=grayscale,
+            crc_stamp=crc_stamp
+        )
+    
+    @staticmethod
+    def _compact_page(chapter_path: str, page: Page):
+        """Compactar página: só o nome quando não há metadados"""
+        name = os.path.relpath(page.path, chapter_path)
+        compact = [name, page.size, page.width, page.height, page.crc, page.grayscale, page.crc_stamp]
+        while compact[-1] is None:
+            compact.pop()
+        return compact if len(compact) > 1 else name
+    
+    @staticmethod
+    def pages_loaded(manga: Manga) -> bool:
+        """Verificar se todas as páginas do mangá estão em memória"""
+        return all(chapter.pages or not chapter.page_count for chapter in manga.chapters)
+    
     def clear_cache(self, library_path: str) -> bool:
         """Limpar cache"""
         try:
-            cache_file = Path(library_path) / self.cache_file_name
-            if cache_file.exists():
-                cache_file.unlink()
-                logger.info(f"Cache limpo: {cache_file}")
-                return True
-            return False
+            cleared = False
+            cache_dir = self.get_cache_dir(library_path)
+            if cache_dir.exists():
+                shutil.rmtree(cache_dir)
+                cleared = True
+            
+            legacy_file = Path(library_path) / self.legacy_cache_file_name
+            if legacy_file.exists():
+                legacy_file.unlink()
+                cleared = True
+            
+            if cleared:
+                logger.info(f"Cache limpo: {cache_dir}")
+            return cleared
         except Exception as e:
             logger.warning(f"Erro ao limpar cache: {e}")
             return False
     
     def get_cache_info(self, library_path: str) -> Dict:
-        """Informações básicas do cache"""
-        cache_file = Path(library_path) / self.cache_file_name
+        """Informações básicas do cache (sem interpretar o JSON)"""
+        manifest_file = self.get_manifest_file(library_path)
         
-        if not cache_file.exists():
+        if not manifest_file.exists():
             return {"exists": False}
         
         try:
-            stat = cache_file.stat()
-            cache_data = self.load_cache(cache_file)
+            total_size = manifest_file.stat().st_size
+            entries = 0
+            
+            shards_dir = self.get_cache_dir(library_path) / self.shards_dir_name
+            if shards_dir.exists():
+                with os.scandir(shards_dir) as shard_entries:
+                    for entry in shard_entries:
+                        if entry.name.endswith('.json'):
+                            entries += 1
+                            total_size += entry.stat().st_size
             
             return {
                 "exists": True,
-                "size_mb": round(stat.st_size / 1024 / 1024, 2),
-                "entries": len(cache_data)
+                "size_mb": round(total_size / 1024 / 1024, 2),
+                "manifest_size_mb": round(manifest_file.stat().st_size / 1024 / 1024, 2),
+                "entries": entries
             }
         except Exception:
             return {"exists": True, "error": "Erro ao ler cache"}
     
     def _create_cache_data(self, manga: Manga) -> Dict:
-        """Criar dados de cache otimizados"""
+        """Criar resumo do mangá para o manifesto (páginas ficam no shard)"""
         chapters_data = []
         
         for chapter in manga.chapters:
@@ -125,7 +378,7 @@ class SimpleCache:
                 "path": chapter.path,
                 "page_count": chapter.page_count,
                 "date_added": chapter.date_added.isoformat() if chapter.date_added else None,
-                "pages": []
+                "fingerprint": chapter.fingerprint
             })
         
         return {
@@ -137,5 +390,6 @@ class SimpleCache:
             "chapter_count": manga.chapter_count,
             "total_pages": manga.total_pages,
             "date_added": manga.date_added.isoformat() if manga.date_added else None,
-            "date_modified": manga.date_modified.isoformat() if manga.date_modified else None
-        }
\ No newline at end of file
+            "date_modified": manga.date_modified.isoformat() if manga.date_modified else None,
+            "fingerprint": manga.fingerprint
+        }
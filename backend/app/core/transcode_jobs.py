@@ -0,0 +1,297 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.background_jobs import BackgroundJob, BackgroundJobManager
+from app.core.config import get_settings
+from app.core.library_index import LibraryIndex, library_index
+from app.core.services.image_service import ImageService, quality_tiers
+from app.core.services.scan_progress import ScanProgress
+from app.core.utils import atomic_write_text
+from app.models.manga import Manga
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE_NAME = 'pretranscode_checkpoint.json'
+# Checkpoint gravado no máximo a cada N segundos (e sempre ao terminar)
+CHECKPOINT_INTERVAL_SECONDS = 10.0
+
+# Serviço de imagens de cada processo do pool (um por diretório de cache)
+_worker_services: Dict[str, ImageService] = {}
+
+
+def _process_pool(**kwargs) -> ProcessPoolExecutor:
+    """
+    Pool de processos iniciados por forkserver (spawn onde não houver): um
+    fork do servidor herdaria locks e threads (watcher, sondagem) em
+    estados arbitrários.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context(method), **kwargs)
+
+
+def _init_worker(nice: int) -> None:
+    """Inicializador dos processos do pool: prioridade baixa no sistema"""
+    if nice and hasattr(os, 'nice'):
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+
+
+def transcode_page(cache_dir: str, source_path: str, variants: List[Tuple[int, str, Optional[int]]],
+                   thumbnail: bool, grayscale: Optional[bool] = None) -> int:
+    """
+    Gera as versões de uma página que ainda não estão no cache (executado
+    nos processos do pool). `grayscale` vem do índice (Page.grayscale).
+    
+    Returns:
+        int: Número de arquivos gerados
+    """
+    service = _worker_services.get(cache_dir)
+    if service is None:
+        service = _worker_services[cache_dir] = ImageService(cache_dir)
+    
+    source_etag = service.source_etag(source_path)
+    generated = 0
+    
+    for width, output_format, quality in variants:
+        key = service.derivative_key(source_etag, width, output_format, quality)
+        if not service.get_derivative_file(key, output_format).is_file():
+            service.derivative(source_path, width, output_format, source_etag, quality, grayscale)
+            generated += 1
+    
+    if thumbnail and not service.get_thumbnail_file(service.thumbnail_key(source_etag)).is_file():
+        service.thumbnail(source_path, source_etag)
+        generated += 1
+    
+    return generated
+
+
+class TranscodeProgress(ScanProgress):
+    """Progresso do pré-processamento: mangás (herdado) e páginas"""
+    
+    def __init__(self):
+        super().__init__()
+        self.pages_done = 0
+        self.generated = 0
+        self.failed = 0
+    
+    def page_done(self, generated: int, failed: bool = False) -> None:
+        with self._lock:
+            self.pages_done += 1
+            self.generated += generated
+            if failed:
+                self.failed += 1
+            self.version += 1
+    
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        with self._lock:
+            snapshot.update({
+                "pages_done": self.pages_done,
+                "generated": self.generated,
+                "failed": self.failed
+            })
+        return snapshot
+
+
+class TranscodeJob(BackgroundJob):
+    """Pré-processamento das páginas da biblioteca executado em segundo plano"""
+    
+    progress_class = TranscodeProgress
+
+
+class TranscodeJobManager(BackgroundJobManager):
+    """
+    Gera de antemão as versões redimensionadas (`image_width_buckets` x
+    `pretranscode_formats`, mais os perfis de `image_quality_tiers`) e as
+    miniaturas de todas as páginas do índice.
+    
+    - O trabalho pesado (Pillow) roda em um ProcessPoolExecutor com
+      prioridade baixa (`pretranscode_nice`); no máximo
+      `pretranscode_queue_size` páginas ficam na fila do pool
+    - Mangás são percorridos um por vez: as páginas de cada um são lidas do
+      shard em uma cópia descartada em seguida, sem ficar no índice
+    - Os arquivos vão para o mesmo cache em disco usado pelas requisições:
+      terminado o job, o leitor só recebe arquivos prontos
+    - Mangás concluídos são gravados em um checkpoint (com a impressão
+      digital dos capítulos e a configuração usada); um job reiniciado
+      pula esses mangás sem tocar no disco
+    - Um job por vez; o cancelamento é atendido antes da próxima página
+    """
+    
+    job_class = TranscodeJob
+    label = "Pré-processamento"
+    thread_name = "ohara-transcode"
+    
+    def __init__(self, index: LibraryIndex, executor_factory: Optional[Callable[..., Executor]] = None,
+                 max_finished: int = 20):
+        super().__init__(max_finished)
+        self.index = index
+        self.executor_factory = executor_factory or _process_pool
+        self.settings = get_settings()
+    
+    @property
+    def checkpoint_file(self) -> Path:
+        return Path(self.settings.cache_dir) / CHECKPOINT_FILE_NAME
+    
+    def _reuses(self, job: TranscodeJob, library_path: str) -> bool:
+        # Um job por vez, qualquer que seja a biblioteca
+        return True
+    
+    def config_signature(self) -> str:
+        """Parâmetros que definem os arquivos gerados (mudou: checkpoint descartado)"""
+        settings = self.settings
+        return json.dumps([
+            sorted(settings.image_width_buckets), sorted(settings.pretranscode_formats),
+            settings.image_derivative_quality, list(settings.thumbnail_size),
+            settings.thumbnail_quality, settings.cache_thumbnails, settings.image_quality_tiers,
+            settings.image_trim_borders, settings.image_encode_grayscale
+        ], sort_keys=True)
+    
+    @staticmethod
+    def manga_marker(manga: Manga) -> str:
+        """Impressão digital do mangá e de todos os capítulos"""
+        fingerprints = [manga.fingerprint] + [(chapter.path, chapter.fingerprint) for chapter in manga.chapters]
+        return hashlib.blake2b(json.dumps(fingerprints, sort_keys=True).encode('utf-8'), digest_size=12).hexdigest()
+    
+    def load_checkpoint(self, library_path: str) -> Dict[str, str]:
+        """Mangás já concluídos (id -> marcador) para esta biblioteca e configuração"""
+        try:
+            data = json.loads(self.checkpoint_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        
+        if data.get('library_path') != library_path or data.get('signature') != self.config_signature():
+            return {}
+        return dict(data.get('mangas') or {})
+    
+    def save_checkpoint(self, library_path: str, mangas: Dict[str, str]) -> None:
+        try:
+            self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.checkpoint_file, json.dumps({
+                'library_path': library_path,
+                'signature': self.config_signature(),
+                'updated_at': datetime.now().isoformat(),
+                'mangas': mangas
+            }))
+        except OSError as e:
+            logger.warning(f"Erro ao salvar checkpoint do pré-processamento: {e}")
+    
+    def _page_tasks(self, manga: Manga) -> List[Tuple[str, bool, Optional[bool]]]:
+        """(página, gerar miniatura?, tons de cinza) para cada página do mangá"""
+        thumbnails = set()
+        if self.settings.cache_thumbnails:
+            thumbnails = {chapter.pages[0].path for chapter in manga.chapters if chapter.pages}
+            if manga.thumbnail:
+                thumbnails.add(manga.thumbnail)
+        
+        tasks = [
+            (page.path, page.path in thumbnails, page.grayscale)
+            for chapter in manga.chapters for page in chapter.pages
+            if not page.path.lower().endswith('.gif')  # GIFs são sempre servidos originais
+        ]
+        listed = {path for path, _, _ in tasks}
+        tasks += [(path, True, None) for path in thumbnails if path not in listed]
+        return tasks
+    
+    def _execute(self, job: TranscodeJob) -> None:
+        completed = self.load_checkpoint(job.library_path)
+        try:
+            self._transcode_library(job, completed)
+        finally:
+            # Também ao cancelar ou falhar: um novo job retoma daqui
+            self.save_checkpoint(job.library_path, completed)
+        logger.info(f"Pré-processamento {job.id} concluído: {job.progress.generated} arquivos gerados")
+    
+    def _transcode_library(self, job: TranscodeJob, completed: Dict[str, str]) -> None:
+        settings = self.settings
+        variants = [(width, output_format, None) for width in sorted(settings.image_width_buckets)
+                    for output_format in settings.pretranscode_formats]
+        variants += [(tier.max_width, tier.output_format, tier.quality)
+                     for tier in quality_tiers(settings).values()]
+        cache_dir = str(Path(settings.cache_dir).resolve())
+        
+        library = self.index.get_library(job.library_path)
+        manga_ids = [manga.id for manga in library.mangas]
+        job.progress.set_discovered(len(manga_ids))
+        
+        # Futuros pendentes -> mangá; páginas restantes e marcador de cada mangá
+        pending: Dict[Future, str] = {}
+        outstanding: Dict[str, int] = {}
+        markers: Dict[str, Tuple[str, str]] = {}
+        last_save = time.monotonic()
+        
+        def collect(block: bool) -> None:
+            nonlocal last_save
+            if not pending:
+                return
+            done, _ = wait(list(pending), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                manga_id = pending.pop(future)
+                try:
+                    job.progress.page_done(future.result())
+                except Exception as e:
+                    logger.debug(f"Falha ao pré-processar página de {manga_id}: {e}")
+                    job.progress.page_done(0, failed=True)
+                
+                outstanding[manga_id] -= 1
+                if outstanding[manga_id] == 0:
+                    title, marker = markers.pop(manga_id)
+                    completed[manga_id] = marker
+                    job.progress.manga_done(title, from_cache=False)
+            
+            if time.monotonic() - last_save >= CHECKPOINT_INTERVAL_SECONDS:
+                self.save_checkpoint(job.library_path, completed)
+                last_save = time.monotonic()
+        
+        executor = self.executor_factory(max_workers=settings.pretranscode_workers,
+                                         initializer=_init_worker, initargs=(settings.pretranscode_nice,))
+        try:
+            for manga_id in manga_ids:
+                job.progress.check_cancelled()
+                manga = self.index.get_detached_manga(manga_id, job.library_path)
+                if manga is None:
+                    continue
+                
+                marker = self.manga_marker(manga)
+                if completed.get(manga.id) == marker:
+                    job.progress.manga_done(manga.title, from_cache=True)
+                    continue
+                completed.pop(manga.id, None)
+                
+                tasks = self._page_tasks(manga)
+                if not tasks:
+                    completed[manga.id] = marker
+                    job.progress.manga_done(manga.title, from_cache=False)
+                    continue
+                
+                outstanding[manga.id] = len(tasks)
+                markers[manga.id] = (manga.title, marker)
+                for path, thumbnail, grayscale in tasks:
+                    # Fila limitada: espera uma página terminar antes de enviar outra
+                    while len(pending) >= settings.pretranscode_queue_size:
+                        job.progress.check_cancelled()
+                        collect(block=True)
+                    future = executor.submit(transcode_page, cache_dir, path, variants, thumbnail, grayscale)
+                    pending[future] = manga.id
+                collect(block=False)
+            
+            while pending:
+                job.progress.check_cancelled()
+                collect(block=True)
+        finally:
+            # No cancelamento, páginas ainda na fila são descartadas
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Instância global compartilhada pelos routers
+transcode_jobs = TranscodeJobManager(library_index)
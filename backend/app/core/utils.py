@@ -1,11 +1,30 @@
 import logging
+import os
+import tempfile
+import threading
 import urllib.parse
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Dict, Iterator
 
 from app.core.library_state import library_state
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
 logger = logging.getLogger(__name__)
 
+# Locks por arquivo para serializar escritores na mesma instância
+_path_locks: Dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
 
 def create_image_url(file_path):
     """
@@ -59,4 +78,78 @@ def create_image_url(file_path):
         
     except Exception as e:
         logger.warning(f"Erro ao criar URL da imagem {file_path}: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+
+def atomic_write_text(file_path: Path, content: str, encoding: str = 'utf-8') -> None:
+    """
+    Escreve um arquivo de forma atômica (arquivo temporário + os.replace).
+    
+    Leitores nunca veem um arquivo parcialmente escrito e uma falha no meio
+    da escrita preserva a versão anterior.
+    
+    Args:
+        file_path: Caminho final do arquivo
+        content: Conteúdo a ser escrito
+        encoding: Codificação do texto
+    """
+    
+    atomic_write_bytes(file_path, content.encode(encoding))
+
+
+def atomic_write_bytes(file_path: Path, content: bytes) -> None:
+    """Versão binária de atomic_write_text (mesmas garantias)"""
+    
+    file_path = Path(file_path)
+    fd, temp_path = tempfile.mkstemp(dir=str(file_path.parent), prefix=f".{file_path.name}.", suffix=".tmp")
+    
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(content)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def locked_file(file_path: Path) -> Iterator[None]:
+    """
+    Lock exclusivo associado a um arquivo.
+    
+    Serializa escritores da mesma instância (threading.Lock) e de outros
+    processos/workers (flock no POSIX, msvcrt.locking no Windows) usando um
+    arquivo auxiliar "<arquivo>.lock".
+    
+    Args:
+        file_path: Arquivo protegido pelo lock
+    """
+    
+    file_path = Path(file_path)
+    key = str(file_path.resolve())
+    
+    with _path_locks_guard:
+        thread_lock = _path_locks.setdefault(key, threading.Lock())
+    
+    with thread_lock:
+        lock_path = file_path.with_name(file_path.name + '.lock')
+        with open(lock_path, 'a+b') as handle:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            elif msvcrt:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                elif msvcrt:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
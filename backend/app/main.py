@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,16 +10,41 @@ from app.api.endpoints.manga import router as manga_router
 from app.api.endpoints.cache import router as cache_router
 from app.api.endpoints.debug import router as debug_router
 from app.api.endpoints.image import router as image_router
+from app.api.endpoints.scan_jobs import router as scan_jobs_router
+from app.api.endpoints.transcode_jobs import router as transcode_jobs_router
+from app.core.config import get_settings
+from app.core.library_index import library_index
 from app.core.library_state import library_state
-from app.core.services.manga_scanner import MangaScanner
+from app.core.library_watcher import library_watcher
+from app.core.page_prober import page_prober
+from app.core.page_readahead import page_readahead
+from app.core.services.archive_reader import archive_reader
 from log_config import log_config
 
 logger = logging.getLogger(__name__)
 
-# Inicializar o MangaScanner e carregar configurações
-scanner = MangaScanner()
+# Carregar configurações (o scanner é compartilhado via índice da biblioteca)
+scanner = library_index.scanner
 library_state.load_from_file()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia o watcher (WATCH_LIBRARY), a sondagem (PROBE_PAGE_DIMENSIONS) e a leitura antecipada (READAHEAD_PAGES)"""
+    settings = get_settings()
+    if settings.watch_library:
+        library_watcher.start()
+    if settings.probe_page_dimensions:
+        page_prober.start()
+    if settings.readahead_pages > 0:
+        page_readahead.start()
+    yield
+    page_readahead.stop()
+    page_prober.stop()
+    library_watcher.stop()
+    archive_reader.close_all()
+
+
 # Configuração da aplicação FastAPI
 app = FastAPI(
     title="Ohara Manga Reader API",
@@ -50,6 +76,7 @@ app = FastAPI(
     3. Leia mangás específicos com `GET /api/manga/{manga_id}`
     """,
     version="2.0.0",
+    lifespan=lifespan,
     contact={
         "name": "Ohara Development Team",
         "url": "https://github.com/seu-usuario/ohara",
@@ -83,6 +110,8 @@ app.include_router(manga_router, prefix="", tags=["manga"])
 app.include_router(cache_router, prefix="", tags=["cache"])
 app.include_router(debug_router, prefix="", tags=["debug"])
 app.include_router(image_router, prefix="", tags=["assets"])
+app.include_router(scan_jobs_router, prefix="", tags=["library"])
+app.include_router(transcode_jobs_router, prefix="", tags=["cache"])
 
 
 @app.get("/", tags=["root"], summary="Informações da API")
@@ -104,6 +133,8 @@ async def root():
         "endpoints": {
             "library": "/api/library",
             "scan": "/api/scan-library", 
+            "scan_jobs": "/api/scan-jobs",
+            "transcode_jobs": "/api/transcode-jobs",
             "manga": "/api/manga/{manga_id}",
             "reader": "/api/manga/{manga_id}/chapters",
             "cache": "/api/cache/info",
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -9,6 +9,9 @@ class Page(BaseModel):
     size: Optional[int] = None
     width: Optional[int] = None
     height: Optional[int] = None
+    crc: Optional[int] = None  # CRC-32 do conteúdo (download do capítulo em ZIP)
+    crc_stamp: Optional[str] = None  # Inode e mtime do arquivo quando o CRC foi calculado
+    grayscale: Optional[bool] = None  # Sem cor, mesmo que salva como RGB (sondado)
 
 class Chapter(BaseModel):
     model_config = ConfigDict(
@@ -33,6 +36,7 @@ class Chapter(BaseModel):
     pages: List[Page] = Field(default_factory=list, description="Lista de páginas")
     page_count: int = Field(0, description="Número total de páginas")
     date_added: datetime = Field(default_factory=datetime.now)
+    fingerprint: Optional[Dict[str, Optional[int]]] = Field(None, description="Impressão digital do diretório (mtime_ns, inode, entradas)")
 
 class Manga(BaseModel):
     model_config = ConfigDict(
@@ -69,6 +73,9 @@ class Manga(BaseModel):
     # Timestamps
     date_added: datetime = Field(default_factory=datetime.now)
     date_modified: datetime = Field(default_factory=datetime.now)
+    
+    # Impressão digital do diretório para invalidação incremental do cache
+    fingerprint: Optional[Dict[str, Optional[int]]] = None
 
 class Library(BaseModel):
     mangas: List[Manga] = Field(default_factory=list)
@@ -0,0 +1,78 @@
+"""
+Benchmark do escaneamento com e sem cache.
+
+Cria uma biblioteca sintética e conta as chamadas de sistema de listagem
+(os.scandir) e de stat (os.stat) feitas por um escaneamento frio e por um
+escaneamento com cache válido. DirEntry.stat() não passa por os.stat, então
+o stat de cada capítulo no escaneamento frio não aparece na contagem.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_scan_cache.py --mangas 200 --chapters 30 --pages 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.services.manga_scanner import MangaScanner  # noqa: E402
+
+
+def build_library(root: Path, mangas: int, chapters: int, pages: int) -> None:
+    for m in range(mangas):
+        for c in range(1, chapters + 1):
+            chapter_dir = root / f"Manga {m:04d}" / f"Chapter {c}"
+            chapter_dir.mkdir(parents=True)
+            for p in range(1, pages + 1):
+                (chapter_dir / f"{p:03d}.jpg").touch()
+
+
+def measure(scanner: MangaScanner, library_path: str) -> dict:
+    counters = {"scandir": 0, "stat": 0}
+    real_scandir = os.scandir
+    real_stat = os.stat
+
+    def counting_scandir(*args, **kwargs):
+        counters["scandir"] += 1
+        return real_scandir(*args, **kwargs)
+
+    def counting_stat(*args, **kwargs):
+        counters["stat"] += 1
+        return real_stat(*args, **kwargs)
+
+    start = time.perf_counter()
+    with patch("os.scandir", counting_scandir), patch("os.stat", counting_stat):
+        library = scanner.scan_library(library_path)
+    counters["seconds"] = round(time.perf_counter() - start, 3)
+    counters["mangas"] = library.total_mangas
+    counters["chapters"] = library.total_chapters
+    counters["pages"] = library.total_pages
+    return counters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mangas", type=int, default=100)
+    parser.add_argument("--chapters", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        build_library(Path(temp_dir), args.mangas, args.chapters, args.pages)
+        scanner = MangaScanner()
+
+        cold = measure(scanner, temp_dir)
+        cached = measure(scanner, temp_dir)
+
+    print(f"{'':10} {'segundos':>10} {'scandir':>10} {'stat':>10}")
+    for label, result in (("frio", cold), ("cache", cached)):
+        print(f"{label:10} {result['seconds']:>10} {result['scandir']:>10} {result['stat']:>10}")
+    print(f"\n{cold['mangas']} mangás, {cold['chapters']} capítulos, {cold['pages']} páginas")
+
+
+if __name__ == "__main__":
+    main()
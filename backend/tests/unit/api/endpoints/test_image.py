@@ -0,0 +1,298 @@
+import tempfile
+import urllib.parse
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.library_index import LibraryIndex
+from app.main import app
+
+
+@pytest.fixture
+def temp_library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        chapter_dir = root / "Manga A" / "Chapter 1"
+        chapter_dir.mkdir(parents=True)
+        (chapter_dir / "01.jpg").write_bytes(b"fake image")
+        with patch('app.api.endpoints.image.library_state') as mock_state:
+            mock_state.current_path = str(root)
+            yield root
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _image_url(path: Path) -> str:
+    return f"/api/image?path={urllib.parse.quote(str(path), safe='')}"
+
+
+class TestServeImage:
+    def test_sends_validators_and_cache_control(self, client, temp_library):
+        response = client.get(_image_url(temp_library / "Manga A" / "Chapter 1" / "01.jpg"))
+
+        assert response.status_code == 200
+        assert response.content == b"fake image"
+        assert response.headers["etag"]
+        assert response.headers["last-modified"]
+        assert "max-age" in response.headers["cache-control"]
+
+    def test_revalidation_returns_304(self, client, temp_library):
+        url = _image_url(temp_library / "Manga A" / "Chapter 1" / "01.jpg")
+        first = client.get(url)
+
+        by_etag = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+        by_date = client.get(url, headers={"If-Modified-Since": first.headers["last-modified"]})
+
+        assert by_etag.status_code == 304
+        assert by_etag.content == b""
+        assert by_date.status_code == 304
+
+    def test_outside_library_is_404(self, client, temp_library):
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as outside:
+            response = client.get(_image_url(Path(outside.name)))
+
+        assert response.status_code == 404
+
+
+class TestServeImageById:
+    @pytest.fixture
+    def index(self, temp_library):
+        index = LibraryIndex()
+        index.get_library(str(temp_library))
+        with patch('app.api.endpoints.image.library_index', index):
+            yield index
+
+    def test_serves_page_by_id(self, client, temp_library, index):
+        page_id = index.page_id(str(temp_library / "Manga A" / "Chapter 1" / "01.jpg"))
+
+        response = client.get(f"/api/image/{page_id}")
+        revalidated = client.get(f"/api/image/{page_id}", headers={"If-None-Match": response.headers["etag"]})
+
+        assert response.status_code == 200
+        assert response.content == b"fake image"
+        assert revalidated.status_code == 304
+
+    def test_unknown_id_is_404(self, client, index):
+        assert client.get("/api/image/desconhecido").status_code == 404
+
+    def test_deleted_file_is_404(self, client, temp_library, index):
+        page_path = temp_library / "Manga A" / "Chapter 1" / "01.jpg"
+        page_id = index.page_id(str(page_path))
+        page_path.unlink()
+
+        assert client.get(f"/api/image/{page_id}").status_code == 404
+
+
+class TestServeThumbnail:
+    @pytest.fixture
+    def index(self, temp_library):
+        from PIL import Image
+
+        Image.new("RGB", (900, 1200), "blue").save(temp_library / "Manga A" / "Chapter 1" / "01.jpg")
+        index = LibraryIndex()
+        index.get_library(str(temp_library))
+        with patch('app.api.endpoints.image.library_index', index):
+            yield index
+
+    @pytest.fixture
+    def service(self, temp_library):
+        from app.core.services.image_service import ImageService
+
+        service = ImageService(cache_dir=str(temp_library / ".thumbs"))
+        with patch('app.api.endpoints.image.image_service', service):
+            yield service
+
+    def test_serves_cached_jpeg(self, client, temp_library, index, service):
+        page_id = index.page_id(str(temp_library / "Manga A" / "Chapter 1" / "01.jpg"))
+
+        response = client.get(f"/api/thumbnail/{page_id}")
+        revalidated = client.get(f"/api/thumbnail/{page_id}", headers={"If-None-Match": response.headers["etag"]})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert len(list((temp_library / ".thumbs").rglob("*.jpg"))) == 1
+        assert revalidated.status_code == 304
+
+    def test_unknown_id_is_404(self, client, index, service):
+        assert client.get("/api/thumbnail/desconhecido").status_code == 404
+
+
+class TestServeImageDerivatives:
+    @pytest.fixture
+    def page_id(self, temp_library):
+        from PIL import Image
+
+        from app.core.services.image_service import ImageService
+
+        page_path = temp_library / "Manga A" / "Chapter 1" / "01.jpg"
+        Image.new("RGB", (1200, 1800), "blue").save(page_path)
+        index = LibraryIndex()
+        index.get_library(str(temp_library))
+        service = ImageService(cache_dir=str(temp_library / ".derivatives"))
+        with patch('app.api.endpoints.image.library_index', index), \
+                patch('app.api.endpoints.image.image_service', service):
+            yield index.page_id(str(page_path))
+
+    @staticmethod
+    def _size(response):
+        import io
+
+        from PIL import Image
+
+        with Image.open(io.BytesIO(response.content)) as image:
+            return image.format, image.size
+
+    def test_width_param_snaps_to_bucket(self, client, page_id):
+        response = client.get(f"/api/image/{page_id}?w=600", headers={"Accept": "image/jpeg"})
+
+        assert response.status_code == 200
+        assert self._size(response) == ("JPEG", (720, 1080))
+        assert "Width" in response.headers["vary"]
+        assert response.headers["etag"]
+
+    def test_webp_when_accepted(self, client, page_id):
+        response = client.get(f"/api/image/{page_id}?w=480", headers={"Accept": "image/webp,image/*"})
+
+        assert response.headers["content-type"] == "image/webp"
+        assert self._size(response) == ("WEBP", (480, 720))
+
+    def test_client_hints(self, client, page_id):
+        response = client.get(
+            f"/api/image/{page_id}",
+            headers={"Accept": "image/jpeg", "Viewport-Width": "360", "DPR": "2"}
+        )
+
+        assert self._size(response) == ("JPEG", (720, 1080))
+
+    def test_width_above_buckets_serves_original(self, client, page_id):
+        response = client.get(f"/api/image/{page_id}?w=3000", headers={"Accept": "image/webp"})
+
+        assert self._size(response) == ("JPEG", (1200, 1800))
+
+    def test_derivative_revalidation(self, client, page_id):
+        first = client.get(f"/api/image/{page_id}?w=480")
+        second = client.get(f"/api/image/{page_id}?w=480", headers={"If-None-Match": first.headers["etag"]})
+
+        assert second.status_code == 304
+
+    def test_save_data_uses_low_tier(self, client, page_id):
+        response = client.get(f"/api/image/{page_id}", headers={"Accept": "image/webp", "Save-Data": "on"})
+
+        assert self._size(response) == ("WEBP", (720, 1080))
+        assert "Save-Data" in response.headers["vary"]
+
+    def test_quality_tier_caps_requested_width(self, client, page_id):
+        response = client.get(f"/api/image/{page_id}?w=1440&quality=medium", headers={"Accept": "image/jpeg"})
+
+        assert self._size(response) == ("JPEG", (1080, 1620))
+
+    def test_quality_original_overrides_save_data(self, client, page_id):
+        response = client.get(f"/api/image/{page_id}?quality=original", headers={"Save-Data": "on"})
+
+        assert self._size(response) == ("JPEG", (1200, 1800))
+
+    def test_unknown_quality_is_400(self, client, page_id):
+        assert client.get(f"/api/image/{page_id}?quality=ultra").status_code == 400
+
+
+class TestServeImageRanges:
+    @pytest.fixture
+    def page(self, temp_library):
+        page_path = temp_library / "Manga A" / "Chapter 1" / "01.jpg"
+        page_path.write_bytes(bytes(range(100)))
+        index = LibraryIndex()
+        index.get_library(str(temp_library))
+        with patch('app.api.endpoints.image.library_index', index):
+            yield f"/api/image/{index.page_id(str(page_path))}"
+
+    def test_single_range(self, client, page):
+        response = client.get(page, headers={"Range": "bytes=10-19"})
+
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 10-19/100"
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.content == bytes(range(10, 20))
+
+    def test_multiple_ranges(self, client, page):
+        response = client.get(page, headers={"Range": "bytes=0-1,-2"})
+
+        assert response.status_code == 206
+        content_type = response.headers["content-type"]
+        assert content_type.startswith("multipart/byteranges; boundary=")
+        boundary = content_type.split("boundary=")[1]
+        assert int(response.headers["content-length"]) == len(response.content)
+
+        parts = response.content.split(f"--{boundary}".encode())
+        assert parts[-1] == b"--\r\n"
+        assert b"Content-Range: bytes 0-1/100\r\n\r\n" + bytes([0, 1]) in parts[1]
+        assert b"Content-Range: bytes 98-99/100\r\n\r\n" + bytes([98, 99]) in parts[2]
+
+    def test_unsatisfiable_range(self, client, page):
+        response = client.get(page, headers={"Range": "bytes=500-"})
+
+        assert response.status_code == 416
+
+    def test_hot_image_served_from_memory(self, client, page, temp_library):
+        from app.core.hot_image_cache import HotImageCache
+
+        cache = HotImageCache(max_bytes=1024, max_item_bytes=1024)
+        with patch('app.core.http_cache.hot_images', cache):
+            client.get(page)
+            client.get(page)
+            assert cache.get_stats()["entries"] == 1
+
+            with patch('anyio.open_file', side_effect=AssertionError("arquivo aberto")):
+                response = client.get(page)
+                partial = client.get(page, headers={"Range": "bytes=0-4"})
+
+        assert response.content == bytes(range(100))
+        assert partial.content == bytes(range(5))
+
+
+class TestServeArchivePages:
+    @pytest.fixture
+    def pages(self, temp_library):
+        import zipfile
+
+        archive = temp_library / "Manga A" / "Chapter 2.cbz"
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr("01.jpg", bytes(range(100)), compress_type=zipfile.ZIP_STORED)
+            zip_file.writestr("02.jpg", b"deflated page" * 50, compress_type=zipfile.ZIP_DEFLATED)
+        index = LibraryIndex()
+        index.get_library(str(temp_library))
+        with patch('app.api.endpoints.image.library_index', index):
+            yield {
+                name: f"/api/image/{index.page_id(str(archive / name))}"
+                for name in ("01.jpg", "02.jpg")
+            }
+
+    def test_stored_member_is_served_from_the_archive(self, client, pages):
+        response = client.get(pages["01.jpg"])
+        partial = client.get(pages["01.jpg"], headers={"Range": "bytes=10-19"})
+        revalidated = client.get(pages["01.jpg"], headers={"If-None-Match": response.headers["etag"]})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.content == bytes(range(100))
+        assert partial.status_code == 206
+        assert partial.headers["content-range"] == "bytes 10-19/100"
+        assert partial.content == bytes(range(10, 20))
+        assert revalidated.status_code == 304
+
+    def test_deflated_member_is_decompressed(self, client, pages):
+        response = client.get(pages["02.jpg"])
+        partial = client.get(pages["02.jpg"], headers={"Range": "bytes=0-7"})
+
+        assert response.status_code == 200
+        assert response.content == b"deflated page" * 50
+        assert partial.content == b"deflated"
+
+    def test_removed_archive_is_404(self, client, temp_library, pages):
+        (temp_library / "Manga A" / "Chapter 2.cbz").unlink()
+
+        assert client.get(pages["01.jpg"]).status_code == 404
@@ -0,0 +1,63 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.library_index import LibraryIndex
+from app.main import app
+
+
+@pytest.fixture
+def temp_library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for manga_name in ("Manga A", "Manga B"):
+            chapter_dir = root / manga_name / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            (chapter_dir / "01.jpg").write_text("fake image")
+            (chapter_dir / "02.jpg").write_text("fake image")
+        yield root
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def configured(temp_library):
+    with patch('app.api.endpoints.library.library_state') as mock_state, \
+            patch('app.api.endpoints.library.library_index', LibraryIndex()) as index:
+        mock_state.current_path = str(temp_library)
+        mock_state.validate_current_path.return_value = True
+        yield index
+
+
+class TestLibraryStream:
+    def test_stream__one_manga_per_line(self, client, configured):
+        response = client.get("/api/library/stream")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["type"] for line in lines] == ["manga", "manga", "summary"]
+        assert lines[0]["manga"]["title"] == "Manga A"
+        assert lines[-1]["total_mangas"] == 2
+        assert lines[-1]["total_pages"] == 4
+
+    def test_stream__error_line_on_failure(self, client, configured):
+        with patch.object(configured, 'iter_library', side_effect=RuntimeError("falhou")):
+            response = client.get("/api/library/stream")
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [{"type": "error", "detail": "Erro ao carregar biblioteca: falhou"}]
+
+    def test_stream__no_library_configured(self, client):
+        with patch('app.api.endpoints.library.library_state') as mock_state:
+            mock_state.current_path = None
+            response = client.get("/api/library/stream")
+
+        assert response.status_code == 400
@@ -5,7 +5,7 @@ from unittest.mock import patch
 import pytest
 from fastapi import HTTPException
 
-from app.api.endpoints.reader import chapter_to_dict
+from app.api.endpoints.reader import chapter_layout, chapter_tier_sizes, chapter_to_dict
 from app.models.manga import Page, Chapter, Manga
 
 @pytest.fixture
@@ -80,7 +80,7 @@ class TestChapterToDict:
         assert result["name"] == chapter.name
         assert result["number"] == chapter.number
         assert result["volume"] == chapter.volume
-        assert result["path"] == chapter.path
+        assert "path" not in result
         assert result["page_count"] == chapter.page_count
 
         assert "date_added" in result
@@ -93,13 +93,13 @@ class TestChapterToDict:
         result = chapter_to_dict(chapter)
 
         first_page = result["pages"][0]
-        expected_keys = ["filename", "path", "size", "width", "height"]
+        expected_keys = ["id", "filename", "url", "size", "width", "height"]
 
         for key in expected_keys:
             assert key in first_page
 
+        assert "path" not in first_page
         assert first_page["filename"] == chapter.pages[0].filename
-        assert first_page["path"] == chapter.pages[0].path
         assert first_page["size"] == chapter.pages[0].size
 
     def test_minimal_data(self):
@@ -152,6 +152,72 @@ class TestChapterToDict:
         assert isinstance(parsed_date, datetime)
 
 
+class TestChapterTierSizes:
+    def test_original_is_sum_of_page_sizes(self, chapter):
+        sizes = chapter_tier_sizes(chapter)
+
+        assert sizes["tiers"]["original"]["bytes"] == 1500000
+        assert sizes["probed_pages"] == 0
+
+    def test_tiers_use_probed_dimensions(self, chapter):
+        for page in chapter.pages:
+            page.width, page.height = 1600, 2400
+
+        sizes = chapter_tier_sizes(chapter)["tiers"]
+
+        assert sizes["low"]["bytes"] < sizes["medium"]["bytes"] < sizes["original"]["bytes"]
+        assert sizes["low"]["format"] == "webp"
+
+
+class TestChapterLayout:
+    def test_unprobed_pages_are_not_classified(self, chapter):
+        layout = chapter_layout(chapter)
+
+        assert layout["classified_pages"] == 0
+        assert layout["suggested_mode"] == "single"
+
+    def test_spreads_are_reported_by_index(self, chapter):
+        for page, size in zip(chapter.pages, [(800, 1200), (1600, 1200), (800, 1200)]):
+            page.width, page.height = size
+
+        layout = chapter_layout(chapter)
+
+        assert layout["counts"] == {"single": 2, "spread": 1, "strip": 0}
+        assert layout["spread_indexes"] == [1]
+        assert chapter_to_dict(chapter)["pages"][1]["layout"] == "spread"
+
+    def test_webtoon_strips_suggest_vertical_mode(self, chapter):
+        for page in chapter.pages:
+            page.width, page.height = 800, 12000
+
+        assert chapter_layout(chapter)["suggested_mode"] == "vertical"
+
+    def test_get_chapter_leaves_probing_to_background(self, tmp_path):
+        from fastapi.testclient import TestClient
+        from PIL import Image
+
+        from app.core.library_index import LibraryIndex
+        from app.main import app
+
+        chapter_dir = tmp_path / "Test Manga" / "Chapter 1"
+        chapter_dir.mkdir(parents=True)
+        Image.new("RGB", (800, 1200)).save(chapter_dir / "01.jpg")
+        Image.new("RGB", (1600, 1200)).save(chapter_dir / "02.jpg")
+        index = LibraryIndex()
+
+        with patch('app.api.endpoints.reader.library_state') as mock_state, \
+                patch('app.api.endpoints.reader.library_index', index), \
+                patch('app.api.endpoints.reader.page_prober') as prober:
+            mock_state.current_path = str(tmp_path)
+            response = TestClient(app).get("/api/manga/test-manga/chapter/1")
+
+        assert response.status_code == 200
+        # Nada é sondado na requisição: o capítulo aberto vai para o prober
+        assert [page["layout"] for page in response.json()["chapter"]["pages"]] == [None, None]
+        manga, library_path, chapter = prober.enqueue.call_args.args
+        assert chapter.path == str(chapter_dir)
+
+
 class TestEndpoint:
     @pytest.mark.asyncio
     async def test_get_chapter_no_library_configured(self, mock_library_state):
@@ -330,4 +396,156 @@ class TestErrorHandling:
 
     def test_invalid_input(self):
         with pytest.raises(AttributeError):
-            chapter_to_dict(None)
\ No newline at end of file
+            chapter_to_dict(None)
+
+class TestDownloadChapter:
+    @pytest.fixture
+    def library(self, tmp_path):
+        import zipfile as zipfile_module
+
+        from app.core.library_index import LibraryIndex
+
+        chapter_dir = tmp_path / "Test Manga" / "Chapter 1"
+        chapter_dir.mkdir(parents=True)
+        (chapter_dir / "01.jpg").write_bytes(b"page one" * 100)
+        (chapter_dir / "02.jpg").write_bytes(b"page two")
+        with zipfile_module.ZipFile(tmp_path / "Test Manga" / "Chapter 2.cbz", "w") as zip_file:
+            zip_file.writestr("01.jpg", b"archived page")
+
+        index = LibraryIndex()
+        with patch('app.api.endpoints.reader.library_state') as mock_state, \
+                patch('app.api.endpoints.reader.library_index', index):
+            mock_state.current_path = str(tmp_path)
+            yield index
+
+    @pytest.fixture
+    def client(self):
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        return TestClient(app)
+
+    def test_streams_chapter_as_stored_zip(self, client, library, tmp_path):
+        import io
+        import zipfile as zipfile_module
+
+        response = client.get("/api/manga/test-manga/chapter/1/download")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert int(response.headers["content-length"]) == len(response.content)
+        assert "Test Manga - Chapter 1.cbz" in response.headers["content-disposition"]
+        with zipfile_module.ZipFile(io.BytesIO(response.content)) as zip_file:
+            assert zip_file.testzip() is None
+            assert zip_file.read("02.jpg") == b"page two"
+
+        pages = next(ch for ch in library.get_manga("test-manga", str(tmp_path)).chapters if ch.number == 1).pages
+        assert all(page.crc is not None for page in pages)
+
+    def test_resumes_with_range(self, client, library):
+        full = client.get("/api/manga/test-manga/chapter/1/download")
+
+        partial = client.get("/api/manga/test-manga/chapter/1/download", headers={
+            "Range": "bytes=100-", "If-Range": full.headers["etag"]
+        })
+        revalidated = client.get("/api/manga/test-manga/chapter/1/download",
+                                 headers={"If-None-Match": full.headers["etag"]})
+
+        assert partial.status_code == 206
+        assert partial.content == full.content[100:]
+        assert revalidated.status_code == 304
+
+    def test_revalidates_by_page_contents(self, client, library, tmp_path):
+        full = client.get("/api/manga/test-manga/chapter/1/download")
+        # Página regravada no lugar: o mtime do diretório não muda
+        (tmp_path / "Test Manga" / "Chapter 1" / "02.jpg").write_bytes(b"page two, fixed")
+
+        revalidated = client.get("/api/manga/test-manga/chapter/1/download", headers={
+            "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"
+        })
+
+        assert full.headers["cache-control"] == "no-cache"
+        assert "last-modified" not in full.headers
+        assert revalidated.status_code == 200
+        assert revalidated.headers["etag"] != full.headers["etag"]
+
+    def test_archive_chapter_is_sent_as_is(self, client, library, tmp_path):
+        response = client.get("/api/manga/test-manga/chapter/2/download")
+
+        assert response.status_code == 200
+        assert response.content == (tmp_path / "Test Manga" / "Chapter 2.cbz").read_bytes()
+
+    def test_unknown_chapter_is_404(self, client, library):
+        assert client.get("/api/manga/test-manga/chapter/99/download").status_code == 404
+
+
+class TestChapterPagesBatch:
+    @pytest.fixture
+    def library(self, tmp_path):
+        from app.core.library_index import LibraryIndex
+
+        chapter_dir = tmp_path / "Test Manga" / "Chapter 1"
+        chapter_dir.mkdir(parents=True)
+        for number in range(1, 5):
+            (chapter_dir / f"{number:02d}.jpg").write_bytes(f"page {number}".encode() * number)
+
+        index = LibraryIndex()
+        with patch('app.api.endpoints.reader.library_state') as mock_state, \
+                patch('app.api.endpoints.reader.library_index', index):
+            mock_state.current_path = str(tmp_path)
+            yield index
+
+    @pytest.fixture
+    def client(self):
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        return TestClient(app)
+
+    @staticmethod
+    def _parts(response):
+        boundary = response.headers["content-type"].split("boundary=")[1].encode()
+        parts = []
+        for chunk in response.content.split(b"--" + boundary)[1:-1]:
+            head, _, body = chunk.partition(b"\r\n\r\n")
+            headers = dict(line.split(": ", 1) for line in head.decode().strip().split("\r\n"))
+            parts.append((headers, body[:int(headers["Content-Length"])]))
+        return parts
+
+    def test_returns_requested_window(self, client, library):
+        response = client.get("/api/manga/test-manga/chapter/1/pages?start=1&count=2")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("multipart/mixed; boundary=")
+        assert response.content.endswith(b"--\r\n")
+        parts = self._parts(response)
+        assert [headers["X-Page-Number"] for headers, _ in parts] == ["2", "3"]
+        assert [body for _, body in parts] == [b"page 2" * 2, b"page 3" * 3]
+        assert all(headers["Content-Type"] == "image/jpeg" for headers, _ in parts)
+        assert parts[0][0]["Content-Location"].startswith("/api/image/")
+
+    def test_window_is_clamped_to_chapter(self, client, library):
+        response = client.get("/api/manga/test-manga/chapter/1/pages?start=3&count=10")
+
+        assert len(self._parts(response)) == 1
+
+    def test_unreadable_page_is_skipped(self, client, library):
+        from app.api.endpoints.image import open_page_variant
+
+        def fail_first(request, path, *args):
+            if path.endswith("01.jpg"):
+                raise FileNotFoundError(path)
+            return open_page_variant(request, path, *args)
+
+        with patch('app.api.endpoints.reader.open_page_variant', side_effect=fail_first):
+            response = client.get("/api/manga/test-manga/chapter/1/pages?start=0&count=2")
+
+        assert [headers["X-Page-Number"] for headers, _ in self._parts(response)] == ["2"]
+
+    def test_empty_window_is_404(self, client, library):
+        assert client.get("/api/manga/test-manga/chapter/1/pages?start=50").status_code == 404
+
+    def test_count_is_limited(self, client, library):
+        assert client.get("/api/manga/test-manga/chapter/1/pages?count=1000").status_code == 422
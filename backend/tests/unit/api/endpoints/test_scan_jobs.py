@@ -0,0 +1,83 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.library_index import LibraryIndex
+from app.core.scan_jobs import ScanJobManager
+from app.main import app
+
+
+@pytest.fixture
+def temp_library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for manga_name in ("Manga A", "Manga B"):
+            chapter_dir = root / manga_name / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            (chapter_dir / "01.jpg").write_text("fake image")
+        yield root
+
+
+@pytest.fixture
+def manager():
+    manager = ScanJobManager(LibraryIndex())
+    with patch('app.api.endpoints.scan_jobs.scan_jobs', manager), \
+            patch('app.core.scan_jobs.library_state'):
+        yield manager
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestScanJobsEndpoints:
+    def test_start_job__returns_immediately(self, client, manager, temp_library):
+        response = client.post("/api/scan-jobs", data={"library_path": str(temp_library)})
+
+        assert response.status_code == 202
+        job = response.json()["job"]
+        assert job["status"] in ("pending", "running", "completed")
+        assert response.json()["events_url"] == f"/api/scan-jobs/{job['id']}/events"
+        assert manager.get(job["id"]).wait(5)
+
+    def test_start_job__invalid_path(self, client, manager):
+        response = client.post("/api/scan-jobs", data={"library_path": "/caminho/inexistente"})
+
+        assert response.status_code == 400
+
+    def test_get_job__not_found(self, client, manager):
+        assert client.get("/api/scan-jobs/inexistente").status_code == 404
+
+    def test_events__stream_progress_until_done(self, client, manager, temp_library):
+        job = manager.start(str(temp_library))
+
+        response = client.get(f"/api/scan-jobs/{job.id}/events")
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _parse_events(response.text)
+        assert events[-1][0] == "done"
+        assert events[-1][1]["status"] == "completed"
+        assert events[-1][1]["result"]["total_mangas"] == 2
+
+    def test_cancel_finished_job(self, client, manager, temp_library):
+        job = manager.start(str(temp_library))
+        job.wait(5)
+
+        response = client.delete(f"/api/scan-jobs/{job.id}")
+
+        assert response.status_code == 200
+        assert response.json()["message"] == "Job já finalizado"
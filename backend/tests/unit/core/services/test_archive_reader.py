@@ -0,0 +1,130 @@
+import io
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from app.core.services.archive_reader import ArchiveReader, split_archive_path
+
+
+def _is_image(name):
+    return name.lower().endswith(('.jpg', '.png'))
+
+
+@pytest.fixture
+def archive():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "Vol 1.cbz"
+        with zipfile.ZipFile(path, "w") as zip_file:
+            zip_file.writestr("02.jpg", b"page two", compress_type=zipfile.ZIP_STORED)
+            zip_file.writestr("01.jpg", b"page one" * 100, compress_type=zipfile.ZIP_DEFLATED)
+            zip_file.writestr("extras/03.png", b"page three")
+            zip_file.writestr("__MACOSX/._01.jpg", b"resource fork")
+            zip_file.writestr(".hidden.jpg", b"hidden")
+            zip_file.writestr("info.txt", b"not an image")
+        yield path
+
+
+class TestSplitArchivePath:
+    def test_splits_member_from_archive(self, archive):
+        path = os.path.join(str(archive), "pasta", "01.jpg")
+
+        assert split_archive_path(path) == (str(archive), "pasta/01.jpg")
+
+    def test_regular_path_is_none(self):
+        assert split_archive_path(os.path.join("biblioteca", "Manga", "Chapter 1", "01.jpg")) is None
+
+    def test_directories_named_like_archives_are_not_split(self, archive):
+        # Biblioteca em "lib.zip" e volume extraído em "Vol 1.cbz"
+        chapter_dir = archive.parent / "lib.zip" / "Manga" / "Vol 2.cbz"
+        chapter_dir.mkdir(parents=True)
+        nested = archive.parent / "lib.zip" / "Manga" / "Vol 3.cbz"
+        nested.write_bytes(archive.read_bytes())
+
+        assert split_archive_path(str(chapter_dir / "001.jpg")) is None
+        assert ArchiveReader().get_member(str(chapter_dir / "001.jpg")) is None
+        assert split_archive_path(str(nested / "01.jpg")) == (str(nested), "01.jpg")
+
+
+class TestArchiveReader:
+    def test_lists_images_from_central_directory(self, archive):
+        reader = ArchiveReader()
+
+        assert reader.list_images(str(archive), _is_image) == ["01.jpg", "02.jpg", "extras/03.png"]
+
+    def test_invalid_archive_lists_nothing(self, archive):
+        archive.write_bytes(b"not a zip")
+
+        assert ArchiveReader().list_images(str(archive), _is_image) == []
+
+    def test_stored_member_is_a_slice_of_the_archive(self, archive):
+        member = ArchiveReader().get_member(os.path.join(str(archive), "02.jpg"))
+
+        assert member.is_stored
+        with open(archive, "rb") as handle:
+            handle.seek(member.data_offset)
+            assert handle.read(member.file_size) == b"page two"
+
+    def test_deflated_member_is_decompressed(self, archive):
+        reader = ArchiveReader()
+        member = reader.get_member(os.path.join(str(archive), "01.jpg"))
+
+        assert not member.is_stored
+        assert member.read() == b"page one" * 100
+        with reader.open_page(os.path.join(str(archive), "01.jpg")) as page:
+            assert isinstance(page, io.BytesIO)
+            assert page.read(8) == b"page one"
+
+    def test_missing_member_raises(self, archive):
+        with pytest.raises(FileNotFoundError):
+            ArchiveReader().get_member(os.path.join(str(archive), "99.jpg"))
+
+    def test_regular_file_is_not_a_member(self, archive):
+        reader = ArchiveReader()
+
+        assert reader.get_member(str(archive.parent / "01.jpg")) is None
+
+    def test_reopens_changed_archive(self, archive):
+        reader = ArchiveReader()
+        first = reader.get_member(os.path.join(str(archive), "02.jpg"))
+
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr("02.jpg", b"updated page", compress_type=zipfile.ZIP_STORED)
+        stat = archive.stat()
+        os.utime(archive, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        second = reader.get_member(os.path.join(str(archive), "02.jpg"))
+
+        assert second.read() == b"updated page"
+        assert second.etag != first.etag
+
+    def test_open_archives_are_bounded(self, archive):
+        reader = ArchiveReader(max_open=1)
+        copy = archive.with_name("Vol 2.cbz")
+        copy.write_bytes(archive.read_bytes())
+
+        reader.list_images(str(archive), _is_image)
+        reader.list_images(str(copy), _is_image)
+
+        assert list(reader._open) == [str(copy)]
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason="requer fork")
+    def test_forked_child_drops_inherited_handles(self, archive):
+        from app.core.services.archive_reader import archive_reader
+
+        archive_reader.list_images(str(archive), _is_image)
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            os.write(write_end, str(len(archive_reader._open)).encode())
+            os._exit(0)
+
+        os.close(write_end)
+        child_open = os.read(read_end, 16)
+        os.close(read_end)
+        os.waitpid(pid, 0)
+        archive_reader.close_all()
+
+        assert child_open == b"0"
@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.core.services import border_trim
+from app.core.services.border_trim import crop_to_box, detect_content_box
+
+
+def _page(size=(1000, 1500), margin="white", content=(100, 150, 900, 1350), fill="black"):
+    image = Image.new("RGB", size, margin)
+    ImageDraw.Draw(image).rectangle(content, fill=fill)
+    return image
+
+
+@pytest.fixture(params=["pillow", "numpy"])
+def backend(request):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield
+    else:
+        with patch.object(border_trim, "np", None):
+            yield
+
+
+class TestDetectContentBox:
+    def test_white_margins(self, backend):
+        box = detect_content_box(_page())
+
+        assert box == pytest.approx((0.1, 0.1, 0.9, 0.9), abs=0.01)
+
+    def test_black_margins(self, backend):
+        box = detect_content_box(_page(margin="black", content=(0, 300, 999, 1200), fill="white"))
+
+        assert box == pytest.approx((0.0, 0.2, 1.0, 0.8), abs=0.01)
+
+    def test_ignores_specks_in_margin(self, backend):
+        image = _page()
+        ImageDraw.Draw(image).point([(20, 20), (980, 1480)], fill="black")
+
+        assert detect_content_box(image) == pytest.approx((0.1, 0.1, 0.9, 0.9), abs=0.01)
+
+    def test_full_bleed_page_is_not_trimmed(self, backend):
+        assert detect_content_box(_page(content=(0, 0, 999, 1499))) is None
+
+    def test_mixed_border_is_not_trimmed(self, backend):
+        assert detect_content_box(_page(margin="gray")) is None
+
+    def test_nearly_blank_page_is_not_trimmed(self, backend):
+        assert detect_content_box(_page(content=(480, 700, 520, 760))) is None
+
+
+class TestCropToBox:
+    def test_box_is_relative_to_current_size(self):
+        cropped = crop_to_box(Image.new("RGB", (500, 750)), (0.1, 0.1, 0.9, 0.9))
+
+        assert cropped.size == (400, 600)
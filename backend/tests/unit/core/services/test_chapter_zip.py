@@ -0,0 +1,98 @@
+import io
+import os
+import tempfile
+import zipfile
+import zlib
+from pathlib import Path
+
+import pytest
+
+from app.core.services.chapter_zip import StoredZip, chapter_entries, crc_stamp
+from app.models.manga import Page
+
+
+@pytest.fixture
+def pages():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        chapter_dir = Path(temp_dir)
+        contents = {"01.jpg": b"first page" * 1000, "02.jpg": b"second", "Página 03.png": b"third"}
+        for name, content in contents.items():
+            (chapter_dir / name).write_bytes(content)
+        yield [Page(filename=name, path=str(chapter_dir / name)) for name in contents], contents
+
+
+class TestChapterEntries:
+    def test_computes_missing_crcs(self, pages):
+        page_list, contents = pages
+
+        entries, computed = chapter_entries(page_list)
+
+        assert [entry.crc for entry in entries] == [zlib.crc32(content) for content in contents.values()]
+        assert computed[page_list[1].path][:2] == (6, zlib.crc32(b"second"))
+
+    def test_reuses_known_crc_when_file_is_unchanged(self, pages):
+        page_list, _ = pages
+        page_list[1].size, page_list[1].crc = 6, 1234
+        page_list[1].crc_stamp = crc_stamp(os.stat(page_list[1].path))
+        page_list[2].size, page_list[2].crc = 999, 1234  # Tamanho mudou: recalcula
+        page_list[2].crc_stamp = crc_stamp(os.stat(page_list[2].path))
+
+        entries, computed = chapter_entries(page_list)
+
+        assert entries[1].crc == 1234
+        assert page_list[1].path not in computed
+        assert entries[2].crc == zlib.crc32(b"third")
+
+    def test_same_size_overwrite_recomputes_crc(self, pages):
+        page_list, _ = pages
+        _, computed = chapter_entries(page_list)
+        page = page_list[1]
+        page.size, page.crc, page.crc_stamp = computed[page.path]
+
+        with open(page.path, "wb") as handle:
+            handle.write(b"SECOND")
+        stat = os.stat(page.path)
+        os.utime(page.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        entries, computed = chapter_entries(page_list)
+
+        assert entries[1].crc == zlib.crc32(b"SECOND")
+        assert computed[page.path][:2] == (6, zlib.crc32(b"SECOND"))
+
+
+class TestStoredZip:
+    def test_is_a_valid_stored_zip(self, pages):
+        page_list, contents = pages
+        archive = StoredZip(chapter_entries(page_list)[0])
+
+        data = b"".join(archive.iter_bytes())
+
+        assert len(data) == archive.size
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+            assert zip_file.testzip() is None
+            assert zip_file.namelist() == list(contents)
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in zip_file.infolist())
+            assert zip_file.read("Página 03.png") == b"third"
+
+    def test_ranges_match_the_full_stream(self, pages):
+        archive = StoredZip(chapter_entries(pages[0])[0])
+        full = b"".join(archive.iter_bytes())
+
+        for start, end in [(0, 0), (5, 40), (30, 10100), (archive.size - 22, archive.size - 1)]:
+            assert b"".join(archive.iter_bytes(start, end)) == full[start:end + 1]
+
+    def test_etag_changes_with_content(self, pages):
+        page_list, _ = pages
+        entries = chapter_entries(page_list)[0]
+        before = StoredZip(entries).etag
+
+        entries[0].crc += 1
+
+        assert StoredZip(entries).etag != before
+
+    def test_shrunk_page_raises(self, pages):
+        page_list, _ = pages
+        archive = StoredZip(chapter_entries(page_list)[0])
+        Path(page_list[0].path).write_bytes(b"short")
+
+        with pytest.raises(OSError):
+            b"".join(archive.iter_bytes())
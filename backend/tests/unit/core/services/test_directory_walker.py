@@ -0,0 +1,135 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.config import SUPPORTED_IMAGE_EXTENSIONS
+from app.core.services.directory_walker import DirectoryWalker
+
+
+class TestDirectoryWalker:
+    """Testes para DirectoryWalker"""
+
+    def setup_method(self):
+        self.walker = DirectoryWalker(SUPPORTED_IMAGE_EXTENSIONS)
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.manga_dir = self.temp_dir / "Manga"
+        self.manga_dir.mkdir()
+
+    def teardown_method(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _create_chapter(self, name, pages):
+        chapter_dir = self.manga_dir / name
+        chapter_dir.mkdir()
+        for page in pages:
+            (chapter_dir / page).write_text("fake image")
+        return chapter_dir
+
+    def test_list_directory(self):
+        """Deve separar subdiretórios e imagens ordenadas"""
+        (self.manga_dir / "b.png").write_text("fake")
+        (self.manga_dir / "a.JPG").write_text("fake")
+        (self.manga_dir / "notes.txt").write_text("fake")
+        (self.manga_dir / "Chapter 1").mkdir()
+
+        subdirs, images = self.walker.list_directory(self.manga_dir)
+
+        assert [entry.name for entry in subdirs] == ["Chapter 1"]
+        assert images == ["a.JPG", "b.png"]
+
+    def test_list_directory_nonexistent(self):
+        """Deve retornar listas vazias para diretório inexistente"""
+        subdirs, images = self.walker.list_directory(self.temp_dir / "nao-existe")
+
+        assert subdirs == []
+        assert images == []
+
+    def test_walk_manga(self):
+        """Deve listar capítulos com imagens e ignorar os vazios"""
+        self._create_chapter("Chapter 2", ["02.jpg", "01.jpg"])
+        self._create_chapter("Chapter 1", ["01.png"])
+        (self.manga_dir / "Extras").mkdir()
+
+        listing = self.walker.walk_manga(self.manga_dir)
+
+        assert [chapter.name for chapter in listing.chapters] == ["Chapter 1", "Chapter 2"]
+        assert listing.chapters[1].images == ["01.jpg", "02.jpg"]
+
+    def test_walk_manga_with_archive_chapters(self):
+        """Arquivos CBZ viram capítulos quando há um ArchiveReader"""
+        import zipfile
+
+        from app.core.services.archive_reader import ArchiveReader
+
+        self._create_chapter("Chapter 1", ["01.jpg"])
+        with zipfile.ZipFile(self.manga_dir / "Chapter 2.cbz", "w") as zip_file:
+            zip_file.writestr("02.jpg", b"fake image")
+            zip_file.writestr("01.jpg", b"fake image")
+
+        plain = self.walker.walk_manga(self.manga_dir)
+        listing = DirectoryWalker(SUPPORTED_IMAGE_EXTENSIONS, ArchiveReader()).walk_manga(self.manga_dir)
+
+        assert [chapter.name for chapter in plain.chapters] == ["Chapter 1"]
+        archive_chapter = listing.chapters[1]
+        assert archive_chapter.archive
+        assert archive_chapter.title == "Chapter 2"
+        assert archive_chapter.images == ["01.jpg", "02.jpg"]
+        assert archive_chapter.fingerprint["entries"] == 2
+
+    def test_walk_manga_lists_each_directory_once(self):
+        """Cada diretório deve ser listado exatamente uma vez"""
+        self._create_chapter("Chapter 1", ["01.jpg", "02.jpg"])
+        self._create_chapter("Chapter 2", ["01.jpg"])
+        (self.manga_dir / "cover.jpg").write_text("fake")
+
+        with patch('app.core.services.directory_walker.os.scandir', wraps=os.scandir) as spy:
+            self.walker.walk_manga(self.manga_dir)
+
+        listed = sorted(Path(call.args[0]).name for call in spy.call_args_list)
+        assert listed == ["Chapter 1", "Chapter 2", "Manga"]
+
+    def test_cover_named_file_has_priority(self):
+        """Deve preferir arquivo de capa nomeado na raiz"""
+        self._create_chapter("Chapter 1", ["01.jpg"])
+        (self.manga_dir / "000.jpg").write_text("fake")
+        (self.manga_dir / "Capa.png").write_text("fake")
+
+        listing = self.walker.walk_manga(self.manga_dir)
+
+        assert listing.cover == str(self.manga_dir / "Capa.png")
+
+    def test_cover_first_root_image(self):
+        """Sem capa nomeada, deve usar a primeira imagem da raiz"""
+        self._create_chapter("Chapter 1", ["01.jpg"])
+        (self.manga_dir / "b.jpg").write_text("fake")
+        (self.manga_dir / "a.jpg").write_text("fake")
+
+        listing = self.walker.walk_manga(self.manga_dir)
+
+        assert listing.cover == str(self.manga_dir / "a.jpg")
+
+    def test_cover_first_chapter_page(self):
+        """Sem imagens na raiz, deve usar a primeira página do primeiro capítulo"""
+        chapter_dir = self._create_chapter("Chapter 1", ["02.jpg", "01.jpg"])
+
+        listing = self.walker.walk_manga(self.manga_dir)
+
+        assert listing.cover == str(chapter_dir / "01.jpg")
+
+    def test_has_images(self):
+        """Deve detectar presença de imagens"""
+        assert self.walker.has_images(self.manga_dir) is False
+
+        (self.manga_dir / "page.webp").write_text("fake")
+        assert self.walker.has_images(self.manga_dir) is True
+
+    def test_list_manga_directories_ignores_hidden(self):
+        """Deve ignorar diretórios ocultos e arquivos"""
+        (self.temp_dir / ".ohara").mkdir()
+        (self.temp_dir / "arquivo.txt").write_text("texto")
+
+        manga_dirs = self.walker.list_manga_directories(self.temp_dir)
+
+        assert manga_dirs == [self.manga_dir]
@@ -0,0 +1,69 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.core.services import grayscale
+from app.core.services.grayscale import is_grayscale, probe_grayscale
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+
+@pytest.fixture(params=["pillow", "numpy"])
+def backend(request):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield
+    else:
+        with patch.object(grayscale, "np", None):
+            yield
+
+
+def _gray_page(size=(800, 1200)):
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for offset in range(0, size[1], 40):
+        draw.line((0, offset, size[0], offset + 200), fill=(30, 30, 30), width=6)
+    return image
+
+
+class TestIsGrayscale:
+    def test_gray_rgb_page(self, backend):
+        assert is_grayscale(_gray_page())
+
+    def test_single_channel_modes(self, backend):
+        assert is_grayscale(Image.new("L", (10, 10)))
+        assert is_grayscale(Image.new("1", (10, 10)))
+
+    def test_color_page(self, backend):
+        image = _gray_page()
+        ImageDraw.Draw(image).rectangle((100, 100, 400, 400), fill=(200, 40, 40))
+
+        assert not is_grayscale(image)
+
+    def test_jpeg_chroma_noise_is_tolerated(self, backend, temp_dir):
+        _gray_page().save(temp_dir / "page.jpg", quality=60)
+
+        with Image.open(temp_dir / "page.jpg") as image:
+            assert image.mode == "RGB"
+            assert is_grayscale(image)
+
+
+class TestProbeGrayscale:
+    def test_probes_page_on_disk(self, temp_dir):
+        _gray_page().save(temp_dir / "gray.png")
+        Image.new("RGB", (400, 600), "blue").save(temp_dir / "blue.png")
+
+        assert probe_grayscale(str(temp_dir / "gray.png"))
+        assert not probe_grayscale(str(temp_dir / "blue.png"))
+
+    def test_unreadable_page_counts_as_color(self, temp_dir):
+        (temp_dir / "broken.jpg").write_bytes(b"not an image")
+
+        assert not probe_grayscale(str(temp_dir / "broken.jpg"))
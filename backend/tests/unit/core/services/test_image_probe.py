@@ -0,0 +1,89 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.core.services.image_probe import classify_page, probe_image_size, probe_page
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+
+class TestProbeImageSize:
+    @pytest.mark.parametrize("filename,format,mode,options", [
+        ("page.jpg", "JPEG", "RGB", {}),
+        ("page-progressive.jpg", "JPEG", "RGB", {"progressive": True}),
+        ("page-exif.jpg", "JPEG", "RGB", {"exif": b"Exif\x00\x00" + b"\x00" * 2000}),
+        ("page.png", "PNG", "L", {}),
+        ("page.gif", "GIF", "P", {}),
+        ("page.bmp", "BMP", "RGB", {}),
+        ("page-lossy.webp", "WEBP", "RGB", {}),
+        ("page-lossless.webp", "WEBP", "RGB", {"lossless": True}),
+        ("page-alpha.webp", "WEBP", "RGBA", {}),
+    ])
+    def test_matches_decoded_size(self, temp_dir, filename, format, mode, options):
+        path = temp_dir / filename
+        Image.new(mode, (641, 923)).save(path, format=format, **options)
+
+        assert probe_image_size(str(path)) == (641, 923)
+
+    def test_unknown_or_truncated(self, temp_dir):
+        text = temp_dir / "notes.jpg"
+        text.write_bytes(b"not an image")
+        truncated = temp_dir / "truncated.jpg"
+        truncated.write_bytes(b"\xff\xd8\xff\xe0\x00\x10JFIF")
+
+        assert probe_image_size(str(text)) is None
+        assert probe_image_size(str(truncated)) is None
+        assert probe_image_size(str(temp_dir / "missing.png")) is None
+
+    def test_reads_only_the_header(self, temp_dir):
+        path = temp_dir / "page.jpg"
+        Image.new("RGB", (1200, 1800)).save(path, format="JPEG")
+
+        with open(path, "rb") as handle:
+            original = handle.read()
+        path.write_bytes(original[:1024])  # Dados da imagem cortados
+
+        assert probe_image_size(str(path)) == (1200, 1800)
+
+
+class TestProbePage:
+    def test_size_and_dimensions(self, temp_dir):
+        path = temp_dir / "page.png"
+        Image.new("RGB", (10, 20)).save(path)
+
+        assert probe_page(str(path)) == (path.stat().st_size, 10, 20)
+
+    def test_archive_member(self, temp_dir):
+        import io
+        import os
+        import zipfile
+
+        page = io.BytesIO()
+        Image.new("RGB", (30, 40)).save(page, format="JPEG")
+        archive = temp_dir / "Vol 1.cbz"
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("01.jpg", page.getvalue())
+
+        assert probe_page(os.path.join(str(archive), "01.jpg")) == (len(page.getvalue()), 30, 40)
+
+    def test_missing_file(self, temp_dir):
+        assert probe_page(str(temp_dir / "missing.png")) == (None, None, None)
+
+
+class TestClassifyPage:
+    @pytest.mark.parametrize("width,height,expected", [
+        (800, 1200, "single"),
+        (1200, 1200, "single"),
+        (1600, 1200, "spread"),
+        (800, 12000, "strip"),
+        (None, 1200, None),
+        (800, 0, None)
+    ])
+    def test_layout_from_aspect_ratio(self, width, height, expected):
+        assert classify_page(width, height) == expected
@@ -0,0 +1,264 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+from PIL.JpegImagePlugin import JpegImageFile
+
+from app.core.services.image_service import ImageService, QualityTier
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+
+@pytest.fixture
+def service(temp_dir):
+    return ImageService(cache_dir=str(temp_dir / "cache"))
+
+
+def _write_image(path: Path, size=(1200, 1800), mode="RGB", format="JPEG") -> Path:
+    Image.new(mode, size, "red" if mode == "RGB" else (255, 0, 0, 128)).save(path, format=format)
+    return path
+
+
+class TestRenderThumbnail:
+    def test_fits_within_thumbnail_size(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.jpg")
+
+        thumbnail_file = service.thumbnail(str(source))
+
+        with Image.open(thumbnail_file) as thumbnail:
+            assert thumbnail.format == "JPEG"
+            assert thumbnail.width <= service.thumbnail_size[0]
+            assert thumbnail.height <= service.thumbnail_size[1]
+            assert thumbnail.height == service.thumbnail_size[1]
+
+    def test_jpeg_uses_draft_mode(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.jpg", size=(2400, 3600))
+        draft = JpegImageFile.draft
+        decoded_sizes = []
+
+        def spy(image, mode, size):
+            result = draft(image, mode, size)
+            decoded_sizes.append(image.size)
+            return result
+
+        with patch.object(JpegImageFile, 'draft', spy):
+            service.render_thumbnail(str(source))
+
+        # Escala 1/8 aplicada pelo decodificador, ainda cobrindo a miniatura
+        assert decoded_sizes == [(300, 450)]
+
+    def test_transparent_png_becomes_rgb(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.png", mode="RGBA", format="PNG")
+
+        with Image.open(service.thumbnail(str(source))) as thumbnail:
+            assert thumbnail.mode == "RGB"
+
+    def test_invalid_image_raises_oserror(self, service, temp_dir):
+        source = temp_dir / "broken.jpg"
+        source.write_bytes(b"not an image")
+
+        with pytest.raises(OSError):
+            service.thumbnail(str(source))
+
+
+class TestThumbnailCache:
+    def test_second_request_is_cache_hit(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.jpg")
+        first = service.thumbnail(str(source))
+
+        with patch.object(service, 'render_thumbnail') as render:
+            second = service.thumbnail(str(source))
+
+        render.assert_not_called()
+        assert first == second
+
+    def test_changed_source_gets_new_entry(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.jpg")
+        first = service.thumbnail(str(source))
+
+        _write_image(source, size=(800, 600))
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+        assert service.thumbnail(str(source)) != first
+
+
+class TestDerivatives:
+    @pytest.mark.parametrize("width,expected", [
+        (100, 480),
+        (480, 480),
+        (481, 720),
+        (1440, 1440),
+        (2000, None),
+        (None, None),
+        (0, None)
+    ])
+    def test_snap_width(self, service, width, expected):
+        assert service.snap_width(width) == expected
+
+    def test_resizes_to_width_keeping_aspect(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.png", size=(1200, 1800), format="PNG")
+
+        with Image.open(service.derivative(str(source), 480, 'jpeg')) as derivative:
+            assert derivative.format == "JPEG"
+            assert derivative.size == (480, 720)
+
+    def test_webp_transcode_without_upscaling(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.jpg", size=(400, 600))
+
+        derivative_file = service.derivative(str(source), 720, 'webp')
+
+        assert derivative_file.suffix == ".webp"
+        with Image.open(derivative_file) as derivative:
+            assert derivative.format == "WEBP"
+            assert derivative.size == (400, 600)
+
+    def test_variants_are_cached_separately(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.jpg")
+
+        files = {
+            service.derivative(str(source), 480, 'jpeg'),
+            service.derivative(str(source), 720, 'jpeg'),
+            service.derivative(str(source), 480, 'webp')
+        }
+
+        with patch.object(service, 'render') as render:
+            service.derivative(str(source), 480, 'webp')
+
+        render.assert_not_called()
+        assert len(files) == 3
+
+    def test_exif_rotated_page_is_fitted_on_its_reading_width(self, service, temp_dir):
+        # Retrato salvo deitado com Orientation=6 (gira 90°)
+        source = temp_dir / "page.jpg"
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        Image.new("RGB", (1800, 1200), "red").save(source, exif=exif)
+
+        with Image.open(service.derivative(str(source), 480, 'jpeg')) as derivative:
+            assert derivative.size == (480, 720)
+
+    def test_quality_is_part_of_the_key(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.jpg")
+
+        default = service.derivative(str(source), 480, 'webp')
+        low = service.derivative(str(source), 480, 'webp', quality=30)
+
+        assert default != low
+        assert low.is_file()
+
+
+class TestTrimBorders:
+    @pytest.fixture
+    def source(self, temp_dir):
+        from PIL import ImageDraw
+
+        image = Image.new("RGB", (1200, 1800), "white")
+        ImageDraw.Draw(image).rectangle((120, 180, 1079, 1619), fill="black")
+        image.save(temp_dir / "page.jpg")
+        return temp_dir / "page.jpg"
+
+    @pytest.fixture
+    def trimming(self, service):
+        with patch.object(service.settings, 'image_trim_borders', True):
+            yield service
+
+    def test_derivative_is_cropped_before_resizing(self, trimming, source):
+        with Image.open(trimming.derivative(str(source), 480, 'jpeg')) as derivative:
+            assert derivative.width == 480
+            # Conteúdo 960x1440 (+ respiro) reduzido para 480 de largura
+            assert derivative.height == pytest.approx(720, abs=8)
+
+    def test_trim_box_is_cached(self, trimming, source):
+        first = trimming.trim_box(str(source))
+
+        with patch('app.core.services.image_service.detect_content_box') as detect:
+            second = trimming.trim_box(str(source))
+
+        detect.assert_not_called()
+        assert first == second
+        assert first == pytest.approx((0.1, 0.1, 0.9, 0.9), abs=0.01)
+
+    def test_setting_changes_the_cache_key(self, service, source):
+        plain = service.derivative(str(source), 480, 'jpeg')
+
+        with patch.object(service.settings, 'image_trim_borders', True):
+            trimmed = service.derivative(str(source), 480, 'jpeg')
+
+        assert plain != trimmed
+        with Image.open(plain) as image:
+            assert image.size == (480, 720)
+
+
+class TestGrayscaleDerivatives:
+    def test_gray_rgb_page_is_single_channel(self, service, temp_dir):
+        source = temp_dir / "page.jpg"
+        Image.new("RGB", (1200, 1800), (90, 90, 90)).save(source)
+
+        with Image.open(service.derivative(str(source), 480, 'jpeg')) as derivative:
+            assert derivative.mode == "L"
+
+    def test_color_page_stays_rgb(self, service, temp_dir):
+        source = _write_image(temp_dir / "page.jpg")
+
+        with Image.open(service.derivative(str(source), 480, 'jpeg')) as derivative:
+            assert derivative.mode == "RGB"
+
+    def test_disabled_keeps_rgb(self, service, temp_dir):
+        source = temp_dir / "page.jpg"
+        Image.new("RGB", (1200, 1800), (90, 90, 90)).save(source)
+
+        with patch.object(service.settings, 'image_encode_grayscale', False):
+            derivative_file = service.derivative(str(source), 480, 'jpeg')
+
+        with Image.open(derivative_file) as derivative:
+            assert derivative.mode == "RGB"
+
+    def test_indexed_flag_skips_pixel_check(self, service, temp_dir):
+        source = temp_dir / "page.jpg"
+        Image.new("RGB", (1200, 1800), (90, 90, 90)).save(source)
+
+        with patch('app.core.services.image_service.is_grayscale') as is_grayscale:
+            gray_file = service.derivative(str(source), 480, 'jpeg', grayscale=True)
+            color_file = service.derivative(str(source), 720, 'jpeg', grayscale=False)
+
+        is_grayscale.assert_not_called()
+        with Image.open(gray_file) as gray, Image.open(color_file) as color:
+            assert gray.mode == "L"
+            assert color.mode == "RGB"
+
+
+class TestQualityTiers:
+    def test_tiers_from_settings(self, service):
+        tiers = service.quality_tiers()
+
+        assert set(tiers) == {"low", "medium"}
+        assert tiers["low"].max_width < tiers["medium"].max_width
+
+    def test_invalid_profiles_are_ignored(self, service):
+        profiles = {"original": {"max_width": 100}, "tiny": {"max_width": 200, "format": "gif"}}
+
+        with patch.object(service.settings, 'image_quality_tiers', profiles):
+            assert service.quality_tiers() == {}
+
+    def test_estimate_scales_with_width_and_quality(self, service):
+        low = QualityTier("low", 720, 'webp', 50)
+        high = QualityTier("high", 720, 'webp', 100)
+
+        estimate = service.estimate_bytes(2_000_000, 1440, 2160, low)
+
+        assert estimate == int(720 * 1080 * 0.4 * 0.5)
+        assert service.estimate_bytes(2_000_000, 1440, 2160, high) == 2 * estimate
+
+    def test_estimate_never_exceeds_original(self, service):
+        tier = QualityTier("low", 720, 'jpeg', 90)
+
+        assert service.estimate_bytes(50_000, 700, 1000, tier) == 50_000
+        assert service.estimate_bytes(50_000, None, None, tier) == 50_000
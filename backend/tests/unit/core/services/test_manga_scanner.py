@@ -23,6 +23,7 @@ class TestMangaScannerSimple:
         assert self.scanner.cache_enabled is True
         assert hasattr(self.scanner, 'cache')
         assert hasattr(self.scanner, 'chapter_parser')
+        assert self.scanner.max_workers == self.scanner.settings.scan_max_workers
     
     def test_enable_disable_cache(self):
         """Deve habilitar/desabilitar cache"""
@@ -150,10 +151,209 @@ class TestMangaScannerSimple:
         assert len(library.mangas) == 1
         mock_scan_manga.assert_called_once()
     
+    def _create_library(self, manga_names):
+        for name in manga_names:
+            chapter_dir = self.temp_dir / name / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            (chapter_dir / "page1.jpg").write_text("fake image")
+    
+    def test_scan_library_parallel_preserves_order(self):
+        """Deve manter a ordem dos mangás ao escanear em paralelo"""
+        names = [f"Manga {i:02d}" for i in range(12)]
+        self._create_library(names)
+        self.scanner.max_workers = 4
+        self.scanner.disable_cache()
+        
+        library = self.scanner.scan_library(str(self.temp_dir))
+        
+        assert [manga.title for manga in library.mangas] == names
+    
+    def test_scan_library_parallel_isolates_failures(self):
+        """Falha em um mangá não deve afetar os demais"""
+        self._create_library(["Manga A", "Manga B", "Manga C"])
+        self.scanner.max_workers = 3
+        self.scanner.disable_cache()
+        original_scan_manga = self.scanner.scan_manga
+        
+        def failing_scan_manga(manga_path):
+            if manga_path.endswith("Manga B"):
+                raise RuntimeError("falha simulada")
+            return original_scan_manga(manga_path)
+        
+        with patch.object(self.scanner, 'scan_manga', side_effect=failing_scan_manga):
+            library = self.scanner.scan_library(str(self.temp_dir))
+        
+        assert [manga.title for manga in library.mangas] == ["Manga A", "Manga C"]
+    
+    def test_scan_library_sequential_when_single_worker(self):
+        """Deve escanear sequencialmente com um único worker"""
+        self._create_library(["Manga A", "Manga B"])
+        self.scanner.max_workers = 1
+        self.scanner.disable_cache()
+        
+        with patch('app.core.services.manga_scanner.ThreadPoolExecutor') as mock_executor:
+            library = self.scanner.scan_library(str(self.temp_dir))
+        
+        mock_executor.assert_not_called()
+        assert library.total_mangas == 2
+    
+    def test_scan_library_incremental_rescans_only_changed_chapter(self):
+        """Deve reescanear apenas o capítulo cuja impressão digital mudou"""
+        import os
+        
+        manga_dir = self.temp_dir / "Manga A"
+        for chapter in ("Chapter 1", "Chapter 2", "Chapter 3"):
+            (manga_dir / chapter).mkdir(parents=True)
+            (manga_dir / chapter / "01.jpg").write_text("fake image")
+        self.scanner.scan_library(str(self.temp_dir))
+        
+        changed_dir = manga_dir / "Chapter 2"
+        (changed_dir / "02.jpg").write_text("fake image")
+        stat = changed_dir.stat()
+        os.utime(changed_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        
+        with patch.object(self.scanner, '_build_chapter', wraps=self.scanner._build_chapter) as spy:
+            library = self.scanner.scan_library(str(self.temp_dir))
+        
+        assert [call.args[0].name for call in spy.call_args_list] == ["Chapter 2"]
+        manga = library.get_manga("manga-a")
+        assert manga.total_pages == 4
+        chapter = next(ch for ch in manga.chapters if ch.name == "Chapter 2")
+        assert chapter.page_count == 2
+    
+    def test_scan_manga_with_cbz_chapter(self):
+        """Capítulos em CBZ usam o nome sem extensão e páginas com caminho virtual"""
+        import os
+        import zipfile
+        
+        manga_dir = self.temp_dir / "Manga A"
+        (manga_dir / "Chapter 1").mkdir(parents=True)
+        (manga_dir / "Chapter 1" / "01.jpg").write_text("fake image")
+        archive = manga_dir / "Chapter 2.cbz"
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr("01.jpg", b"fake image")
+            zip_file.writestr("02.jpg", b"fake image")
+        
+        manga = self.scanner.scan_manga(str(manga_dir))
+        
+        chapter = next(ch for ch in manga.chapters if ch.number == 2)
+        assert chapter.name == "Chapter 2"
+        assert chapter.path == str(archive)
+        assert [page.path for page in chapter.pages] == [
+            os.path.join(str(archive), "01.jpg"), os.path.join(str(archive), "02.jpg")
+        ]
+        assert manga.total_pages == 3
+        assert self.scanner.is_manga_current(manga)
+    
+    def test_scan_library_cache_hit_does_not_list_chapters(self):
+        """Cache válido não deve listar diretórios de capítulos"""
+        import os
+        
+        self._create_library(["Manga A", "Manga B"])
+        first = self.scanner.scan_library(str(self.temp_dir))
+        
+        with patch('app.core.services.directory_walker.os.scandir', wraps=os.scandir) as spy:
+            second = self.scanner.scan_library(str(self.temp_dir))
+        
+        # Apenas a raiz da biblioteca é listada e as páginas não são lidas
+        assert [str(call.args[0]) for call in spy.call_args_list] == [str(self.temp_dir)]
+        assert second.total_pages == first.total_pages
+        manga = second.get_manga("manga-a")
+        assert manga.chapters[0].pages == []
+        
+        # Páginas vêm do shard do mangá, ainda sem listar capítulos
+        with patch('app.core.services.directory_walker.os.scandir', wraps=os.scandir) as spy:
+            self.scanner.load_pages(manga)
+        
+        spy.assert_not_called()
+        page = manga.chapters[0].pages[0]
+        assert page.filename == "page1.jpg"
+        assert page.path == str(self.temp_dir / "Manga A" / "Chapter 1" / "page1.jpg")
+    
+    def test_load_pages_lists_chapters_when_shard_is_corrupt(self):
+        """Shard corrompido deve ser refeito a partir do disco"""
+        self._create_library(["Manga A", "Manga B"])
+        self.scanner.scan_library(str(self.temp_dir))
+        shard_file = self.scanner.cache.get_shard_file(self.temp_dir, "manga-a")
+        shard_file.write_text("{corrompido")
+        
+        library = self.scanner.scan_library(str(self.temp_dir))
+        manga = library.get_manga("manga-a")
+        self.scanner.load_pages(manga)
+        
+        assert [page.filename for page in manga.chapters[0].pages] == ["page1.jpg"]
+        assert self.scanner.cache.load_shard(self.temp_dir, "manga-a") is not None
+    
+    def test_iter_library_yields_before_scanning_everything(self):
+        """O gerador deve entregar o primeiro mangá sem escanear a biblioteca toda"""
+        self._create_library([f"Manga {i:02d}" for i in range(10)])
+        self.scanner.max_workers = 2
+        self.scanner.disable_cache()
+        
+        with patch.object(self.scanner, '_load_manga', wraps=self.scanner._load_manga) as spy:
+            mangas = self.scanner.iter_library(str(self.temp_dir))
+            first = next(mangas)
+            loaded_before_first = spy.call_count
+            rest = list(mangas)
+        
+        assert first.title == "Manga 00"
+        assert loaded_before_first <= 5  # janela: 2 workers * 2 + reposição
+        assert [manga.title for manga in rest] == [f"Manga {i:02d}" for i in range(1, 10)]
+    
+    def test_iter_library_abandoned_does_not_save_cache(self):
+        """Gerador interrompido no meio não deve salvar o cache"""
+        self._create_library(["Manga A", "Manga B", "Manga C"])
+        
+        with patch.object(self.scanner.cache, 'save_cache') as mock_save:
+            mangas = self.scanner.iter_library(str(self.temp_dir))
+            next(mangas)
+            mangas.close()
+        
+        mock_save.assert_not_called()
+    
+    def test_scan_library_skips_save_when_nothing_changed(self):
+        """Não deve reescrever o cache quando tudo veio do cache"""
+        self._create_library(["Manga A", "Manga B"])
+        self.scanner.scan_library(str(self.temp_dir))
+        
+        with patch.object(self.scanner.cache, 'save_cache') as mock_save:
+            self.scanner.scan_library(str(self.temp_dir))
+        
+        mock_save.assert_not_called()
+    
+    def test_scan_library_saves_when_manga_removed(self):
+        """Deve reescrever o cache quando um mangá foi removido"""
+        import shutil
+        
+        self._create_library(["Manga A", "Manga B"])
+        self.scanner.scan_library(str(self.temp_dir))
+        shutil.rmtree(self.temp_dir / "Manga B")
+        
+        with patch.object(self.scanner.cache, 'save_cache') as mock_save:
+            self.scanner.scan_library(str(self.temp_dir))
+        
+        mock_save.assert_called_once()
+        assert [manga.id for manga in mock_save.call_args.args[1]] == ["manga-a"]
+    
+    def test_is_manga_current(self):
+        """Deve detectar mudança em capítulo apenas com stat"""
+        import os
+        
+        self._create_library(["Manga A"])
+        manga = self.scanner.scan_manga(str(self.temp_dir / "Manga A"))
+        assert self.scanner.is_manga_current(manga) is True
+        
+        chapter_dir = self.temp_dir / "Manga A" / "Chapter 1"
+        stat = chapter_dir.stat()
+        os.utime(chapter_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        
+        assert self.scanner.is_manga_current(manga) is False
+    
     def test_clear_cache(self):
         """Deve limpar cache"""
         # Criar arquivo de cache fake
-        cache_file = self.temp_dir / self.scanner.cache.cache_file_name
+        cache_file = self.scanner.cache.get_manifest_file(self.temp_dir)
+        cache_file.parent.mkdir(parents=True)
         cache_file.write_text('{"test": "data"}')
         
         # Limpar cache
@@ -169,8 +369,8 @@ class TestMangaScannerSimple:
         assert info["exists"] is False
         
         # Com cache
-        cache_file = self.temp_dir / self.scanner.cache.cache_file_name
-        cache_file.write_text('{"manga1": {"test": "data"}}')
+        self._create_library(["Manga A"])
+        self.scanner.scan_library(str(self.temp_dir))
         
         info = self.scanner.get_cache_info(str(self.temp_dir))
         assert info["exists"] is True
@@ -17,7 +17,7 @@ class TestSimpleCache:
     def setup_method(self):
         self.cache = SimpleCache()
         self.temp_dir = Path(tempfile.mkdtemp())
-        self.cache_file = self.temp_dir / self.cache.cache_file_name
+        self.cache_file = self.cache.get_manifest_file(self.temp_dir)
         
     def teardown_method(self):
         import shutil
@@ -31,6 +31,7 @@ class TestSimpleCache:
     def test_load_cache_valid_cache(self):
         """Deve carregar cache válido"""
         cache_data = {"manga1": {"manga_data": {"title": "Test"}, "dir_mtime": 123456}}
+        self.cache_file.parent.mkdir(parents=True)
         self.cache_file.write_text(json.dumps(cache_data))
         
         result = self.cache.load_cache(self.cache_file)
@@ -38,6 +39,7 @@ class TestSimpleCache:
     
     def test_load_cache_invalid_json(self):
         """Deve retornar dict vazio para JSON inválido"""
+        self.cache_file.parent.mkdir(parents=True)
         self.cache_file.write_text("invalid json")
         
         result = self.cache.load_cache(self.cache_file)
@@ -72,17 +74,148 @@ class TestSimpleCache:
         manga_dir.mkdir(parents=True, exist_ok=True)
         
         # Salvar cache
-        self.cache.save_cache(self.cache_file, [manga])
+        self.cache.save_cache(self.temp_dir, [manga])
         
         # Verificar se foi salvo
         assert self.cache_file.exists()
         
         # Verificar conteúdo
-        cache_data = json.loads(self.cache_file.read_text())
+        cache_data = self.cache.load_manifest(self.temp_dir)
         assert "manga1" in cache_data
         assert cache_data["manga1"]["manga_data"]["title"] == "Test Manga"
         assert "dir_mtime" in cache_data["manga1"]
     
+    def test_save_cache_persists_compact_pages(self):
+        """Deve persistir páginas em formato compacto e restaurá-las"""
+        from app.models.manga import Page
+        
+        chapter_path = self.temp_dir / "manga1" / "ch1"
+        chapter_path.mkdir(parents=True)
+        chapter = Chapter(
+            id="ch1",
+            name="Chapter 1",
+            path=str(chapter_path),
+            pages=[
+                Page(filename="01.jpg", path=str(chapter_path / "01.jpg")),
+                Page(filename="02.jpg", path=str(chapter_path / "02.jpg"), size=10, width=800, height=1200)
+            ],
+            page_count=2,
+            fingerprint={"mtime_ns": 1, "inode": 1, "entries": 2}
+        )
+        manga = Manga(id="manga1", title="Test", path=str(self.temp_dir / "manga1"), chapters=[chapter])
+        
+        self.cache.save_cache(self.temp_dir, [manga])
+        
+        # Manifesto não carrega páginas; elas ficam no shard do mangá
+        cache_data = self.cache.load_manifest(self.temp_dir)
+        assert "pages" not in cache_data["manga1"]["manga_data"]["chapters"][0]
+        shard = self.cache.load_shard(self.temp_dir, "manga1")
+        assert shard["chapters"]["ch1"]["pages"] == ["01.jpg", ["02.jpg", 10, 800, 1200]]
+        
+        restored = self.cache.restore_manga(cache_data["manga1"]["manga_data"])
+        assert restored.chapters[0].pages == []
+        assert self.cache.restore_pages(restored, shard) == []
+        restored_pages = restored.chapters[0].pages
+        assert restored_pages[0].path == str(chapter_path / "01.jpg")
+        assert restored_pages[1].width == 800
+        assert restored_pages[1].size == 10
+    
+    def test_compact_pages_keep_archive_subfolders(self):
+        """Membros de CBZ em subpastas devem voltar com o caminho completo"""
+        from app.models.manga import Page
+        
+        chapter_path = str(self.temp_dir / "manga1" / "Vol 1.cbz")
+        page = Page(filename="01.jpg", path=os.path.join(chapter_path, "extras", "01.jpg"))
+        
+        compact = self.cache._compact_page(chapter_path, page)
+        restored = self.cache._restore_page(chapter_path, compact)
+        
+        assert restored.path == page.path
+        assert restored.filename == "01.jpg"
+    
+    def test_compact_pages_keep_grayscale_flag(self):
+        """O flag de tons de cinza deve sobreviver à compactação, mesmo sem CRC"""
+        from app.models.manga import Page
+        
+        chapter_path = str(self.temp_dir / "manga1" / "ch1")
+        page = Page(filename="01.jpg", path=os.path.join(chapter_path, "01.jpg"), size=10, width=8, height=12, grayscale=True)
+        
+        compact = self.cache._compact_page(chapter_path, page)
+        restored = self.cache._restore_page(chapter_path, compact)
+        
+        assert compact == ["01.jpg", 10, 8, 12, None, True]
+        assert restored.grayscale is True
+        assert restored.crc is None
+    
+    def _manga_with_pages(self, manga_id):
+        from app.models.manga import Page
+        
+        chapter_path = self.temp_dir / manga_id / "ch1"
+        chapter_path.mkdir(parents=True)
+        chapter = Chapter(
+            id=f"{manga_id}-ch1",
+            name="Chapter 1",
+            path=str(chapter_path),
+            pages=[Page(filename="01.jpg", path=str(chapter_path / "01.jpg"))],
+            page_count=1,
+            fingerprint={"mtime_ns": 1, "inode": 1, "entries": 1}
+        )
+        return Manga(id=manga_id, title=manga_id, path=str(self.temp_dir / manga_id), chapters=[chapter])
+    
+    def test_save_cache_rewrites_only_changed_shards(self):
+        """Apenas os shards dos mangás alterados devem ser reescritos"""
+        first, second = self._manga_with_pages("manga1"), self._manga_with_pages("manga2")
+        self.cache.save_cache(self.temp_dir, [first, second])
+        second_shard = self.cache.get_shard_file(self.temp_dir, "manga2")
+        second_mtime = second_shard.stat().st_mtime_ns
+        
+        with patch("app.core.services.simple_cache.atomic_write_text", wraps=__import__(
+                "app.core.utils", fromlist=["atomic_write_text"]).atomic_write_text) as write:
+            self.cache.save_cache(self.temp_dir, [first, second], changed=[first])
+        
+        written = [Path(call.args[0]).name for call in write.call_args_list]
+        assert written == ["manga1.json", "manifest.json"]
+        assert second_shard.stat().st_mtime_ns == second_mtime
+    
+    def test_save_cache_removes_stale_shards(self):
+        """Shard de mangá removido da biblioteca deve ser apagado"""
+        first, second = self._manga_with_pages("manga1"), self._manga_with_pages("manga2")
+        self.cache.save_cache(self.temp_dir, [first, second])
+        
+        self.cache.save_cache(self.temp_dir, [first], changed=[])
+        
+        assert self.cache.get_shard_file(self.temp_dir, "manga1").exists()
+        assert not self.cache.get_shard_file(self.temp_dir, "manga2").exists()
+    
+    def test_corrupt_shard_only_affects_its_manga(self):
+        """Shard corrompido não deve impedir a leitura do manifesto nem dos outros shards"""
+        first, second = self._manga_with_pages("manga1"), self._manga_with_pages("manga2")
+        self.cache.save_cache(self.temp_dir, [first, second])
+        self.cache.get_shard_file(self.temp_dir, "manga1").write_text("{corrompido")
+        
+        assert set(self.cache.load_manifest(self.temp_dir)) == {"manga1", "manga2"}
+        assert self.cache.load_shard(self.temp_dir, "manga1") is None
+        assert self.cache.load_shard(self.temp_dir, "manga2") is not None
+    
+    def test_restore_pages_reports_changed_chapters(self):
+        """Capítulo com impressão digital diferente do shard não deve ser restaurado"""
+        manga = self._manga_with_pages("manga1")
+        self.cache.save_cache(self.temp_dir, [manga])
+        shard = self.cache.load_shard(self.temp_dir, "manga1")
+        
+        manga.chapters[0].pages = []
+        manga.chapters[0].fingerprint = {"mtime_ns": 2, "inode": 1, "entries": 1}
+        
+        assert self.cache.restore_pages(manga, shard) == [manga.chapters[0].path]
+        assert manga.chapters[0].pages == []
+    
+    def test_load_manifest_ignores_other_versions(self):
+        """Manifesto de outra versão deve ser ignorado"""
+        self.cache_file.parent.mkdir(parents=True)
+        self.cache_file.write_text(json.dumps({"version": 1, "mangas": {"manga1": {}}}))
+        
+        assert self.cache.load_manifest(self.temp_dir) == {}
+    
     def test_is_valid_no_cache_entry(self):
         """Deve retornar False para entrada inexistente"""
         manga_dir = self.temp_dir / "manga1"
@@ -113,6 +246,58 @@ class TestSimpleCache:
         result = self.cache.is_valid(manga_dir, cache_entry)
         assert result is False
     
+    def _fingerprinted_entry(self, manga_dir, chapter_dir):
+        from app.core.services.directory_walker import directory_fingerprint
+        
+        return {
+            "manga_data": {
+                "fingerprint": directory_fingerprint(manga_dir.stat()),
+                "chapters": [{
+                    "path": str(chapter_dir),
+                    "fingerprint": directory_fingerprint(chapter_dir.stat(), entries=1)
+                }]
+            },
+            "dir_mtime": manga_dir.stat().st_mtime
+        }
+    
+    def test_is_valid_with_chapter_fingerprints(self):
+        """Deve validar entrada com impressões digitais inalteradas"""
+        chapter_dir = self.temp_dir / "manga1" / "ch1"
+        chapter_dir.mkdir(parents=True)
+        (chapter_dir / "01.jpg").write_text("fake")
+        
+        cache_entry = self._fingerprinted_entry(self.temp_dir / "manga1", chapter_dir)
+        
+        assert self.cache.is_valid(self.temp_dir / "manga1", cache_entry) is True
+    
+    def test_is_valid_detects_changed_chapter(self):
+        """Páginas novas dentro de um capítulo devem invalidar o cache"""
+        manga_dir = self.temp_dir / "manga1"
+        chapter_dir = manga_dir / "ch1"
+        chapter_dir.mkdir(parents=True)
+        (chapter_dir / "01.jpg").write_text("fake")
+        cache_entry = self._fingerprinted_entry(manga_dir, chapter_dir)
+        manga_mtime = manga_dir.stat().st_mtime_ns
+        
+        (chapter_dir / "02.jpg").write_text("fake")
+        stat = chapter_dir.stat()
+        os.utime(chapter_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        
+        # O diretório do mangá não muda, mas o capítulo sim
+        assert manga_dir.stat().st_mtime_ns == manga_mtime
+        assert self.cache.is_valid(manga_dir, cache_entry) is False
+    
+    def test_is_valid_missing_chapter(self):
+        """Capítulo removido deve invalidar o cache"""
+        manga_dir = self.temp_dir / "manga1"
+        chapter_dir = manga_dir / "ch1"
+        chapter_dir.mkdir(parents=True)
+        cache_entry = self._fingerprinted_entry(manga_dir, chapter_dir)
+        
+        cache_entry["manga_data"]["chapters"][0]["path"] = str(manga_dir / "removido")
+        
+        assert self.cache.is_valid(manga_dir, cache_entry) is False
+    
     def test_restore_manga_valid_data(self):
         """Deve restaurar mangá com dados válidos"""
         manga_data = {
@@ -141,11 +326,15 @@ class TestSimpleCache:
     
     def test_clear_cache_existing_file(self):
         """Deve limpar cache existente"""
+        self.cache_file.parent.mkdir(parents=True)
         self.cache_file.write_text("{}")
+        legacy_file = self.temp_dir / self.cache.legacy_cache_file_name
+        legacy_file.write_text("{}")
         
         result = self.cache.clear_cache(str(self.temp_dir))
         assert result is True
-        assert not self.cache_file.exists()
+        assert not self.cache.get_cache_dir(self.temp_dir).exists()
+        assert not legacy_file.exists()
     
     def test_clear_cache_nonexistent_file(self):
         """Deve retornar False para arquivo inexistente"""
@@ -154,8 +343,7 @@ class TestSimpleCache:
     
     def test_get_cache_info_existing_cache(self):
         """Deve retornar informações do cache existente"""
-        cache_data = {"manga1": {"test": "data"}}
-        self.cache_file.write_text(json.dumps(cache_data))
+        self.cache.save_cache(self.temp_dir, [self._manga_with_pages("manga1")])
         
         info = self.cache.get_cache_info(str(self.temp_dir))
         
@@ -0,0 +1,54 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from app.core.hot_image_cache import HotImageCache
+
+
+@pytest.fixture
+def cache():
+    return HotImageCache(max_bytes=10, max_item_bytes=6)
+
+
+class TestHotImageCache:
+    def test_admits_on_second_access(self, cache):
+        assert not cache.should_admit("/a.jpg", 4)
+        assert cache.should_admit("/a.jpg", 4)
+
+    def test_rejects_large_items(self, cache):
+        cache.should_admit("/big.jpg", 7)
+
+        assert not cache.should_admit("/big.jpg", 7)
+        cache.put("/big.jpg", '"e"', b"1234567")
+        assert cache.get("/big.jpg", '"e"') is None
+
+    def test_get_checks_etag(self, cache):
+        cache.put("/a.jpg", '"v1"', b"abcd")
+
+        assert cache.get("/a.jpg", '"v1"') == b"abcd"
+        assert cache.get("/a.jpg", '"v2"') is None
+        assert cache.get("/a.jpg", '"v1"') is None
+        assert cache.current_bytes == 0
+
+    def test_evicts_least_recently_used_by_bytes(self, cache):
+        cache.put("/a.jpg", '"e"', b"aaaa")
+        cache.put("/b.jpg", '"e"', b"bbbb")
+        cache.get("/a.jpg", '"e"')
+
+        cache.put("/c.jpg", '"e"', b"cccc")
+
+        assert cache.get("/b.jpg", '"e"') is None
+        assert cache.get("/a.jpg", '"e"') == b"aaaa"
+        assert cache.current_bytes == 8
+
+    def test_load_skips_changed_file(self, cache):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "a.jpg"
+            path.write_bytes(b"abcd")
+
+            cache.load(str(path), '"e"', 3)
+            assert cache.get(str(path), '"e"') is None
+
+            cache.load(str(path), '"e"', 4)
+            assert cache.get(str(path), '"e"') == b"abcd"
@@ -0,0 +1,154 @@
+import os
+import tempfile
+from email.utils import formatdate
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.http_cache import (
+    RangeNotSatisfiable,
+    cache_headers,
+    conditional_file_response,
+    file_etag,
+    is_not_modified,
+    parse_range
+)
+
+
+def _request(headers):
+    request = MagicMock()
+    request.headers = {key.lower(): value for key, value in headers.items()}
+    return request
+
+
+@pytest.fixture
+def image_file():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "01.jpg"
+        path.write_bytes(b"fake image")
+        yield path
+
+
+class TestFileEtag:
+    def test_changes_with_content(self, image_file):
+        before = file_etag(image_file.stat())
+
+        image_file.write_bytes(b"another fake image")
+        stat = image_file.stat()
+        os.utime(image_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert file_etag(image_file.stat()) != before
+
+    def test_strong_quoted(self, image_file):
+        etag = file_etag(image_file.stat())
+
+        assert etag.startswith('"') and etag.endswith('"')
+        assert not etag.startswith('W/')
+
+
+class TestIsNotModified:
+    def test_if_none_match(self, image_file):
+        stat = image_file.stat()
+        etag = file_etag(stat)
+
+        assert is_not_modified(_request({"If-None-Match": etag}), stat, etag)
+        assert is_not_modified(_request({"If-None-Match": f'"outro", W/{etag}'}), stat, etag)
+        assert is_not_modified(_request({"If-None-Match": "*"}), stat, etag)
+        assert not is_not_modified(_request({"If-None-Match": '"outro"'}), stat, etag)
+
+    def test_if_none_match_takes_precedence(self, image_file):
+        stat = image_file.stat()
+        headers = {"If-None-Match": '"outro"', "If-Modified-Since": formatdate(stat.st_mtime + 60, usegmt=True)}
+
+        assert not is_not_modified(_request(headers), stat, file_etag(stat))
+
+    def test_if_modified_since(self, image_file):
+        stat = image_file.stat()
+        etag = file_etag(stat)
+
+        assert is_not_modified(_request({"If-Modified-Since": formatdate(stat.st_mtime, usegmt=True)}), stat, etag)
+        assert not is_not_modified(_request({"If-Modified-Since": formatdate(stat.st_mtime - 60, usegmt=True)}), stat, etag)
+        assert not is_not_modified(_request({"If-Modified-Since": "data inválida"}), stat, etag)
+
+
+class TestConditionalFileResponse:
+    def test_304_does_not_open_file(self, image_file, monkeypatch):
+        stat = image_file.stat()
+        request = _request({"If-None-Match": file_etag(stat)})
+
+        def fail_open(*args, **kwargs):
+            raise AssertionError("arquivo não deveria ser aberto")
+
+        monkeypatch.setattr("builtins.open", fail_open)
+        response = conditional_file_response(request, str(image_file), stat)
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == file_etag(stat)
+        assert response.headers["cache-control"] == cache_headers(stat)["Cache-Control"]
+
+    def test_200_with_validators(self, image_file):
+        stat = image_file.stat()
+
+        response = conditional_file_response(_request({}), str(image_file), stat)
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == file_etag(stat)
+        assert response.headers["last-modified"] == formatdate(stat.st_mtime, usegmt=True)
+
+
+class TestParseRange:
+    @pytest.mark.parametrize("header,expected", [
+        ("bytes=0-3", [(0, 3)]),
+        ("bytes=4-", [(4, 9)]),
+        ("bytes=-3", [(7, 9)]),
+        ("bytes=-30", [(0, 9)]),
+        ("bytes=2-100", [(2, 9)]),
+        ("bytes=0-1, 5-6", [(0, 1), (5, 6)]),
+        ("bytes=5-6,0-1", [(0, 1), (5, 6)]),
+        ("bytes=0-4,3-6,7-7", [(0, 7)]),
+        ("bytes=0-1,20-30", [(0, 1)]),
+    ])
+    def test_valid(self, header, expected):
+        assert parse_range(header, 10) == expected
+
+    @pytest.mark.parametrize("header", [None, "", "items=0-1", "bytes=", "bytes=a-b", "bytes=5-2", "bytes=-", "bytes=1"])
+    def test_ignored(self, header):
+        assert parse_range(header, 10) is None
+
+    def test_too_many_ranges_is_ignored(self):
+        header = "bytes=" + ",".join(f"{i * 2}-{i * 2}" for i in range(40))
+
+        assert parse_range(header, 100) is None
+
+    @pytest.mark.parametrize("header", ["bytes=10-", "bytes=20-30", "bytes=-0"])
+    def test_not_satisfiable(self, header):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(header, 10)
+
+
+class TestConditionalFileResponseRanges:
+    def test_if_range_mismatch_sends_full_file(self, image_file):
+        stat = image_file.stat()
+
+        response = conditional_file_response(_request({"Range": "bytes=0-3", "If-Range": '"outro"'}), str(image_file), stat)
+
+        assert response.status_code == 200
+
+    def test_if_range_match_sends_partial(self, image_file):
+        stat = image_file.stat()
+        headers = {"Range": "bytes=0-3", "If-Range": file_etag(stat)}
+
+        response = conditional_file_response(_request(headers), str(image_file), stat)
+
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 0-3/{stat.st_size}"
+        assert response.headers["content-length"] == "4"
+
+    def test_unsatisfiable_is_416(self, image_file):
+        stat = image_file.stat()
+
+        response = conditional_file_response(_request({"Range": "bytes=100-"}), str(image_file), stat)
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{stat.st_size}"
@@ -0,0 +1,309 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.core.library_index import LibraryIndex
+
+
+def _touch_later(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+
+@pytest.fixture
+def temp_library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for manga_name in ("Manga A", "Manga B"):
+            chapter_dir = root / manga_name / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            (chapter_dir / "01.jpg").write_text("fake image")
+        yield root
+
+
+@pytest.fixture
+def index():
+    return LibraryIndex()
+
+
+class TestLibraryIndexBuild:
+    def test_get_library__builds_once(self, index, temp_library):
+        with patch.object(index.scanner, 'scan_library', wraps=index.scanner.scan_library) as spy:
+            first = index.get_library(str(temp_library))
+            second = index.get_library(str(temp_library))
+
+        assert first is second
+        assert first.total_mangas == 2
+        assert spy.call_count == 1
+
+    def test_get_library__no_path_configured(self, index):
+        with patch('app.core.library_index.library_state') as mock_state:
+            mock_state.current_path = None
+            with pytest.raises(ValueError, match="Nenhuma biblioteca configurada"):
+                index.get_library()
+
+    def test_get_library__path_change_rebuilds(self, index, temp_library):
+        with tempfile.TemporaryDirectory() as other_dir:
+            chapter_dir = Path(other_dir) / "Other" / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            (chapter_dir / "01.jpg").write_text("fake image")
+
+            index.get_library(str(temp_library))
+            other = index.get_library(other_dir)
+
+        assert other.total_mangas == 1
+        assert index.path == other_dir
+
+    def test_get_library__root_change_rebuilds(self, index, temp_library):
+        index.get_library(str(temp_library))
+
+        chapter_dir = temp_library / "Manga C" / "Chapter 1"
+        chapter_dir.mkdir(parents=True)
+        (chapter_dir / "01.jpg").write_text("fake image")
+        _touch_later(temp_library)
+
+        library = index.get_library(str(temp_library))
+        assert library.total_mangas == 3
+
+    def test_refresh__forces_rebuild(self, index, temp_library):
+        index.get_library(str(temp_library))
+        generation = index.generation
+
+        with patch.object(index.scanner, 'scan_library', wraps=index.scanner.scan_library) as spy:
+            index.refresh(str(temp_library))
+
+        assert spy.call_count == 1
+        assert index.generation == generation + 1
+
+    def test_get_library__rebuild_scans_outside_the_lock(self, index, temp_library):
+        index.get_library(str(temp_library))
+        page_path = str(temp_library / "Manga A" / "Chapter 1" / "01.jpg")
+        scanning, release = threading.Event(), threading.Event()
+        scan_library = index.scanner.scan_library
+
+        def slow_scan(*args, **kwargs):
+            scanning.set()
+            release.wait(5)
+            return scan_library(*args, **kwargs)
+
+        _touch_later(temp_library)
+
+        with patch.object(index.scanner, 'scan_library', side_effect=slow_scan):
+            rebuild = threading.Thread(target=index.get_library, args=(str(temp_library),))
+            rebuild.start()
+            assert scanning.wait(5)
+
+            # Consultas respondem enquanto o escaneamento está em andamento
+            lookup = threading.Thread(target=lambda: (index.page_id(page_path), index.find_page(page_path)))
+            lookup.start()
+            lookup.join(2)
+            blocked = lookup.is_alive()
+
+            release.set()
+            rebuild.join(5)
+            lookup.join(5)
+
+        assert not blocked
+        assert index.get_library(str(temp_library)).total_mangas == 2
+
+    def test_invalidate(self, index, temp_library):
+        index.get_library(str(temp_library))
+        index.invalidate()
+
+        assert not index.is_loaded()
+        assert index.get_stats()["loaded"] is False
+
+
+class TestLibraryIndexIter:
+    def test_iter_library__builds_index_when_consumed(self, index, temp_library):
+        titles = [manga.title for manga in index.iter_library(str(temp_library))]
+
+        assert titles == ["Manga A", "Manga B"]
+        assert index.is_loaded(str(temp_library))
+
+    def test_iter_library__uses_loaded_index(self, index, temp_library):
+        index.get_library(str(temp_library))
+
+        with patch.object(index.scanner, 'iter_library') as iter_library:
+            titles = [manga.title for manga in index.iter_library(str(temp_library))]
+
+        iter_library.assert_not_called()
+        assert titles == ["Manga A", "Manga B"]
+
+    def test_iter_library__abandoned_keeps_previous_index(self, index, temp_library):
+        mangas = index.iter_library(str(temp_library))
+        next(mangas)
+        mangas.close()
+
+        assert not index.is_loaded()
+
+
+class TestLibraryIndexManga:
+    def test_get_manga(self, index, temp_library):
+        manga = index.get_manga("manga-a", str(temp_library))
+
+        assert manga is not None
+        assert manga.title == "Manga A"
+        assert index.get_manga("inexistente", str(temp_library)) is None
+
+    def test_get_manga__changed_directory_rescans_only_that_manga(self, index, temp_library):
+        index.get_library(str(temp_library))
+
+        chapter_dir = temp_library / "Manga A" / "Chapter 2"
+        chapter_dir.mkdir()
+        (chapter_dir / "01.jpg").write_text("fake image")
+        _touch_later(temp_library / "Manga A")
+
+        with patch.object(index.scanner, 'scan_library') as scan_library:
+            manga = index.get_manga("manga-a", str(temp_library))
+
+        scan_library.assert_not_called()
+        assert manga.chapter_count == 2
+        assert index.get_library(str(temp_library)).total_chapters == 3
+
+    def test_get_manga__removed_directory(self, index, temp_library):
+        import shutil
+
+        index.get_library(str(temp_library))
+        shutil.rmtree(temp_library / "Manga B")
+
+        with patch.object(LibraryIndex, '_root_changed', return_value=False):
+            assert index.get_manga("manga-b", str(temp_library)) is None
+            assert index.get_library(str(temp_library)).total_mangas == 1
+
+
+class TestLibraryIndexApplyChanges:
+    def test_apply_changes__new_chapter(self, index, temp_library):
+        index.get_library(str(temp_library))
+        chapter_dir = temp_library / "Manga A" / "Chapter 2"
+        chapter_dir.mkdir()
+        (chapter_dir / "01.jpg").write_text("fake image")
+        _touch_later(temp_library / "Manga A")
+
+        changed = index.apply_changes(str(temp_library), [str(temp_library / "Manga A")])
+
+        assert changed == 1
+        assert index.get_library(str(temp_library)).total_chapters == 3
+
+    def test_apply_changes__new_manga_without_rebuild(self, index, temp_library):
+        index.get_library(str(temp_library))
+        chapter_dir = temp_library / "Manga 0" / "Chapter 1"
+        chapter_dir.mkdir(parents=True)
+        (chapter_dir / "01.jpg").write_text("fake image")
+
+        index.apply_changes(str(temp_library), [str(temp_library / "Manga 0")])
+
+        with patch.object(index.scanner, 'scan_library') as scan_library:
+            library = index.get_library(str(temp_library))
+
+        scan_library.assert_not_called()
+        assert [manga.title for manga in library.mangas] == ["Manga 0", "Manga A", "Manga B"]
+        assert index.get_manga("manga-0", str(temp_library)) is not None
+
+    def test_apply_changes__removed_manga(self, index, temp_library):
+        import shutil
+
+        index.get_library(str(temp_library))
+        shutil.rmtree(temp_library / "Manga B")
+
+        index.apply_changes(str(temp_library), [str(temp_library / "Manga B")])
+
+        assert index.get_stats()["total_mangas"] == 1
+
+    def test_apply_changes__ignores_other_library(self, index, temp_library):
+        index.get_library(str(temp_library))
+
+        assert index.apply_changes("/outra/biblioteca", ["/outra/biblioteca/Manga"]) == 0
+
+
+class TestLibraryIndexPageIds:
+    def test_page_id__maps_to_path(self, index, temp_library):
+        manga = index.get_manga("manga-a", str(temp_library))
+        page_path = manga.chapters[0].pages[0].path
+
+        page_id = index.page_id(page_path)
+
+        assert len(page_id) == 20
+        assert str(temp_library) not in page_id
+        assert index.page_id(page_path) == page_id
+        assert index.resolve_page(page_id) == page_path
+        assert index.image_url(page_path) == f"/api/image/{page_id}"
+
+    def test_page_id__rejects_paths_outside_library(self, index, temp_library):
+        index.get_library(str(temp_library))
+
+        assert index.page_id("/etc/passwd.jpg") is None
+        assert index.page_id(str(temp_library / "Manga A" / "notes.txt")) is None
+        assert index.image_url(None) is None
+
+    def test_resolve_page__unknown_id(self, index, temp_library):
+        index.get_library(str(temp_library))
+
+        assert index.resolve_page("inexistente") is None
+        with patch.object(index, 'get_library') as get_library:
+            assert index.resolve_page("A" * 20) is None
+
+        # Prefixo desconhecido: 404 direto, sem reescanear a biblioteca
+        get_library.assert_not_called()
+
+    def test_resolve_page__after_restart_loads_only_that_manga(self, index, temp_library):
+        manga = index.get_manga("manga-b", str(temp_library))
+        page_path = manga.chapters[0].pages[0].path
+        page_id = index.page_id(page_path)
+
+        restarted = LibraryIndex()
+        with patch('app.core.library_index.library_state') as mock_state:
+            mock_state.current_path = str(temp_library)
+            with patch.object(restarted.scanner, 'load_pages', wraps=restarted.scanner.load_pages) as load_pages:
+                assert restarted.resolve_page(page_id) == page_path
+
+        assert [call.args[0].id for call in load_pages.call_args_list] == ["manga-b"]
+
+    def test_resolve_page__deleted_page_after_refresh(self, index, temp_library):
+        manga = index.get_manga("manga-a", str(temp_library))
+        kept_path = manga.chapters[0].pages[0].path
+        (temp_library / "Manga A" / "Chapter 1" / "02.jpg").write_text("fake image")
+        _touch_later(temp_library / "Manga A" / "Chapter 1")
+        _touch_later(temp_library / "Manga A")
+        manga = index.get_manga("manga-a", str(temp_library))
+        deleted_id = index.page_id(manga.chapters[0].pages[1].path)
+        kept_id = index.page_id(kept_path)
+
+        os.remove(temp_library / "Manga A" / "Chapter 1" / "02.jpg")
+        _touch_later(temp_library / "Manga A" / "Chapter 1")
+        _touch_later(temp_library / "Manga A")
+        with patch('app.core.library_index.library_state') as mock_state:
+            mock_state.current_path = str(temp_library)
+            index.get_manga("manga-a", str(temp_library))
+
+            assert index.resolve_page(deleted_id) is None
+            assert index.resolve_page(kept_id) == kept_path
+
+    def test_find_page__only_in_memory(self, index, temp_library):
+        manga = index.get_manga("manga-a", str(temp_library))
+        page = manga.chapters[0].pages[0]
+
+        assert index.find_page(page.path) is page
+        assert index.find_page(str(temp_library / "Manga A" / "Chapter 1" / "99.jpg")) is None
+        assert index.find_page("/outra/biblioteca/Manga/Chapter 1/01.jpg") is None
+
+    def test_find_page__library_in_directory_named_like_archive(self, index):
+        import zipfile
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir) / "lib.zip"
+            chapter_dir = root / "Manga" / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            (chapter_dir / "01.jpg").write_text("fake image")
+            with zipfile.ZipFile(root / "Manga" / "Chapter 2.cbz", "w") as zip_file:
+                zip_file.writestr("extras/01.jpg", b"fake image")
+
+            manga = index.get_manga("manga", str(root))
+            paths = [chapter.pages[0].path for chapter in manga.chapters]
+
+            assert [index.find_page(path).path for path in paths] == paths
+            assert index.upcoming_pages(str(chapter_dir / "01.jpg"), 1, 1) == [paths[0]]
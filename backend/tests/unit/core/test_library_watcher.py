@@ -0,0 +1,194 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.library_watcher import InotifyBackend, LibraryWatcher, PollingBackend
+
+
+def _touch_later(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+
+def _read_until(backend, predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    seen = set()
+    while time.monotonic() < deadline:
+        changes = backend.read(0.1)
+        if changes:
+            seen |= changes
+        if predicate(seen):
+            break
+    return seen
+
+
+def _age_events(watcher, manga_path, seconds):
+    first_event, last_event = watcher._pending[manga_path]
+    watcher._pending[manga_path] = (first_event - seconds, last_event - seconds)
+
+
+@pytest.fixture
+def temp_library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for manga_name in ("Manga A", "Manga B"):
+            chapter_dir = root / manga_name / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            (chapter_dir / "01.jpg").write_text("fake image")
+        yield root
+
+
+class TestPollingBackend:
+    def test_read__detects_chapter_change(self, temp_library):
+        backend = PollingBackend(str(temp_library), interval=0)
+
+        assert backend.read(0) == set()
+
+        _touch_later(temp_library / "Manga A" / "Chapter 1")
+        assert backend.read(0) == {str(temp_library / "Manga A")}
+
+    def test_read__detects_added_and_removed_manga(self, temp_library):
+        import shutil
+
+        backend = PollingBackend(str(temp_library), interval=0)
+        (temp_library / "Manga C" / "Chapter 1").mkdir(parents=True)
+        shutil.rmtree(temp_library / "Manga B")
+
+        assert backend.read(0) == {str(temp_library / "Manga B"), str(temp_library / "Manga C")}
+
+    def test_read__detects_archive_chapter_rewritten_in_place(self, temp_library):
+        archive = temp_library / "Manga A" / "Chapter 2.cbz"
+        archive.write_bytes(b"PK" + b"\0" * 10)
+        backend = PollingBackend(str(temp_library), interval=0)
+        manga_mtime = (temp_library / "Manga A").stat().st_mtime_ns
+
+        archive.write_bytes(b"PK" + b"\0" * 20)
+        _touch_later(archive)
+        os.utime(temp_library / "Manga A", ns=(manga_mtime, manga_mtime))
+
+        assert backend.read(0) == {str(temp_library / "Manga A")}
+
+    def test_read__ignores_hidden_directories(self, temp_library):
+        backend = PollingBackend(str(temp_library), interval=0)
+        (temp_library / ".ohara_cache" / "mangas").mkdir(parents=True)
+
+        assert backend.read(0) == set()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify disponível apenas no Linux")
+class TestInotifyBackend:
+    def test_read__page_added_to_chapter(self, temp_library):
+        backend = InotifyBackend(str(temp_library))
+        try:
+            (temp_library / "Manga A" / "Chapter 1" / "02.jpg").write_text("fake image")
+            manga_path = str(temp_library / "Manga A")
+
+            assert _read_until(backend, lambda seen: manga_path in seen) == {manga_path}
+        finally:
+            backend.close()
+
+    def test_read__watches_new_chapters(self, temp_library):
+        backend = InotifyBackend(str(temp_library))
+        try:
+            chapter_dir = temp_library / "Manga B" / "Chapter 2"
+            chapter_dir.mkdir()
+            manga_path = str(temp_library / "Manga B")
+            _read_until(backend, lambda seen: manga_path in seen)
+
+            # O capítulo novo também passa a ser observado
+            (chapter_dir / "01.jpg").write_text("fake image")
+            assert _read_until(backend, lambda seen: manga_path in seen) == {manga_path}
+        finally:
+            backend.close()
+
+    def test_read__ignores_cache_directory(self, temp_library):
+        backend = InotifyBackend(str(temp_library))
+        try:
+            (temp_library / ".ohara_cache").mkdir()
+            (temp_library / "notes.txt").write_text("x")
+
+            assert _read_until(backend, lambda seen: False, timeout=0.3) == set()
+        finally:
+            backend.close()
+
+
+class TestLibraryWatcher:
+    def test_flush__debounces_burst_into_single_apply(self, temp_library):
+        index = MagicMock()
+        index.apply_changes.return_value = 1
+        watcher = LibraryWatcher(index, debounce_seconds=60)
+        watcher._watched_path = str(temp_library)
+        manga_path = str(temp_library / "Manga A")
+
+        for _ in range(200):
+            watcher._record({manga_path})
+            watcher._flush_if_quiet()
+
+        index.apply_changes.assert_not_called()
+
+        _age_events(watcher, manga_path, 60)
+        watcher._flush_if_quiet()
+
+        index.apply_changes.assert_called_once_with(str(temp_library), {manga_path})
+        assert watcher.applied_changes == 1
+
+    def test_flush__each_manga_on_its_own_schedule(self, temp_library):
+        index = MagicMock()
+        index.apply_changes.return_value = 1
+        watcher = LibraryWatcher(index, debounce_seconds=60)
+        watcher._watched_path = str(temp_library)
+        quiet_path, busy_path = str(temp_library / "Manga A"), str(temp_library / "Manga B")
+
+        watcher._record({quiet_path, busy_path})
+        _age_events(watcher, quiet_path, 60)
+        _age_events(watcher, busy_path, 60)
+        # Cópia ainda em andamento em Manga B
+        watcher._record({busy_path})
+        watcher._flush_if_quiet()
+
+        index.apply_changes.assert_called_once_with(str(temp_library), {quiet_path})
+        assert list(watcher._pending) == [busy_path]
+
+    def test_flush__overflow_rebuilds_index(self, temp_library):
+        index = MagicMock()
+        watcher = LibraryWatcher(index, debounce_seconds=0)
+        watcher._watched_path = str(temp_library)
+
+        watcher._record(None)
+        watcher._flush_if_quiet()
+
+        index.refresh.assert_called_once_with(str(temp_library))
+        index.apply_changes.assert_not_called()
+
+    def test_run__applies_changes_to_index(self, temp_library):
+        from app.core.library_index import LibraryIndex
+
+        index = LibraryIndex()
+        index.get_library(str(temp_library))
+        watcher = LibraryWatcher(index, debounce_seconds=0.05, poll_interval=0.05)
+
+        with patch('app.core.library_watcher.library_state') as mock_state:
+            mock_state.current_path = str(temp_library)
+            watcher.start()
+            try:
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline and watcher.get_status()["backend"] is None:
+                    time.sleep(0.01)
+
+                chapter_dir = temp_library / "Manga A" / "Chapter 2"
+                chapter_dir.mkdir()
+                (chapter_dir / "01.jpg").write_text("fake image")
+
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline and index.get_stats()["total_chapters"] != 3:
+                    time.sleep(0.05)
+            finally:
+                watcher.stop()
+
+        assert index.get_stats()["total_chapters"] == 3
+        assert not watcher.is_running()
@@ -0,0 +1,144 @@
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from app.core.library_index import LibraryIndex
+from app.core.page_prober import PageProber
+
+
+@pytest.fixture
+def temp_library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        chapter_dir = root / "Manga A" / "Chapter 1"
+        chapter_dir.mkdir(parents=True)
+        Image.new("RGB", (800, 1200)).save(chapter_dir / "01.jpg")
+        Image.new("RGB", (1600, 1200), "red").save(chapter_dir / "02.png")
+        yield root
+
+
+@pytest.fixture
+def index(temp_library):
+    index = LibraryIndex()
+    index.get_library(str(temp_library))
+    return index
+
+
+class TestPageProber:
+    def test_probe_manga_merges_into_index(self, index, temp_library):
+        prober = PageProber(index, grayscale=True)
+
+        assert prober.probe_manga("manga-a", str(temp_library)) == 2
+
+        pages = index.get_manga("manga-a", str(temp_library)).chapters[0].pages
+        assert [(page.width, page.height) for page in pages] == [(800, 1200), (1600, 1200)]
+        assert all(page.size for page in pages)
+        assert [page.grayscale for page in pages] == [True, False]
+        assert not prober.needs_probe(index.get_manga("manga-a", str(temp_library)))
+
+    def test_grayscale_disabled_by_default_keeps_header_only(self, index, temp_library):
+        prober = PageProber(index)
+
+        prober.probe_manga("manga-a", str(temp_library))
+
+        pages = index.get_manga("manga-a", str(temp_library)).chapters[0].pages
+        assert [page.grayscale for page in pages] == [None, None]
+        assert not prober.needs_probe(index.get_manga("manga-a", str(temp_library)))
+
+    def test_results_persist_in_shard(self, index, temp_library):
+        PageProber(index).probe_manga("manga-a", str(temp_library))
+
+        restarted = LibraryIndex()
+        restarted.get_library(str(temp_library))
+        pages = restarted.get_manga("manga-a", str(temp_library)).chapters[0].pages
+
+        assert [(page.width, page.height) for page in pages] == [(800, 1200), (1600, 1200)]
+
+    def test_enqueue_skips_probed_mangas(self, index, temp_library):
+        prober = PageProber(index)
+        manga = index.get_manga("manga-a", str(temp_library))
+
+        prober.enqueue(manga, str(temp_library))
+        assert prober.get_status()["queued_mangas"] == 1
+
+        prober.probe_manga("manga-a", str(temp_library))
+        prober._queue.clear()
+        prober.enqueue(manga, str(temp_library))
+        assert prober.get_status()["queued_mangas"] == 0
+
+    def test_pages_with_size_but_no_dimensions_are_probed(self, index, temp_library):
+        prober = PageProber(index, grayscale=False)
+        manga = index.get_manga("manga-a", str(temp_library))
+        # Como depois do download do capítulo: tamanho e CRC, sem dimensões
+        index.update_checksums(manga.id, {page.path: (10, 0, None) for page in manga.chapters[0].pages})
+
+        assert prober.needs_probe(manga)
+        prober.probe_manga("manga-a", str(temp_library))
+
+        pages = index.get_manga("manga-a", str(temp_library)).chapters[0].pages
+        assert [(page.width, page.height) for page in pages] == [(800, 1200), (1600, 1200)]
+
+    def test_opened_chapter_is_merged_first(self, index, temp_library):
+        chapter_dir = temp_library / "Manga A" / "Chapter 2"
+        chapter_dir.mkdir()
+        Image.new("RGB", (800, 1200)).save(chapter_dir / "01.jpg")
+        index.invalidate()
+        manga = index.get_manga("manga-a", str(temp_library))
+        prober = PageProber(index)
+
+        with patch.object(index, 'update_pages', wraps=index.update_pages) as update_pages:
+            prober.probe_manga("manga-a", str(temp_library), str(chapter_dir))
+
+        merged = [list(call.args[1]) for call in update_pages.call_args_list]
+        assert merged[0] == [str(chapter_dir / "01.jpg")]
+        assert len(merged[1]) == 2
+        assert not prober.needs_probe(manga)
+
+    def test_unreadable_dimensions_are_not_probed_again(self, index, temp_library):
+        (temp_library / "Manga A" / "Chapter 1" / "02.png").write_bytes(b"not an image")
+        prober = PageProber(index, grayscale=False)
+        prober.probe_manga("manga-a", str(temp_library))
+
+        manga = index.get_manga("manga-a", str(temp_library))
+        assert (manga.chapters[0].pages[1].width, manga.chapters[0].pages[1].height) == (0, 0)
+        assert not prober.needs_probe(manga)
+        with patch('app.core.page_prober.probe_page') as probe_page, \
+                patch.object(index, 'update_pages') as update_pages:
+            prober.probe_manga("manga-a", str(temp_library))
+
+        probe_page.assert_not_called()
+        update_pages.assert_not_called()
+
+    def test_only_opened_chapter_and_neighbours_are_probed(self, index, temp_library):
+        for number in (2, 3, 4):
+            chapter_dir = temp_library / "Manga A" / f"Chapter {number}"
+            chapter_dir.mkdir()
+            Image.new("RGB", (800, 1200)).save(chapter_dir / "01.jpg")
+        index.invalidate()
+        manga = index.get_manga("manga-a", str(temp_library))
+        prober = PageProber(index, grayscale=False)
+
+        prober.probe_manga("manga-a", str(temp_library), manga.chapters[1].path)
+
+        probed = [all(page.width for page in chapter.pages) for chapter in manga.chapters]
+        assert probed == [True, True, True, False]
+        assert prober.needs_probe(manga, manga.chapters[3].path)
+
+    def test_background_thread(self, index, temp_library):
+        prober = PageProber(index)
+        prober.start()
+        try:
+            prober.enqueue(index.get_manga("manga-a", str(temp_library)), str(temp_library))
+            for _ in range(100):
+                if prober.get_status()["probed_pages"] == 2:
+                    break
+                time.sleep(0.02)
+        finally:
+            prober.stop()
+
+        assert prober.get_status()["probed_pages"] == 2
+        assert not prober.get_status()["running"]
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.core.library_index import LibraryIndex
+from app.core.page_readahead import FADVISE_SUPPORTED, PageReadahead
+
+
+@pytest.fixture
+def temp_library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for chapter in ("Chapter 1", "Chapter 2"):
+            chapter_dir = root / "Manga A" / chapter
+            chapter_dir.mkdir(parents=True)
+            for page in ("01.jpg", "02.jpg", "03.jpg"):
+                (chapter_dir / page).write_bytes(b"fake image")
+        yield root
+
+
+@pytest.fixture
+def index(temp_library):
+    index = LibraryIndex()
+    index.get_manga("manga-a", str(temp_library))
+    return index
+
+
+def _page(root, chapter, page):
+    return str(root / "Manga A" / chapter / page)
+
+
+class TestUpcomingPages:
+    def test_next_pages_in_chapter(self, index, temp_library):
+        upcoming = index.upcoming_pages(_page(temp_library, "Chapter 1", "01.jpg"), 1, 2)
+
+        assert upcoming == [_page(temp_library, "Chapter 1", "02.jpg")]
+
+    def test_window_reaching_the_end_includes_next_chapter(self, index, temp_library):
+        upcoming = index.upcoming_pages(_page(temp_library, "Chapter 1", "02.jpg"), 2, 2)
+
+        assert upcoming == [
+            _page(temp_library, "Chapter 1", "03.jpg"),
+            _page(temp_library, "Chapter 2", "01.jpg"),
+            _page(temp_library, "Chapter 2", "02.jpg")
+        ]
+
+    def test_last_chapter_has_no_next(self, index, temp_library):
+        assert index.upcoming_pages(_page(temp_library, "Chapter 2", "03.jpg"), 2, 2) == []
+
+    def test_unknown_page(self, index, temp_library):
+        assert index.upcoming_pages(str(temp_library / "Outro" / "Chapter 1" / "01.jpg"), 2, 2) == []
+
+
+class TestPageReadahead:
+    def test_advise_skips_recent_paths(self, index, temp_library):
+        readahead = PageReadahead(index, window=2, next_chapter_pages=1)
+        paths = [_page(temp_library, "Chapter 1", "01.jpg"), _page(temp_library, "Chapter 1", "02.jpg")]
+
+        with patch.object(PageReadahead, '_advise_file') as advise_file:
+            assert readahead.advise(paths) == 2
+            assert readahead.advise(paths) == 0
+
+        assert advise_file.call_count == 2
+
+    def test_missing_file_is_ignored(self, index, temp_library):
+        readahead = PageReadahead(index, window=2, next_chapter_pages=1)
+
+        assert readahead.advise([str(temp_library / "missing.jpg")]) == 0
+
+    def test_requests_are_ignored_when_not_running(self, index, temp_library):
+        readahead = PageReadahead(index, window=2, next_chapter_pages=1)
+
+        readahead.after_page(_page(temp_library, "Chapter 1", "01.jpg"))
+
+        assert readahead.get_status()["queued"] == 0
+
+    @pytest.mark.skipif(not FADVISE_SUPPORTED, reason="posix_fadvise indisponível")
+    def test_background_thread_advises_upcoming_pages(self, index, temp_library):
+        readahead = PageReadahead(index, window=2, next_chapter_pages=1)
+        readahead.start()
+        try:
+            with patch('app.core.page_readahead.os.posix_fadvise', wraps=os.posix_fadvise) as fadvise:
+                readahead.after_page(_page(temp_library, "Chapter 1", "02.jpg"))
+                deadline = time.monotonic() + 5
+                while readahead.get_status()["advised_pages"] < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+        finally:
+            readahead.stop()
+
+        assert readahead.get_status()["advised_pages"] == 2
+        assert {call.args[3] for call in fadvise.call_args_list} == {os.POSIX_FADV_WILLNEED}
@@ -0,0 +1,133 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.core.library_index import LibraryIndex
+from app.core.scan_jobs import ScanJob, ScanJobManager
+from app.core.services.manga_scanner import MangaScanner
+from app.core.services.scan_progress import ScanCancelled, ScanProgress
+
+
+@pytest.fixture
+def temp_library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for manga_name in ("Manga A", "Manga B", "Manga C"):
+            chapter_dir = root / manga_name / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            (chapter_dir / "01.jpg").write_text("fake image")
+        yield root
+
+
+@pytest.fixture
+def mock_library_state():
+    with patch('app.core.scan_jobs.library_state') as mock_state:
+        mock_state.current_path = None
+        yield mock_state
+
+
+class TestScanProgress:
+    def test_snapshot__eta_from_average(self):
+        progress = ScanProgress()
+        progress.set_discovered(4)
+        progress.manga_done("Manga A", from_cache=True)
+        progress.started_at -= 2
+
+        snapshot = progress.snapshot()
+
+        assert snapshot["scanned"] == 1
+        assert snapshot["cache_hits"] == 1
+        assert snapshot["percent"] == 25.0
+        assert snapshot["eta_seconds"] == pytest.approx(6, abs=0.2)
+
+    def test_snapshot__no_eta_when_finished(self):
+        progress = ScanProgress()
+        progress.set_discovered(1)
+        progress.manga_done("Manga A", from_cache=False)
+        progress.finish()
+
+        assert progress.snapshot()["eta_seconds"] is None
+
+    def test_scan_library__reports_progress(self, temp_library):
+        scanner = MangaScanner()
+        progress = ScanProgress()
+
+        scanner.scan_library(str(temp_library), progress=progress)
+        scanner.scan_library(str(temp_library), progress=(cached := ScanProgress()))
+
+        assert progress.snapshot()["discovered"] == 3
+        assert progress.snapshot()["scanned"] == 3
+        assert progress.snapshot()["cache_hits"] == 0
+        assert cached.snapshot()["cache_hits"] == 3
+
+    def test_scan_library__cancelled_does_not_save_cache(self, temp_library):
+        scanner = MangaScanner()
+        progress = ScanProgress()
+        progress.cancel()
+
+        with patch.object(scanner.cache, 'save_cache') as mock_save:
+            with pytest.raises(ScanCancelled):
+                scanner.scan_library(str(temp_library), progress=progress)
+
+        mock_save.assert_not_called()
+        assert progress.snapshot()["scanned"] == 0
+
+
+class TestScanJobManager:
+    def test_start__completes_and_sets_library(self, temp_library, mock_library_state):
+        manager = ScanJobManager(LibraryIndex())
+
+        job = manager.start(str(temp_library))
+        assert job.wait(5)
+
+        assert job.status == ScanJob.COMPLETED
+        assert job.result["total_mangas"] == 3
+        assert mock_library_state.current_path == str(temp_library)
+        assert manager.get(job.id) is job
+
+    def test_start__reuses_running_job(self, temp_library, mock_library_state):
+        manager = ScanJobManager(LibraryIndex())
+        job = ScanJob(str(temp_library))
+        job.status = ScanJob.RUNNING
+        manager._jobs[job.id] = job
+
+        assert manager.start(str(temp_library)) is job
+
+    def test_cancel__keeps_current_index(self, temp_library, mock_library_state):
+        index = LibraryIndex()
+        manager = ScanJobManager(index)
+
+        def cancel_then_scan(library_path, progress=None):
+            manager.cancel(job.id)
+            return MangaScanner.scan_library(index.scanner, library_path, progress=progress)
+
+        with patch.object(index.scanner, 'scan_library', side_effect=cancel_then_scan):
+            job = ScanJob(str(temp_library))
+            manager._jobs[job.id] = job
+            manager._run(job)
+
+        assert job.status == ScanJob.CANCELLED
+        assert not index.is_loaded()
+        assert mock_library_state.current_path is None
+
+    def test_run__failure_is_reported(self, mock_library_state):
+        manager = ScanJobManager(LibraryIndex())
+
+        job = manager.start("/caminho/inexistente")
+        assert job.wait(5)
+
+        assert job.status == ScanJob.FAILED
+        assert "Biblioteca não encontrada" in job.error
+
+    def test_prune__keeps_recent_finished_jobs(self):
+        manager = ScanJobManager(LibraryIndex(), max_finished=2)
+        for _ in range(4):
+            job = ScanJob("/biblioteca")
+            job.status = ScanJob.COMPLETED
+            manager._jobs[job.id] = job
+
+        manager._prune()
+
+        assert len(manager.list()) == 2
@@ -0,0 +1,158 @@
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.core.config import get_settings
+from app.core.library_index import LibraryIndex
+from app.core.services.image_service import ImageService
+from app.core.transcode_jobs import TranscodeJob, TranscodeJobManager, _process_pool, transcode_page
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for manga_name in ("Manga A", "Manga B"):
+            chapter_dir = root / "library" / manga_name / "Chapter 1"
+            chapter_dir.mkdir(parents=True)
+            for page in ("01.jpg", "02.jpg"):
+                Image.new("RGB", (1200, 1800), "blue").save(chapter_dir / page)
+        yield root
+
+
+@pytest.fixture
+def manager(temp_dir):
+    manager = TranscodeJobManager(LibraryIndex(), executor_factory=ThreadPoolExecutor)
+    manager.settings = get_settings().model_copy(update={
+        "cache_dir": str(temp_dir / "cache"),
+        "image_width_buckets": [480, 720],
+        "pretranscode_formats": ["webp"],
+        "pretranscode_workers": 2,
+        "pretranscode_nice": 0,
+        "pretranscode_queue_size": 2,
+        "image_quality_tiers": {}
+    })
+    return manager
+
+
+def _run(manager, temp_dir) -> TranscodeJob:
+    job = manager.start(str(temp_dir / "library"))
+    assert job.wait(30)
+    return job
+
+
+def _derivatives(temp_dir):
+    return sorted((temp_dir / "cache" / ImageService.DERIVATIVES_DIR_NAME).rglob("*.webp"))
+
+
+class TestTranscodePage:
+    def test_generates_missing_variants_only(self, temp_dir):
+        cache_dir = str(temp_dir / "cache")
+        page = str(temp_dir / "library" / "Manga A" / "Chapter 1" / "01.jpg")
+
+        first = transcode_page(cache_dir, page, [(480, "webp", None), (720, "jpeg", None)], thumbnail=True)
+        second = transcode_page(cache_dir, page, [(480, "webp", None), (720, "jpeg", None)], thumbnail=True)
+
+        assert first == 3
+        assert second == 0
+        with Image.open(_derivatives(temp_dir)[0]) as image:
+            assert image.format == "WEBP"
+            assert image.width == 480
+
+
+class TestTranscodeJobManager:
+    def test_job__generates_every_page(self, manager, temp_dir):
+        job = _run(manager, temp_dir)
+
+        snapshot = job.to_dict()["progress"]
+        assert job.status == TranscodeJob.COMPLETED
+        assert snapshot["scanned"] == 2
+        assert snapshot["pages_done"] == 4
+        assert snapshot["failed"] == 0
+        # 4 páginas x 2 larguras + miniatura da primeira página de cada mangá
+        assert snapshot["generated"] == 10
+        assert len(_derivatives(temp_dir)) == 8
+
+    def test_job__does_not_keep_shards_in_index(self, manager, temp_dir):
+        manager.index.get_library(str(temp_dir / "library"))
+        # Como após reiniciar: o índice vem do manifesto, sem páginas
+        manager.index = LibraryIndex()
+
+        job = _run(manager, temp_dir)
+
+        library = manager.index.get_library(str(temp_dir / "library"))
+        assert job.progress.snapshot()["pages_done"] == 4
+        assert not any(chapter.pages for manga in library.mangas for chapter in manga.chapters)
+
+    def test_process_pool__does_not_fork_the_server(self):
+        executor = _process_pool(max_workers=1)
+        try:
+            assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        finally:
+            executor.shutdown()
+
+    def test_job__resumes_from_checkpoint(self, manager, temp_dir):
+        _run(manager, temp_dir)
+
+        job = _run(manager, temp_dir)
+
+        snapshot = job.progress.snapshot()
+        assert snapshot["cache_hits"] == 2
+        assert snapshot["pages_done"] == 0
+        checkpoint = json.loads(manager.checkpoint_file.read_text())
+        assert checkpoint["library_path"] == str(temp_dir / "library")
+        assert len(checkpoint["mangas"]) == 2
+
+    def test_job__changed_chapter_is_transcoded_again(self, manager, temp_dir):
+        _run(manager, temp_dir)
+        Image.new("RGB", (1200, 1800), "red").save(temp_dir / "library" / "Manga B" / "Chapter 1" / "03.jpg")
+
+        job = _run(manager, temp_dir)
+
+        snapshot = job.progress.snapshot()
+        assert snapshot["cache_hits"] == 1
+        assert snapshot["pages_done"] == 3
+        # Só a página nova é gerada; as demais já estão no cache
+        assert snapshot["generated"] == 2
+
+    def test_job__includes_quality_tiers(self, manager, temp_dir):
+        manager.settings = manager.settings.model_copy(update={
+            "image_quality_tiers": {"low": {"max_width": 360, "format": "webp", "quality": 40}}
+        })
+
+        job = _run(manager, temp_dir)
+
+        assert job.progress.snapshot()["generated"] == 14
+        widths = set()
+        for derivative in _derivatives(temp_dir):
+            with Image.open(derivative) as image:
+                widths.add(image.width)
+        assert widths == {360, 480, 720}
+
+    def test_checkpoint__discarded_when_settings_change(self, manager, temp_dir):
+        _run(manager, temp_dir)
+
+        manager.settings = manager.settings.model_copy(update={"pretranscode_formats": ["jpeg"]})
+
+        assert manager.load_checkpoint(str(temp_dir / "library")) == {}
+
+    def test_cancelled_job_keeps_checkpoint(self, manager, temp_dir):
+        job = TranscodeJob(str(temp_dir / "library"))
+        job.progress.cancel()
+
+        manager._run(job)
+
+        assert job.status == TranscodeJob.CANCELLED
+        assert job.wait(0)
+        assert manager.checkpoint_file.is_file()
+
+    def test_start__reuses_running_job(self, manager, temp_dir):
+        first = manager.start(str(temp_dir / "library"))
+        second = manager.start(str(temp_dir / "library"))
+
+        assert first.wait(30)
+        assert second is first or first.finished
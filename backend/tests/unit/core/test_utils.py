@@ -0,0 +1,62 @@
+import json
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.core.utils import atomic_write_text, locked_file
+
+
+@pytest.fixture
+def temp_directory():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+
+class TestAtomicWriteText:
+    def test_write_new_file(self, temp_directory):
+        target = temp_directory / "data.json"
+
+        atomic_write_text(target, '{"a": 1}')
+
+        assert json.loads(target.read_text(encoding='utf-8')) == {"a": 1}
+        assert [p.name for p in temp_directory.iterdir()] == ["data.json"]
+
+    def test_failure_keeps_previous_content(self, temp_directory):
+        target = temp_directory / "data.json"
+        target.write_text("original", encoding='utf-8')
+
+        with patch('app.core.utils.os.replace', side_effect=OSError("disco cheio")):
+            with pytest.raises(OSError):
+                atomic_write_text(target, "novo")
+
+        assert target.read_text(encoding='utf-8') == "original"
+        assert [p.name for p in temp_directory.iterdir()] == ["data.json"]
+
+
+class TestLockedFile:
+    def test_serializes_concurrent_writers(self, temp_directory):
+        target = temp_directory / "data.json"
+        target.write_text("0", encoding='utf-8')
+
+        def increment():
+            for _ in range(20):
+                with locked_file(target):
+                    value = int(target.read_text(encoding='utf-8'))
+                    atomic_write_text(target, str(value + 1))
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert target.read_text(encoding='utf-8') == "80"
+
+    def test_creates_lock_file(self, temp_directory):
+        target = temp_directory / "data.json"
+
+        with locked_file(target):
+            assert (temp_directory / "data.json.lock").exists()
@@ -53,6 +53,39 @@ export const libraryAPI = {
     }
   },
 
+  // Biblioteca em streaming (NDJSON): onManga é chamado a cada linha
+  streamLibrary: async (onManga, { refresh = false } = {}) => {
+    const response = await fetch(`${API_BASE_URL}/api/library/stream?refresh=${refresh}`)
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let summary = null
+
+    const handleLine = (line) => {
+      if (!line.trim()) return
+      const message = JSON.parse(line)
+      if (message.type === 'manga') onManga(message.manga)
+      else if (message.type === 'summary') summary = message
+      else if (message.type === 'error') throw new Error(message.detail)
+    }
+
+    for (;;) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split('\n')
+      buffer = lines.pop()
+      lines.forEach(handleLine)
+    }
+    handleLine(buffer)
+
+    return summary
+  },
+
   // Outras APIs
   getLibrary: () => api.get('/api/library'),
   getManga: (mangaId) => api.get(`/api/manga/${mangaId}`),
@@ -62,6 +95,43 @@ export const libraryAPI = {
   clearLibrary: () => api.post('/api/clear-library')
 }
 
+export const scanJobsAPI = {
+  // Iniciar escaneamento em segundo plano (retorna o job imediatamente)
+  start: (libraryPath) => {
+    const formData = new FormData()
+    if (libraryPath) {
+      formData.append('library_path', libraryPath)
+    }
+    return api.post('/api/scan-jobs', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' }
+    })
+  },
+
+  get: (jobId) => api.get(`/api/scan-jobs/${jobId}`),
+  cancel: (jobId) => api.delete(`/api/scan-jobs/${jobId}`),
+
+  // Acompanhar progresso via Server-Sent Events; resolve com o job final
+  watch: (jobId, onProgress) => {
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${API_BASE_URL}/api/scan-jobs/${jobId}/events`)
+
+      source.addEventListener('progress', (event) => {
+        if (onProgress) onProgress(JSON.parse(event.data))
+      })
+
+      source.addEventListener('done', (event) => {
+        source.close()
+        resolve(JSON.parse(event.data))
+      })
+
+      source.onerror = () => {
+        source.close()
+        reject(new Error('Conexão com o progresso do escaneamento perdida'))
+      }
+    })
+  }
+}
+
 export const apiUtils = {
   // Validação melhorada para caminhos
   validatePathFormat: (path) => {
@@ -1,5 +1,5 @@
 import { defineStore } from 'pinia'
-import { libraryAPI, apiUtils } from '@/services/api'
+import { libraryAPI, scanJobsAPI, apiUtils } from '@/services/api'
 import { formatError } from '@/utils/errorUtils'
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
@@ -18,6 +18,8 @@ export const useLibraryStore = defineStore('library', {
     // Estados de carregamento
     loading: false,
     scanning: false,
+    scanJobId: null,
+    scanProgress: null,
     error: null,
     
     // Configurações
@@ -99,7 +101,7 @@ export const useLibraryStore = defineStore('library', {
       }
     },
 
-    // Escanear biblioteca
+    // Escanear biblioteca (job em segundo plano com progresso via SSE)
     async scanLibrary() {
       if (!this.libraryPath) {
         throw new Error('Caminho da biblioteca não configurado')
@@ -107,37 +109,38 @@ export const useLibraryStore = defineStore('library', {
       
       this.loading = true
       this.scanning = true
+      this.scanProgress = null
       this.error = null
       
       try {
-        const formData = new FormData()
-        formData.append('library_path', this.libraryPath)
+        const { data } = await scanJobsAPI.start(this.libraryPath)
+        this.scanJobId = data.job.id
         
-        const response = await fetch(`${API_BASE_URL}/api/scan-library`, {
-          method: 'POST',
-          body: formData
+        const job = await scanJobsAPI.watch(this.scanJobId, (progress) => {
+          this.scanProgress = progress
         })
         
-        if (!response.ok) {
-          throw new Error(`HTTP ${response.status}: ${response.statusText}`)
+        if (job.status === 'cancelled') {
+          return false
+        }
+        if (job.status !== 'completed') {
+          throw new Error(job.error || 'Erro ao escanear biblioteca')
         }
         
-        const data = await response.json()
+        // O índice já está pronto no backend: receber os mangás em streaming
+        const mangas = []
+        const summary = await libraryAPI.streamLibrary((manga) => mangas.push(manga))
         
-        if (data.library) {
-          this.mangas = data.library.mangas || []
-          this.totalMangas = data.library.total_mangas || this.mangas.length
-          this.totalChapters = data.library.total_chapters || 0
-          this.totalPages = data.library.total_pages || 0
-          this.lastUpdated = new Date(data.library.last_updated || Date.now())
-          this.lastLoadTime = Date.now()
+        this.mangas = mangas
+        this.totalMangas = summary?.total_mangas ?? mangas.length
+        this.totalChapters = summary?.total_chapters || 0
+        this.totalPages = summary?.total_pages || 0
+        this.lastUpdated = new Date(job.result?.last_updated || Date.now())
+        this.lastLoadTime = Date.now()
           
-          this.saveLibraryConfig()
+        this.saveLibraryConfig()
           
-          return true
-        } else {
-          throw new Error(data.message || 'Erro ao escanear biblioteca')
-        }
+        return true
         
       } catch (error) {
         console.error('Erro no scan:', error)
@@ -146,6 +149,14 @@ export const useLibraryStore = defineStore('library', {
       } finally {
         this.loading = false
         this.scanning = false
+        this.scanJobId = null
+      }
+    },
+    
+    // Cancelar escaneamento em andamento
+    async cancelScan() {
+      if (this.scanJobId) {
+        await scanJobsAPI.cancel(this.scanJobId)
       }
     },
 
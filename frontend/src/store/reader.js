@@ -1,6 +1,8 @@
 import { defineStore } from 'pinia'
 import axios from 'axios'
 import { formatError } from '@/utils/errorUtils'
+import { getBoundary, parseMultipart } from '@/utils/multipart'
+import { pageRequestWidth } from '@/utils/pageImages'
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
 
@@ -383,48 +385,70 @@ export const useReaderStore = defineStore('reader', {
       this.goToPage(targetPage)
     },
 
-    // Pré-carregar páginas
-    preloadPages() {
-      if (!this.currentChapter?.chapter?.pages) return
+    // Pré-carregar páginas: a janela inteira vem em uma única requisição
+    // (multipart) e cada página vira um object URL usado pelo leitor
+    async preloadPages() {
+      const pages = this.currentChapter?.chapter?.pages
+      if (!pages || !this.currentManga) return
       
-      // Pré-carregar próximas 5 páginas
-      const startIndex = this.currentPage
+      // Pré-carregar próximas 5 páginas (a partir da primeira ainda não pedida)
       const endIndex = Math.min(this.totalPages, this.currentPage + 5)
+      let startIndex = this.currentPage
+      while (startIndex < endIndex && this.preloadedPages.has(pages[startIndex]?.id)) {
+        startIndex++
+      }
+      if (startIndex >= endIndex) return
       
-      for (let i = startIndex; i < endIndex; i++) {
-        const page = this.currentChapter.chapter.pages[i]
-        if (page && !this.preloadedPages.has(page.url)) {
-          this.preloadImage(page.url)
-          this.preloadedPages.add(page.url)
-        }
+      const requested = pages.slice(startIndex, endIndex).map(page => page.id)
+      requested.forEach(id => this.preloadedPages.add(id))
+      
+      const params = new URLSearchParams({
+        start: startIndex,
+        count: endIndex - startIndex,
+        w: pageRequestWidth()
+      })
+      const mangaId = encodeURIComponent(this.currentManga.id)
+      const chapterId = encodeURIComponent(this.currentChapter.chapter.id)
+      
+      try {
+        const response = await fetch(`${API_BASE_URL}/api/manga/${mangaId}/chapter/${chapterId}/pages?${params}`)
+        if (!response.ok) throw new Error(`HTTP ${response.status}`)
+        
+        const boundary = getBoundary(response.headers.get('content-type'))
+        const parts = parseMultipart(new Uint8Array(await response.arrayBuffer()), boundary)
+        parts.forEach(part => {
+          const pageId = (part.headers['content-id'] || '').replace(/[<>]/g, '')
+          if (!pageId || this.pageCache.has(pageId)) return
+          const blob = new Blob([part.body], { type: part.headers['content-type'] })
+          this.pageCache.set(pageId, URL.createObjectURL(blob))
+        })
+      } catch (error) {
+        // Páginas não recebidas são buscadas normalmente pela URL
+        requested.forEach(id => this.preloadedPages.delete(id))
+        console.warn('Erro ao pré-carregar páginas:', error)
       }
       
       // Limpar cache se muito grande
-      if (this.preloadedPages.size > this.maxCacheSize) {
-        const oldPages = Array.from(this.preloadedPages).slice(0, 10)
-        oldPages.forEach(url => {
-          this.preloadedPages.delete(url)
-          this.pageCache.delete(url)
+      if (this.pageCache.size > this.maxCacheSize) {
+        const oldPages = Array.from(this.pageCache.keys()).slice(0, 10)
+        oldPages.forEach(id => {
+          URL.revokeObjectURL(this.pageCache.get(id))
+          this.pageCache.delete(id)
+          this.preloadedPages.delete(id)
         })
       }
     },
 
-    // Pré-carregar imagem
-    preloadImage(url) {
-      return new Promise((resolve, reject) => {
-        if (this.pageCache.has(url)) {
-          resolve(this.pageCache.get(url))
-          return
-        }
+    // URL local de uma página já pré-carregada (ou null)
+    getCachedPageUrl(pageId) {
+      return this.pageCache.get(pageId) || null
+    },
         
-        const img = new Image()
-        img.onload = () => {
-          this.pageCache.set(url, img)
-          resolve(img)
-        }
-        img.onerror = reject
-        img.src = url
-      })
+    // Liberar object URLs das páginas pré-carregadas
+    releasePageCache() {
+      this.pageCache.forEach(url => URL.revokeObjectURL(url))
+      this.pageCache.clear()
+      this.preloadedPages.clear()
     },
 
     // Configurações de leitura
@@ -509,8 +533,7 @@ export const useReaderStore = defineStore('reader', {
         allChapters: []
       }
       this.readingStartTime = null
-      this.preloadedPages.clear()
-      this.pageCache.clear()
+      this.releasePageCache()
     },
 
     saveProgressDebounced() {
@@ -185,8 +185,7 @@ export const useSettingsStore = defineStore('settings', {
     // Clear cache
     clearCache() {
       const readerStore = useReaderStore()
-      readerStore.pageCache.clear()
-      readerStore.preloadedPages.clear()
+      readerStore.releasePageCache()
     }
   }
 })
\ No newline at end of file
@@ -0,0 +1,54 @@
+// Leitura de respostas multipart/mixed em que cada parte traz Content-Length
+// (formato de /api/manga/{id}/chapter/{id}/pages)
+
+const CRLF_CRLF = [13, 10, 13, 10]
+
+function indexOfSequence(bytes, sequence, from) {
+  outer: for (let i = from; i <= bytes.length - sequence.length; i++) {
+    for (let j = 0; j < sequence.length; j++) {
+      if (bytes[i + j] !== sequence[j]) continue outer
+    }
+    return i
+  }
+  return -1
+}
+
+export function getBoundary(contentType) {
+  const match = /boundary=("?)([^";]+)\1/i.exec(contentType || '')
+  return match ? match[2] : null
+}
+
+// Retorna [{ headers: { 'content-type': ..., ... }, body: Uint8Array }]
+export function parseMultipart(bytes, boundary) {
+  const decoder = new TextDecoder('latin1')
+  const delimiter = new TextEncoder().encode(`--${boundary}`)
+  const parts = []
+  let position = indexOfSequence(bytes, delimiter, 0)
+
+  while (position !== -1) {
+    const afterDelimiter = position + delimiter.length
+    // "--" depois do delimitador encerra o corpo
+    if (bytes[afterDelimiter] === 45 && bytes[afterDelimiter + 1] === 45) break
+
+    const headersEnd = indexOfSequence(bytes, CRLF_CRLF, afterDelimiter)
+    if (headersEnd === -1) break
+
+    const headers = {}
+    decoder.decode(bytes.subarray(afterDelimiter, headersEnd)).split('\r\n').forEach(line => {
+      const separator = line.indexOf(':')
+      if (separator > 0) {
+        headers[line.slice(0, separator).trim().toLowerCase()] = line.slice(separator + 1).trim()
+      }
+    })
+
+    const bodyStart = headersEnd + CRLF_CRLF.length
+    const length = Number(headers['content-length'])
+    if (!Number.isFinite(length) || bodyStart + length > bytes.length) break
+
+    parts.push({ headers, body: bytes.subarray(bodyStart, bodyStart + length) })
+    // Pula o CRLF que fecha a parte
+    position = indexOfSequence(bytes, delimiter, bodyStart + length)
+  }
+
+  return parts
+}
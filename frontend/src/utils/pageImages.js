@@ -0,0 +1,5 @@
+// Largura pedida ao servidor para as páginas (tela x DPR); o servidor
+// arredonda para faixas fixas e devolve o original acima da maior delas
+export function pageRequestWidth() {
+  return Math.round(window.innerWidth * (window.devicePixelRatio || 1))
+}